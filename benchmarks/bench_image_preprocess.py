@@ -0,0 +1,76 @@
+"""Compare OCR payload size, latency and parse accuracy with/without preprocessing.
+
+Usage:
+    python -m benchmarks.bench_image_preprocess CORPUS_DIR [--ocr] [--max-side 2048]
+
+CORPUS_DIR holds receipt photos (*.jpg, *.jpeg, *.png). Without ``--ocr`` only
+payload size and preprocessing time are measured. With ``--ocr`` (requires
+Vision credentials) each image is OCR'd both raw and preprocessed, and the
+regex-parsed store/date/items are compared so accuracy regressions show up as
+mismatches.
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from src.services.image_preprocessor import preprocess_image
+from src.services.ocr_service import OCRService
+from src.services.regex_receipt_parser import RegexReceiptParser
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", type=Path)
+    parser.add_argument("--ocr", action="store_true", help="also run Vision OCR and compare parses")
+    parser.add_argument("--max-side", type=int, default=2048)
+    args = parser.parse_args(argv)
+
+    paths = sorted(p for p in args.corpus.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not paths:
+        print(f"No images found in {args.corpus}", file=sys.stderr)
+        return 1
+
+    ocr = OCRService() if args.ocr else None
+    regex = RegexReceiptParser()
+    raw_bytes = processed_bytes = 0
+    prep_times, raw_ocr_times, prep_ocr_times = [], [], []
+    mismatches = []
+
+    for path in paths:
+        original = path.read_bytes()
+        processed, elapsed = _timed(preprocess_image, original, args.max_side)
+        raw_bytes += len(original)
+        processed_bytes += len(processed)
+        prep_times.append(elapsed)
+
+        if ocr is not None:
+            raw_text, raw_elapsed = _timed(ocr.extract_text_from_image, original)
+            prep_text, prep_elapsed = _timed(ocr.extract_text_from_image, processed)
+            raw_ocr_times.append(raw_elapsed)
+            prep_ocr_times.append(prep_elapsed)
+            if regex.parse(raw_text) != regex.parse(prep_text):
+                mismatches.append(path.name)
+
+    print(f"images:            {len(paths)}")
+    print(f"payload bytes:     {raw_bytes:,} -> {processed_bytes:,} "
+          f"({processed_bytes / raw_bytes:.1%})")
+    print(f"preprocess median: {statistics.median(prep_times) * 1000:.1f} ms")
+    if ocr is not None:
+        print(f"vision median:     {statistics.median(raw_ocr_times) * 1000:.0f} ms raw, "
+              f"{statistics.median(prep_ocr_times) * 1000:.0f} ms preprocessed")
+        print(f"parse mismatches:  {len(mismatches)}" + (f" {mismatches}" if mismatches else ""))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
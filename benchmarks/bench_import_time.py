@@ -0,0 +1,93 @@
+"""Measure cold-start cost of importing the web app and calling create_app.
+
+Usage:
+    python -m benchmarks.bench_import_time [--runs 5] [--top 10] [--max-ms 500]
+
+Each run starts a fresh interpreter with ``python -X importtime``, imports
+``src.web.app`` and builds the app with placeholder repositories (so no
+credentials are needed). Reports the median import and ``create_app`` time,
+the slowest top-level imports, and any heavy SDK (openai, Firestore, Vision)
+that was loaded at startup. Exits 1 if a heavy SDK was imported or the median
+total exceeds ``--max-ms``.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Loaded on first use only; importing any of these at startup is a regression
+HEAVY_MODULES = ("openai", "google.cloud.firestore", "google.cloud.vision")
+
+CHILD = """
+import time
+start = time.perf_counter()
+from src.web.app import create_app
+imported = time.perf_counter()
+create_app(user_repo=object(), receipt_repo=object(), coupon_repo=object(), store_repo=object())
+print(f"{imported - start} {time.perf_counter() - imported}")
+"""
+
+
+def parse_importtime(stderr: str):
+    """(module, self_us, cumulative_us, depth) for each ``-X importtime`` line."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def run_once():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    import_s, create_s = (float(v) for v in proc.stdout.split())
+    return import_s, create_s, parse_importtime(proc.stderr)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to list")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail above this median total")
+    args = parser.parse_args(argv)
+
+    import_times, create_times = [], []
+    entries = []
+    for _ in range(args.runs):
+        import_s, create_s, entries = run_once()
+        import_times.append(import_s)
+        create_times.append(create_s)
+
+    import_ms = statistics.median(import_times) * 1000
+    create_ms = statistics.median(create_times) * 1000
+    print(f"runs:              {args.runs}")
+    print(f"import median:     {import_ms:.1f} ms")
+    print(f"create_app median: {create_ms:.1f} ms")
+
+    # Slowest imports from the last run; depth 1 is what the app module pulls in directly
+    top_level = sorted((e for e in entries if e[3] <= 1), key=lambda e: e[2], reverse=True)
+    print("slowest imports (cumulative):")
+    for name, _, cumulative_us, _ in top_level[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    loaded = {name for name, *_ in entries}
+    heavy = [module for module in HEAVY_MODULES if module in loaded]
+    print(f"heavy SDKs loaded: {', '.join(heavy) if heavy else 'none'}")
+
+    failed = bool(heavy)
+    if args.max_ms is not None and import_ms + create_ms > args.max_ms:
+        print(f"startup {import_ms + create_ms:.1f} ms exceeds --max-ms {args.max_ms:g}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,10 @@ class Receipt:
         self.purchase_date = purchase_date
         self.participants: List['User'] = []
         self.uploader = user
+        # OCR text the items were parsed from; persisted so they can be re-parsed
+        self.ocr_text: Optional[str] = None
+        # Parser that produced the items: "regex" or the LLM model name
+        self.parsed_by: Optional[str] = None
 
     def add_item(self, name: str, price: Any, quantity: int) -> None:
         """Add an item by creating a ReceiptItem."""
@@ -81,4 +85,8 @@ class Receipt:
         }
         if created_at is not None:
             data["created_at"] = created_at
+        if self.ocr_text is not None:
+            data["ocr_text"] = self.ocr_text
+        if self.parsed_by is not None:
+            data["parsed_by"] = self.parsed_by
         return data
@@ -1,8 +1,13 @@
+from typing import Optional
+
+
 class Store:
     def __init__(self, name: str):
         self.name: str = name
         self.coupon_enabled: bool = False
         self.coupon_goal: int = 0
+        # Learned receipt layout (ReceiptTemplate.to_dict()), None until learned
+        self.parse_template: Optional[dict] = None
 
     def enable_coupon_system(self) -> None:
         self.coupon_enabled = True
@@ -13,15 +18,19 @@ class Store:
         self.coupon_goal = goal
 
     def to_dict(self) -> dict:
-        return {
+        data = {
             "name": self.name,
             "coupon_enabled": self.coupon_enabled,
             "coupon_goal": self.coupon_goal,
         }
+        if self.parse_template is not None:
+            data["parse_template"] = self.parse_template
+        return data
 
     @classmethod
     def from_dict(cls, data: dict) -> "Store":
         store = cls(name=data.get("name", ""))
         store.coupon_enabled = bool(data.get("coupon_enabled", False))
         store.coupon_goal = int(data.get("coupon_goal", 0))
+        store.parse_template = data.get("parse_template")
         return store
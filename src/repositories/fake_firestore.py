@@ -0,0 +1,385 @@
+"""In-memory Firestore client with latency and failure injection.
+
+Implements the subset of the ``google.cloud.firestore.Client`` surface the
+repositories use (collections, documents, ``where``/``order_by``/
+``start_after``/``limit`` queries,
+``stream``/``get``, ``add``, ``set(merge=...)``, ``update``, ``delete``,
+``get_all``, batches and transactions) so repository code can be exercised and
+benchmarked locally without network access or the emulator.
+
+Every simulated round trip sleeps for ``latency`` plus uniform ``jitter``
+seconds and fails with ``error_rate`` probability. Transaction commits abort
+with ``contention_rate`` probability, which the real ``transactional``
+decorator retries just like a contended Firestore transaction.
+"""
+import copy
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1.transforms import SERVER_TIMESTAMP
+
+
+def _get_field(data: dict, path: str):
+    value: Any = data
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _set_field(data: dict, path: str, value) -> None:
+    parts = path.split(".")
+    target = data
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    target[parts[-1]] = value
+
+
+def _deep_merge(target: dict, changes: dict) -> None:
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_merge(target[key], value)
+        else:
+            target[key] = value
+
+
+def _resolve_transforms(value):
+    if value is SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    if isinstance(value, dict):
+        return {k: _resolve_transforms(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve_transforms(v) for v in value]
+    return copy.deepcopy(value)
+
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a is not None and a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a is not None and a not in b,
+    "array-contains": lambda a, b: isinstance(a, list) and b in a,
+    "array-contains-any": lambda a, b: isinstance(a, list) and any(v in a for v in b),
+}
+
+
+class FakeWriteResult:
+    def __init__(self):
+        self.update_time = datetime.now(timezone.utc)
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference: "FakeDocumentReference", data: Optional[dict]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[dict]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str):
+        return _get_field(self._data or {}, field_path)
+
+
+class FakeDocumentReference:
+    def __init__(self, client: "FakeFirestore", collection: str, doc_id: str):
+        self._client = client
+        self._collection = collection
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection}/{self.id}"
+
+    def get(self, transaction=None) -> FakeDocumentSnapshot:
+        if transaction is None:
+            self._client._rpc("get")
+        return self._client._snapshot(self)
+
+    def set(self, data: dict, merge: bool = False) -> FakeWriteResult:
+        self._client._rpc("set")
+        self._client._apply_set(self, data, merge)
+        return FakeWriteResult()
+
+    def update(self, data: dict) -> FakeWriteResult:
+        self._client._rpc("update")
+        self._client._apply_update(self, data)
+        return FakeWriteResult()
+
+    def delete(self) -> FakeWriteResult:
+        self._client._rpc("delete")
+        self._client._apply_delete(self)
+        return FakeWriteResult()
+
+
+DOCUMENT_ID = "__name__"  # FieldPath.document_id()
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeFirestore", collection: str,
+                 filters: tuple = (), limit: Optional[int] = None,
+                 order: Optional[str] = None, start_after: Any = None):
+        self._client = client
+        self._collection = collection
+        self._filters = filters
+        self._limit = limit
+        self._order = order
+        self._start_after = start_after
+
+    def _copy(self, **changes) -> "FakeQuery":
+        state = {"filters": self._filters, "limit": self._limit,
+                 "order": self._order, "start_after": self._start_after}
+        state.update(changes)
+        return FakeQuery(self._client, self._collection, **state)
+
+    def where(self, field_path: str, op_string: str, value) -> "FakeQuery":
+        if op_string not in _OPERATORS:
+            raise ValueError(f"Unsupported operator: {op_string}")
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._copy(limit=count)
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING") -> "FakeQuery":
+        """Single ascending order (a field path or ``__name__``)."""
+        if direction != "ASCENDING":
+            raise ValueError("FakeFirestore supports ascending order only")
+        return self._copy(order=field_path)
+
+    def start_after(self, document_fields) -> "FakeQuery":
+        """Cursor as a snapshot, ``{field: value}`` dict or ``[value]`` list."""
+        if self._order is None:
+            raise ValueError("start_after requires order_by")
+        if isinstance(document_fields, FakeDocumentSnapshot):
+            value = document_fields.id if self._order == DOCUMENT_ID else document_fields.get(self._order)
+        elif isinstance(document_fields, dict):
+            value = document_fields[self._order]
+        else:
+            value = list(document_fields)[0]
+        if isinstance(value, FakeDocumentReference):
+            value = value.id
+        return self._copy(start_after=value)
+
+    def _run(self) -> List[FakeDocumentSnapshot]:
+        self._client._rpc("query")
+        return self._client._query(self._collection, self._filters, self._limit,
+                                   self._order, self._start_after)
+
+    def stream(self, transaction=None):
+        yield from self._run()
+
+    def get(self, transaction=None) -> List[FakeDocumentSnapshot]:
+        return self._run()
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client: "FakeFirestore", name: str):
+        super().__init__(client, name)
+        self.id = name
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocumentReference:
+        return FakeDocumentReference(self._client, self._collection,
+                                     document_id or uuid.uuid4().hex[:20])
+
+    def add(self, document_data: dict, document_id: Optional[str] = None):
+        """Create a document with a generated id.
+
+        Returns ``(DocumentReference, WriteResult)``, the order the
+        repositories unpack.
+        """
+        ref = self.document(document_id)
+        self._client._rpc("add")
+        self._client._apply_set(ref, document_data, merge=False)
+        return ref, FakeWriteResult()
+
+
+class FakeWriteBatch:
+    def __init__(self, client: "FakeFirestore"):
+        self._client = client
+        self._writes: List[Callable[[], None]] = []
+
+    def set(self, reference: FakeDocumentReference, document_data: dict, merge: bool = False):
+        self._writes.append(lambda: self._client._apply_set(reference, document_data, merge))
+
+    def update(self, reference: FakeDocumentReference, field_updates: dict):
+        self._writes.append(lambda: self._client._apply_update(reference, field_updates))
+
+    def delete(self, reference: FakeDocumentReference):
+        self._writes.append(lambda: self._client._apply_delete(reference))
+
+    def commit(self) -> List[FakeWriteResult]:
+        self._client._rpc("commit")
+        with self._client._lock:
+            for write in self._writes:
+                write()
+        results = [FakeWriteResult() for _ in self._writes]
+        self._writes = []
+        return results
+
+
+class FakeTransaction(FakeWriteBatch):
+    """Duck-types the private hooks ``google.cloud.firestore.transactional`` drives."""
+
+    def __init__(self, client: "FakeFirestore", max_attempts: int = 5, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+
+    def _clean_up(self) -> None:
+        self._writes = []
+        self._id = None
+
+    def _begin(self, retry_id=None) -> None:
+        self._client._rpc("begin_transaction")
+        self._id = uuid.uuid4().bytes
+
+    def _commit(self) -> List[FakeWriteResult]:
+        if self._client._should_abort():
+            self._clean_up()
+            raise exceptions.Aborted("Transaction contention (injected)")
+        results = self.commit()
+        self._clean_up()
+        return results
+
+    def _rollback(self) -> None:
+        self._clean_up()
+
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, FakeDocumentReference):
+            self._client._rpc("get")
+            return self._client._snapshot(ref_or_query)
+        return ref_or_query.stream()
+
+
+class FakeFirestore:
+    """Thread-safe in-memory stand-in for ``google.cloud.firestore.Client``.
+
+    Args:
+        latency: Base delay in seconds added to every simulated round trip.
+        jitter: Extra uniform random delay in ``[0, jitter]`` seconds.
+        error_rate: Probability that a round trip raises ``ServiceUnavailable``.
+        contention_rate: Probability that a transaction commit raises ``Aborted``.
+        seed: Seed for the fault-injection RNG, for reproducible runs.
+        sleep: Sleep function; tests can inject a recorder instead of waiting.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        contention_rate: float = 0.0,
+        seed: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.contention_rate = contention_rate
+        self._sleep = sleep
+        self._random = random.Random(seed)  # nosec B311 - fault injection, not crypto
+        self._lock = threading.RLock()
+        self._data: Dict[str, Dict[str, dict]] = {}
+        # Simulated round trips by operation name, e.g. {"get": 3, "query": 1}
+        self.rpc_counts: Counter = Counter()
+
+    # Public client surface -------------------------------------------------
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, name)
+
+    def document(self, path: str) -> FakeDocumentReference:
+        collection, _, doc_id = path.partition("/")
+        return FakeDocumentReference(self, collection, doc_id)
+
+    def get_all(self, references: Iterable[FakeDocumentReference], transaction=None):
+        refs = list(references)
+        self._rpc("batch_get")
+        for ref in refs:
+            yield self._snapshot(ref)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False) -> FakeTransaction:
+        return FakeTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def reset_stats(self) -> None:
+        self.rpc_counts.clear()
+
+    # Fault injection ------------------------------------------------------
+
+    def _rpc(self, op: str) -> None:
+        with self._lock:
+            self.rpc_counts[op] += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+        if delay > 0:
+            self._sleep(delay)
+        if fail:
+            raise exceptions.ServiceUnavailable(f"Injected failure during {op}")
+
+    def _should_abort(self) -> bool:
+        with self._lock:
+            return self.contention_rate > 0 and self._random.random() < self.contention_rate
+
+    # Storage --------------------------------------------------------------
+
+    def _snapshot(self, ref: FakeDocumentReference) -> FakeDocumentSnapshot:
+        with self._lock:
+            data = self._data.get(ref._collection, {}).get(ref.id)
+            return FakeDocumentSnapshot(ref, copy.deepcopy(data))
+
+    def _query(self, collection: str, filters: tuple, limit: Optional[int],
+               order: Optional[str] = None, start_after: Any = None) -> List[FakeDocumentSnapshot]:
+        results = []
+        with self._lock:
+            docs = self._data.get(collection, {}).items()
+            if order is not None:
+                def key(item):
+                    return item[0] if order == DOCUMENT_ID else _get_field(item[1], order)
+                # Like Firestore, ordering on a field drops documents without it
+                docs = sorted((item for item in docs if key(item) is not None), key=key)
+                if start_after is not None:
+                    docs = [item for item in docs if key(item) > start_after]
+            for doc_id, data in docs:
+                if all(_OPERATORS[op](_get_field(data, field), value) for field, op, value in filters):
+                    ref = FakeDocumentReference(self, collection, doc_id)
+                    results.append(FakeDocumentSnapshot(ref, copy.deepcopy(data)))
+                    if limit is not None and len(results) >= limit:
+                        break
+        return results
+
+    def _apply_set(self, ref: FakeDocumentReference, data: dict, merge: bool) -> None:
+        resolved = _resolve_transforms(data)
+        with self._lock:
+            docs = self._data.setdefault(ref._collection, {})
+            if merge and ref.id in docs:
+                _deep_merge(docs[ref.id], resolved)
+            else:
+                docs[ref.id] = resolved
+
+    def _apply_update(self, ref: FakeDocumentReference, changes: dict) -> None:
+        with self._lock:
+            doc = self._data.get(ref._collection, {}).get(ref.id)
+            if doc is None:
+                raise exceptions.NotFound(f"No document to update: {ref.path}")
+            for path, value in changes.items():
+                _set_field(doc, path, _resolve_transforms(value))
+
+    def _apply_delete(self, ref: FakeDocumentReference) -> None:
+        with self._lock:
+            self._data.get(ref._collection, {}).pop(ref.id, None)
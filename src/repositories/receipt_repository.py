@@ -1,14 +1,23 @@
-from typing import Any, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
-from google.cloud import firestore
+
+if TYPE_CHECKING:
+    from google.cloud import firestore
 
 
 class ReceiptRepository:
-    def __init__(self, client: Optional[firestore.Client] = None):
+    def __init__(self, client: Optional["firestore.Client"] = None):
         # Allow dependency injection for easier testing and configurability
-        self.db = client or firestore.Client()
+        if client is None:
+            # Imported lazily: the Firestore SDK dominates app startup
+            from google.cloud import firestore
+
+            client = firestore.Client()
+        self.db = client
     
     def save(self, receipt: Any) -> str:
+        from google.cloud import firestore
+
         # Use model-provided serializer for Firestore mapping
         receipt_data = receipt.to_firestore_dict(
             user_id=getattr(receipt.user, "id", None),
@@ -37,8 +46,58 @@ class ReceiptRepository:
         """Convert Firestore document to dictionary with id."""
         receipt_data = doc.to_dict()
         receipt_data["id"] = doc.id
+        # The alias follows total, which batched item updates rewrite alone
+        if "total" in receipt_data:
+            receipt_data["total_amount"] = receipt_data["total"]
         return receipt_data
     
+    def stream_ocr_texts(
+        self, page_size: int = 500, start_after: Optional[str] = None
+    ) -> Iterator[Tuple[str, str, dict]]:
+        """Yield ``(receipt_id, ocr_text, receipt_data)`` for receipts that kept
+        their OCR text, in document-id order.
+
+        Reads one page of ``page_size`` documents per query instead of one
+        stream over the collection: a stream consumed as slowly as a re-parse
+        would hit Firestore's deadline partway through. ``start_after`` resumes
+        after that receipt id.
+        """
+        from google.cloud.firestore_v1.field_path import FieldPath
+
+        document_id = FieldPath.document_id()
+        while True:
+            query = self.db.collection("receipts").order_by(document_id)
+            if start_after is not None:
+                query = query.start_after({document_id: start_after})
+            docs = list(query.limit(page_size).stream())
+            for doc in docs:
+                receipt_data = doc.to_dict()
+                if receipt_data.get("ocr_text"):
+                    yield doc.id, receipt_data["ocr_text"], receipt_data
+            if len(docs) < page_size:
+                return
+            start_after = docs[-1].id
+
+    def update_items_many(self, items_by_id: Dict[str, List[dict]]) -> None:
+        """Replace items and totals of several receipts in batched writes."""
+        ids = list(items_by_id)
+        collection = self.db.collection("receipts")
+        # Firestore caps a write batch at 500 operations
+        for start in range(0, len(ids), 500):
+            batch = self.db.batch()
+            for receipt_id in ids[start:start + 500]:
+                items = items_by_id[receipt_id]
+                total = str(sum(int(item["price"]) * int(item.get("quantity", 1)) for item in items))
+                batch.update(collection.document(receipt_id), {
+                    "items": [
+                        {"name": item["name"], "price": str(item["price"]),
+                         "quantity": item.get("quantity", 1), "assigned_users": []}
+                        for item in items
+                    ],
+                    "total": total,
+                })
+            batch.commit()
+
     def find_by_user_id(self, user_id: str) -> List[dict]:
         docs = self.db.collection("receipts").where("user_id", "==", user_id).get()
         return [self._doc_to_dict(doc) for doc in docs]
@@ -25,6 +25,22 @@ class UserRepository:
             return User.from_dict(doc.to_dict())
         return None
     
+    def get_many(self, user_ids):
+        """Fetch several users in a single batched read.
+
+        Returns a dict keyed by user id; ids without a document are omitted.
+        """
+        ids = list(dict.fromkeys(user_ids))
+        if not ids:
+            return {}
+        collection = self.firestore_client.collection(USERS_COLLECTION)
+        refs = [collection.document(user_id) for user_id in ids]
+        users = {}
+        for doc in self.firestore_client.get_all(refs):
+            if doc.exists:
+                users[doc.id] = User.from_dict(doc.to_dict())
+        return users
+
     def list_all(self):
         docs = self.firestore_client.collection(USERS_COLLECTION).stream()
         return [User.from_dict(doc.to_dict()) for doc in docs]
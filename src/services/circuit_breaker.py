@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for one external dependency.
+
+    The outcome of the last ``window`` calls is kept. Once at least
+    ``min_calls`` are recorded and the failure rate reaches
+    ``failure_rate``, the breaker opens and ``allow()`` refuses calls for
+    ``reset_timeout`` seconds. It then goes half-open and lets one trial
+    call through: success closes it, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._outcomes: deque = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @classmethod
+    def from_env(cls, name: str) -> "CircuitBreaker":
+        """Build from CIRCUIT_FAILURE_RATE / CIRCUIT_WINDOW / CIRCUIT_MIN_CALLS /
+        CIRCUIT_RESET_SECONDS."""
+        return cls(
+            name,
+            failure_rate=float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5")),
+            window=int(os.getenv("CIRCUIT_WINDOW", "20")),
+            min_calls=int(os.getenv("CIRCUIT_MIN_CALLS", "5")),
+            reset_timeout=float(os.getenv("CIRCUIT_RESET_SECONDS", "30")),
+        )
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being refused (half-open is not open)."""
+        return self.state == OPEN
+
+    def allow(self) -> bool:
+        """Whether a call may proceed now; counts refusals."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.successes += 1
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+            self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(False)
+            if len(self._outcomes) >= self.min_calls and self._failure_rate() >= self.failure_rate:
+                self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._trial_in_flight = False
+        self.times_opened += 1
+
+    def _failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._outcomes.clear()
+            self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "failure_rate": round(self._failure_rate(), 3),
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+            }
+
+
+# Process-wide breakers, one per dependency, so every OCRService and
+# LLMReceiptParser instance sees the same health state.
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """The shared breaker for dependency ``name`` (e.g. "ocr", "llm")."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker.from_env(name)
+        return breaker
+
+
+def breaker_stats() -> Dict[str, Dict[str, float]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
+
+
+def reset_breakers() -> None:
+    """Drop all shared breakers (tests, or after an incident)."""
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def is_unavailable(parser) -> bool:
+    """True when ``parser`` guards its calls with a breaker that is open."""
+    breaker: Optional[CircuitBreaker] = getattr(parser, "breaker", None)
+    return isinstance(breaker, CircuitBreaker) and breaker.is_open
@@ -0,0 +1,185 @@
+import io
+import logging
+import mmap
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence, Union
+
+
+# Long side in pixels after downscaling. Dense Korean receipt text stays
+# legible to Vision well below phone-camera resolution; 2048px keeps ~3px
+# strokes on a typical 80mm thermal receipt photographed full-frame.
+DEFAULT_MAX_SIDE = 2048
+DEFAULT_JPEG_QUALITY = 85
+
+
+def preprocess_image(
+    content: bytes,
+    max_side: int = DEFAULT_MAX_SIDE,
+    quality: int = DEFAULT_JPEG_QUALITY,
+) -> bytes:
+    """Normalize a receipt photo for OCR.
+
+    Applies the EXIF orientation, converts to grayscale, downscales so the
+    long side is at most ``max_side`` and re-encodes as JPEG. Returns the
+    original bytes when Pillow is unavailable, the input is not a decodable
+    image (e.g. PDF) or exceeds Pillow's decompression-bomb pixel limit, or
+    re-encoding would not make it smaller.
+    """
+    try:
+        from PIL import Image, ImageOps, UnidentifiedImageError
+    except ImportError:
+        return content
+
+    if isinstance(content, mmap.mmap):
+        # A mapped spool file already behaves like a seekable file
+        content.seek(0)
+        source = content
+    else:
+        source = io.BytesIO(content)
+
+    try:
+        with Image.open(source) as opened:
+            image = ImageOps.exif_transpose(opened)
+            image = image.convert("L")
+            if max(image.size) > max_side:
+                image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            image.save(out, format="JPEG", quality=quality, optimize=True)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+        return content
+
+    processed = out.getvalue()
+    return processed if len(processed) < len(content) else content
+
+
+class MappedFile(mmap.mmap):
+    """Read-only mapping of a file on disk that remembers its ``path``.
+
+    Worker processes are sent the path and open the file themselves, so a
+    spooled upload is never copied into the pool.
+    """
+    path: Optional[str] = None
+
+
+@contextmanager
+def map_file(path: str) -> Iterator[Union[MappedFile, bytes]]:
+    """Map ``path`` read-only for the duration of the block."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        mapped = MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mapped.path = path
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def _preprocess_file(path: str, max_side: int, quality: int) -> Optional[bytes]:
+    """``preprocess_image`` for a file the worker maps itself; None means
+    the caller should send its original bytes unchanged."""
+    with map_file(path) as content:
+        processed = preprocess_image(content, max_side, quality)
+        return None if processed is content else processed
+
+
+def pool_context():
+    """Start-method context for worker pools in a multi-threaded process.
+
+    Forkserver (spawn where unavailable) rather than fork, which could copy
+    a lock held by another thread (gRPC, request threads) into the child.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ImagePreprocessor:
+    """Runs ``preprocess_image`` in a process pool, off the request threads.
+
+    Decoding and resampling a 12 MP photo is CPU-bound and holds the GIL, so
+    the work goes to worker processes. Mapped files (``MappedFile``) are
+    passed by path; other buffers are copied once to the worker. If the pool
+    breaks (e.g. a worker was killed) the image is processed inline rather
+    than failing the upload.
+    Workers start from ``pool_context()``, never a fork of the web process.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_side: int = DEFAULT_MAX_SIDE,
+        quality: int = DEFAULT_JPEG_QUALITY,
+        timeout: float = 30.0,
+    ):
+        self.max_workers = max_workers
+        self.max_side = max_side
+        self.quality = quality
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["ImagePreprocessor"]:
+        """Build from OCR_PREPROCESS* env vars; None when disabled."""
+        if (os.getenv("OCR_PREPROCESS", "1") or "").lower() in ("0", "false", "no"):
+            return None
+        workers = os.getenv("OCR_PREPROCESS_WORKERS")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            max_side=int(os.getenv("OCR_PREPROCESS_MAX_SIDE", str(DEFAULT_MAX_SIDE))),
+        )
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=pool_context()
+                    )
+        return self._executor
+
+    def preprocess(self, content: bytes) -> bytes:
+        return self.preprocess_many([content])[0]
+
+    def preprocess_many(self, images: Sequence[bytes]) -> List[bytes]:
+        if not images:
+            return []
+        try:
+            futures = [self._submit(content) for content in images]
+            return [self._result(future, content) for future, content in zip(futures, images)]
+        except (BrokenProcessPool, OSError, TimeoutError) as e:
+            logging.warning(f"Image preprocessing pool unavailable: {e}. Processing inline.")
+            self.shutdown(wait=False)
+            return [preprocess_image(content, self.max_side, self.quality) for content in images]
+
+    def _submit(self, content):
+        path = getattr(content, "path", None)
+        if path is not None:
+            return self._pool().submit(_preprocess_file, path, self.max_side, self.quality)
+        # Other buffers (memoryview, plain mmap) can't be pickled; small uploads
+        # stay in memory below the spool threshold, so this copy is bounded
+        data = content if isinstance(content, bytes) else bytes(content)
+        return self._pool().submit(preprocess_image, data, self.max_side, self.quality)
+
+    def _result(self, future, content: bytes) -> bytes:
+        try:
+            processed = future.result(timeout=self.timeout)
+            return content if processed is None else processed
+        except (BrokenProcessPool, OSError, TimeoutError):
+            raise
+        except Exception as e:
+            # One bad image (e.g. a decompression bomb) keeps its original bytes
+            logging.warning(f"Image preprocessing failed: {e}. Sending original bytes.")
+            return content
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=not wait)
+                self._executor = None
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+MEMORY = ":memory:"
+
+
+def normalize_ocr_text(ocr_text: str) -> str:
+    """Collapse whitespace per line and drop blank lines.
+
+    OCR of the same receipt often differs only in spacing or indentation;
+    those variants should share a cache entry.
+    """
+    lines = (" ".join(line.split()) for line in ocr_text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def parse_cache_key(ocr_text: str, model: str, prompt_version: str) -> str:
+    """Hex SHA-256 of model, prompt version and normalized text."""
+    material = "\0".join((model, prompt_version, normalize_ocr_text(ocr_text)))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMParseCache:
+    """SQLite cache of LLM parse results (JSON) with LRU and TTL eviction.
+
+    With a file path it survives restarts and is shared by every worker
+    process on the host (WAL mode). ``path=":memory:"`` keeps a private
+    in-process cache. Only successful parses should be stored; callers
+    decide what counts as success.
+    """
+
+    def __init__(
+        self,
+        path: str = MEMORY,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: Optional[float] = 30 * 24 * 3600,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if path != MEMORY:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        with self._conn:
+            if path != MEMORY:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_parse_cache ("
+                " key TEXT PRIMARY KEY,"
+                " result TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS llm_parse_cache_last_access"
+                " ON llm_parse_cache(last_access)"
+            )
+
+    @classmethod
+    def from_env(cls) -> "LLMParseCache":
+        """Build from LLM_CACHE_PATH / LLM_CACHE_MAX_MB / LLM_CACHE_TTL_HOURS.
+
+        Without LLM_CACHE_PATH the cache lives in memory for this process.
+        """
+        max_mb = float(os.getenv("LLM_CACHE_MAX_MB", "16"))
+        ttl_hours = float(os.getenv("LLM_CACHE_TTL_HOURS", str(30 * 24)))
+        return cls(
+            os.getenv("LLM_CACHE_PATH") or MEMORY,
+            max_bytes=int(max_mb * 1024 * 1024),
+            ttl_seconds=ttl_hours * 3600 if ttl_hours > 0 else None,
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM llm_parse_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                with self._conn:
+                    self._conn.execute("DELETE FROM llm_parse_cache WHERE key = ?", (key,))
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE llm_parse_cache SET last_access = ? WHERE key = ?", (now, key)
+                )
+            return json.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        payload = json.dumps(result, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_parse_cache (key, result, size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, payload, size, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        evicted = 0
+        if self.ttl_seconds is not None:
+            evicted += self._conn.execute(
+                "DELETE FROM llm_parse_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_parse_cache").fetchone()
+        if total > self.max_bytes:
+            stale = []
+            for key, size in self._conn.execute(
+                "SELECT key, size FROM llm_parse_cache ORDER BY last_access ASC"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                stale.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM llm_parse_cache WHERE key = ?", stale)
+            evicted += len(stale)
+        self.evictions += evicted
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_parse_cache"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
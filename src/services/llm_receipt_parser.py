@@ -1,27 +1,245 @@
+import copy
 import json
 import logging
 import os
+import random
+import threading
 import time
-from functools import lru_cache
-from typing import List, Dict, Optional
-from openai import OpenAI
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, List, Dict, Optional, Sequence
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker
+from .llm_cache import LLMParseCache, parse_cache_key
+from .parse_memo import copy_result
+from .rate_limiter import RateLimiter
 from .receipt_parser_interface import ReceiptParserInterface, ParsedReceiptDTO
+from .receipt_scanner import prefilter_ocr_text, scan_receipt_text
+
+# The openai SDK is imported on first use, not at startup
+if TYPE_CHECKING:
+    from openai import RateLimitError
+
+MAX_COMPLETION_TOKENS = 500
+# 500 completion tokens fit roughly 30 items of JSON; stay well below that
+DEFAULT_CHUNK_LINES = 25
+DEFAULT_CHUNK_OVERLAP = 3
+# 429 handling: exponential backoff with full jitter, honouring Retry-After
+RATE_LIMIT_RETRIES = 5
+RATE_LIMIT_BACKOFF = 1.0
+RATE_LIMIT_MAX_BACKOFF = 30.0
+# Connection errors, timeouts, 408/409 and 5xx: the SDK's own retries are off,
+# so retry them here too, fewer times (each attempt can take the full timeout)
+TRANSIENT_RETRIES = 2
+# Per-request timeout; the SDK default (600s) would hold an upload for minutes
+DEFAULT_TIMEOUT_SECONDS = 10.0
+
+# Bump PROMPT_VERSION whenever SYSTEM_PROMPT changes so cached parses made
+# with the old prompt are not reused.
+PROMPT_VERSION = "1"
+SYSTEM_PROMPT = """You are a Korean receipt parser. Your job is to extract structured data from Korean receipt OCR text.
+
+Extract the following information and return it as valid JSON:
+- store: Store name (string or null if not found)  
+- date: Date and time in "YYYY-MM-DD HH:MM:SS" format (string or null if not found)
+- items: Array of items with name, price (in Korean won as integer), and quantity (integer)
+
+Rules:
+1. Only extract actual purchasable items (food, drinks, products)
+2. Skip meta lines like: 총계, 소계, 할인, 부가세, 카드결제, 현금, TEL, 전화번호, 승인번호, 영수증번호
+3. Remove commas from prices and convert to integers
+4. If quantity is not specified, default to 1
+5. Return valid JSON only, no additional text
+
+Example output:
+{
+  "store": "스타벅스 강남점",
+  "date": "2024-09-01 12:34:56", 
+  "items": [
+    {"name": "아메리카노", "price": 4500, "quantity": 1},
+    {"name": "치즈케이크", "price": 6200, "quantity": 1}
+  ]
+}"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count without a tokenizer.
+
+    About four ASCII characters per token; Hangul and other non-ASCII
+    characters are counted as one token each, which is close for Korean
+    with OpenAI's BPE vocabularies.
+    """
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+BATCH_DELIMITER = "### Receipt"
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + f"""
+
+The user message may contain several receipts, each starting with a line
+"{BATCH_DELIMITER} <n> ###". In that case return a JSON array with exactly
+one object per receipt, in the same order, each shaped like the example
+above plus "receipt": <n>. Return the array only, no additional text."""
+
+
+def split_line_chunks(lines: Sequence[str], size: int, overlap: int) -> List[List[str]]:
+    """Windows of ``size`` lines, each repeating the last ``overlap`` lines
+    of the previous one so an item split across a boundary is seen whole."""
+    step = max(1, size - overlap)
+    chunks = []
+    for start in range(0, len(lines), step):
+        chunks.append(list(lines[start:start + size]))
+        if start + size >= len(lines):
+            break
+    return chunks
+
+
+def _item_key(item: Dict[str, Any]):
+    return (str(item.get("name", "")).strip(), item.get("price"), item.get("quantity", 1))
+
+
+def merge_overlapping_items(
+    previous: List[Dict[str, Any]], current: List[Dict[str, Any]], overlap: int
+) -> List[Dict[str, Any]]:
+    """Append ``current`` to ``previous`` without the items both chunks read
+    from the shared overlap lines.
+
+    Drops the longest run (at most ``overlap`` items) that ends ``previous``
+    and starts ``current``, so genuinely repeated items elsewhere survive.
+    """
+    for size in range(min(overlap, len(previous), len(current)), 0, -1):
+        if [_item_key(i) for i in previous[-size:]] == [_item_key(i) for i in current[:size]]:
+            return previous + current[size:]
+    return previous + current
+
+
+def validate_parse_result(result: Any, totals: Sequence[int] = (), tolerance: float = 0.02) -> List[str]:
+    """Problems with an LLM parse result; empty when it looks right.
+
+    Checks the JSON shape, that every item has a name and positive integer
+    price and quantity, and, when the receipt has a detected total, that
+    the item sum is within ``tolerance`` of one of them.
+    """
+    if not isinstance(result, dict):
+        return ["not an object"]
+    items = result.get("items")
+    if not isinstance(items, list) or not items:
+        return ["no items"]
+    problems = []
+    item_sum = 0
+    for item in items:
+        if not isinstance(item, dict) or not str(item.get("name") or "").strip():
+            problems.append("item without name")
+            continue
+        price, quantity = item.get("price"), item.get("quantity", 1)
+        if not isinstance(price, int) or isinstance(price, bool) or price <= 0:
+            problems.append(f"bad price for {item['name']}")
+            continue
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            problems.append(f"bad quantity for {item['name']}")
+            continue
+        item_sum += price * quantity
+    if not problems and totals:
+        if not any(abs(item_sum - total) <= max(tolerance * total, 10) for total in totals):
+            problems.append(f"item sum {item_sum} does not match total {totals[-1]}")
+    return problems
+
+
+def _to_dto(result: Dict[str, Any]) -> ParsedReceiptDTO:
+    return ParsedReceiptDTO(
+        store_name=result.get("store"),
+        date=result.get("date"),
+        items=result.get("items", [])
+    )
+
+
+def _is_transient(error: Exception) -> bool:
+    from openai import APIConnectionError, APIStatusError, InternalServerError
+
+    if isinstance(error, (APIConnectionError, InternalServerError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in (408, 409)
+
+
+def _retry_after_seconds(error: "RateLimitError") -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
 
 
 class LLMReceiptParser(ReceiptParserInterface):
     """LLM-based receipt parser using OpenAI GPT models for Korean receipt parsing."""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = "gpt-4o-mini",
+        cache: Optional[LLMParseCache] = None,
+        prefilter: Optional[bool] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        escalation_models: Optional[Sequence[str]] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
         """Initialize the LLM parser.
         
         Args:
             api_key: OpenAI API key. If None, reads from OPENAI_API_KEY env var.
             model: Model to use. Defaults to gpt-4o-mini.
+            cache: Parse result cache. If None, built from LLM_CACHE_* env
+                vars (in-memory when LLM_CACHE_PATH is unset).
+            prefilter: Strip noise lines (TEL, 승인번호, card and footer
+                lines) before sending. If None, reads LLM_PREFILTER (default on).
+            rate_limiter: Requests/tokens per minute budget shared by all
+                calls from this parser. If None, built from LLM_RPM/LLM_TPM
+                (no limit when unset).
+            escalation_models: Stronger models tried in order when the
+                result from ``model`` fails validation. If None, reads the
+                comma-separated LLM_ESCALATION_MODELS (none when unset).
+            breaker: Circuit breaker for the OpenAI API. If None, the
+                process-wide "llm" breaker is used.
+
+        Each request times out after LLM_TIMEOUT_SECONDS (default 10). SDK
+        retries are off: ``_call_rate_limited`` retries 429s and transient
+        errors itself, with jittered backoff and under the circuit breaker.
         """
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        from openai import OpenAI
+
+        self.client = OpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", str(DEFAULT_TIMEOUT_SECONDS))),
+            max_retries=0,
+        )
         self.model = model
+        self.cache = cache if cache is not None else LLMParseCache.from_env()
+        if prefilter is None:
+            prefilter = (os.getenv("LLM_PREFILTER", "1") or "").lower() not in ("0", "false", "no")
+        self.prefilter = prefilter
+        self._token_counts: Counter = Counter()
+        self._token_lock = threading.Lock()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter.from_env()
+        self.breaker = breaker if breaker is not None else get_breaker("llm")
+        # Receipts longer than chunk_lines are parsed in overlapping chunks
+        self.chunk_lines = max(2, int(os.getenv("LLM_CHUNK_LINES", str(DEFAULT_CHUNK_LINES))))
+        self.chunk_overlap = min(
+            int(os.getenv("LLM_CHUNK_OVERLAP", str(DEFAULT_CHUNK_OVERLAP))), self.chunk_lines - 1
+        )
+        self._sleep = time.sleep
+        if escalation_models is None:
+            escalation_models = [m.strip() for m in os.getenv("LLM_ESCALATION_MODELS", "").split(",") if m.strip()]
+        self.escalation_models = list(escalation_models)
+        self._tier_counts: Counter = Counter()
+        # Each tier is this parser with another model, sharing client, cache,
+        # limiter, breaker and counters
+        self._escalation_tiers: List["LLMReceiptParser"] = []
+        for escalation_model in self.escalation_models:
+            tier = copy.copy(self)
+            tier.model = escalation_model
+            tier.escalation_models = []
+            tier._escalation_tiers = []
+            self._escalation_tiers.append(tier)
         
-    def _make_api_call(self, system_prompt: str, user_content: str):
+    def _make_api_call(self, system_prompt: str, user_content: str, max_tokens: int = MAX_COMPLETION_TOKENS):
         """Make the actual API call to OpenAI. Separated for easier mocking."""
         return self.client.chat.completions.create(
             model=self.model,
@@ -30,80 +248,339 @@ class LLMReceiptParser(ReceiptParserInterface):
                 {"role": "user", "content": user_content}
             ],
             temperature=0,
-            max_tokens=500
+            max_tokens=max_tokens
         )
+
+    def _call_with_retry(
+        self,
+        user_content: str,
+        system_prompt: str = SYSTEM_PROMPT,
+        max_tokens: int = MAX_COMPLETION_TOKENS,
+    ):
+        """``_make_api_call`` behind the circuit breaker and rate limiter.
+
+        Raises ``CircuitOpenError`` without calling the API while the breaker
+        is open. Timeouts, connection errors, 5xx and exhausted 429 retries
+        count as failures; any other answer means the API is up.
+        """
+        from openai import APIConnectionError, InternalServerError, RateLimitError
+
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.breaker.name} circuit open")
+        try:
+            response = self._call_rate_limited(user_content, system_prompt, max_tokens)
+        except (APIConnectionError, InternalServerError, RateLimitError):
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return response
+
+    def _call_rate_limited(self, user_content: str, system_prompt: str, max_tokens: int):
+        """``_make_api_call`` under the rate limiter, retrying 429 responses.
+
+        Transient errors (``_is_transient``) get ``TRANSIENT_RETRIES`` retries
+        with the same backoff, and none once the breaker has opened.
+        """
+        from openai import RateLimitError
+
+        transient_failures = 0
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(
+                    estimate_tokens(system_prompt) + estimate_tokens(user_content) + max_tokens
+                )
+            try:
+                return self._make_api_call(system_prompt, user_content, max_tokens)
+            except RateLimitError as e:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                delay = random.uniform(0, min(RATE_LIMIT_MAX_BACKOFF, RATE_LIMIT_BACKOFF * 2 ** attempt))
+                retry_after = _retry_after_seconds(e)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                logging.warning(f"LLM rate limited; retrying in {delay:.1f}s")
+                with self._token_lock:
+                    self._token_counts["rate_limited"] += 1
+                self._sleep(delay)
+            except Exception as e:
+                if (
+                    not _is_transient(e)
+                    or transient_failures == TRANSIENT_RETRIES
+                    or attempt == RATE_LIMIT_RETRIES
+                    or self.breaker.is_open
+                ):
+                    raise
+                delay = random.uniform(0, min(RATE_LIMIT_MAX_BACKOFF, RATE_LIMIT_BACKOFF * 2 ** transient_failures))
+                transient_failures += 1
+                logging.warning(f"LLM call failed ({type(e).__name__}); retrying in {delay:.1f}s")
+                with self._token_lock:
+                    self._token_counts["transient_retries"] += 1
+                self._sleep(delay)
     
+    def close(self) -> None:
+        """Release the HTTP connection pool and the parse cache."""
+        self.client.close()
+        self.cache.close()
+
     def parse(self, ocr_text: str) -> ParsedReceiptDTO:
         """Parse OCR text using LLM and return structured DTO"""
         result = self.parse_receipt(ocr_text)
-        return ParsedReceiptDTO(
-            store_name=result.get("store"),
-            date=result.get("date"),
-            items=result.get("items", [])
-        )
+        dto = _to_dto(result)
+        dto.model = result.get("model", self.model)
+        return dto
         
-    @lru_cache(maxsize=128)
+    def parse_many(
+        self,
+        texts: Sequence[str],
+        max_workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> List[ParsedReceiptDTO]:
+        """Parse many receipts concurrently; results are in input order.
+
+        Calls run on a thread pool (``LLM_MAX_CONCURRENCY``, default 8) and
+        share this parser's rate limiter and cache. Identical texts are
+        parsed once. With ``batch_size`` > 1 (default ``LLM_BATCH_SIZE``,
+        1) each call carries that many receipts; see ``parse_batch``.
+        """
+        if max_workers is None:
+            max_workers = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        if batch_size is None:
+            batch_size = int(os.getenv("LLM_BATCH_SIZE", "1"))
+        batch_size = max(1, batch_size)
+        unique = list(dict.fromkeys(texts))
+        if not unique:
+            return []
+        chunks = [unique[start:start + batch_size] for start in range(0, len(unique), batch_size)]
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(chunks))), thread_name_prefix="llm-parse"
+        ) as executor:
+            parsed = {}
+            for chunk, results in zip(chunks, executor.map(self.parse_batch, chunks)):
+                parsed.update(zip(chunk, results))
+        # Duplicates get their own copy so callers can edit items independently
+        return [copy_result(parsed[text]) for text in texts]
+
+    def parse_batch(self, texts: Sequence[str]) -> List[ParsedReceiptDTO]:
+        """Parse several receipts with one request; results are in input order.
+
+        The receipts are numbered and delimited in one user message and the
+        model answers with a JSON array. Cached receipts are not sent. If
+        the answer is not an array with one object per receipt, the
+        receipts are parsed with individual calls instead.
+        """
+        prompt_texts = [self._prompt_text(text) for text in texts]
+        keys = [parse_cache_key(text, self.model, PROMPT_VERSION) for text in prompt_texts]
+        results: List[Optional[Dict[str, Any]]] = [self.cache.get(key) for key in keys]
+        misses = [index for index, result in enumerate(results) if result is None]
+        # Long receipts need chunking and would blow the batch's token cap
+        batchable = [index for index in misses if not self._is_long(prompt_texts[index])]
+
+        if len(batchable) > 1:
+            fetched = self._request_batch([prompt_texts[index] for index in batchable])
+            if fetched is None:
+                with self._token_lock:
+                    self._token_counts["batch_fallbacks"] += 1
+            else:
+                for index, result in zip(batchable, fetched):
+                    results[index] = result
+                    self._store(keys[index], result)
+                misses = [index for index in misses if index not in batchable]
+
+        for index in misses:
+            results[index] = self._fetch(prompt_texts[index], keys[index])
+        if self._escalation_tiers:
+            results = [
+                self._escalate(text, prompt_text, result)
+                for text, prompt_text, result in zip(texts, prompt_texts, results)
+            ]
+        dtos = [_to_dto(result) for result in results]
+        for dto, result in zip(dtos, results):
+            dto.model = result.get("model", self.model)
+        return dtos
+
+    def _request_batch(self, prompt_texts: Sequence[str]) -> Optional[List[Dict[str, Any]]]:
+        """One request for several receipts; None when the answer is unusable."""
+        user_content = "\n\n".join(
+            f"{BATCH_DELIMITER} {number} ###\n{text}" for number, text in enumerate(prompt_texts, start=1)
+        )
+        decoded = self._request_json(
+            user_content, BATCH_SYSTEM_PROMPT, MAX_COMPLETION_TOKENS * len(prompt_texts)
+        )
+        if isinstance(decoded, dict):
+            decoded = decoded.get("receipts")
+        if not isinstance(decoded, list) or len(decoded) != len(prompt_texts):
+            return None
+        if not all(isinstance(entry, dict) for entry in decoded):
+            return None
+        # Honour explicit numbering when the model reorders its answer
+        numbers = [entry.get("receipt") for entry in decoded]
+        if sorted(n for n in numbers if isinstance(n, int)) == list(range(1, len(decoded) + 1)):
+            decoded = sorted(decoded, key=lambda entry: entry["receipt"])
+        return decoded
+
     def parse_receipt(self, ocr_text: str) -> Dict:
         """Parse OCR text using LLM to extract structured receipt data.
         
+        Results are cached by normalized text, model and prompt version;
+        failed or empty parses are not cached, so they are retried.
+        
         Args:
             ocr_text: Raw OCR text from receipt
             
         Returns:
             Dict with parsed receipt data containing store, date, and items
         """
-        system_prompt = """You are a Korean receipt parser. Your job is to extract structured data from Korean receipt OCR text.
+        prompt_text = self._prompt_text(ocr_text)
+        result = self._parse_prompt(prompt_text)
+        if self._escalation_tiers:
+            result = self._escalate(ocr_text, prompt_text, result)
+        return result
 
-Extract the following information and return it as valid JSON:
-- store: Store name (string or null if not found)  
-- date: Date and time in "YYYY-MM-DD HH:MM:SS" format (string or null if not found)
-- items: Array of items with name, price (in Korean won as integer), and quantity (integer)
+    def _parse_prompt(self, prompt_text: str) -> Dict:
+        key = parse_cache_key(prompt_text, self.model, PROMPT_VERSION)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        return self._fetch(prompt_text, key)
 
-Rules:
-1. Only extract actual purchasable items (food, drinks, products)
-2. Skip meta lines like: 총계, 소계, 할인, 부가세, 카드결제, 현금, TEL, 전화번호, 승인번호, 영수증번호
-3. Remove commas from prices and convert to integers
-4. If quantity is not specified, default to 1
-5. Return valid JSON only, no additional text
+    def _escalate(self, ocr_text: str, prompt_text: str, result: Dict) -> Dict:
+        """Move up the model tiers until a result validates; the last tier's
+        answer is kept even if it does not. Adds the chosen ``model``."""
+        totals = scan_receipt_text(ocr_text).totals
+        model = self.model
+        for tier in self._escalation_tiers:
+            problems = validate_parse_result(result, totals)
+            if not problems:
+                break
+            logging.info(f"Escalating receipt parse from {model} to {tier.model}: {', '.join(problems)}")
+            result = tier._parse_prompt(prompt_text)
+            model = tier.model
+        with self._token_lock:
+            self._tier_counts[model] += 1
+        return dict(result, model=model)
 
-Example output:
-{
-  "store": "스타벅스 강남점",
-  "date": "2024-09-01 12:34:56", 
-  "items": [
-    {"name": "아메리카노", "price": 4500, "quantity": 1},
-    {"name": "치즈케이크", "price": 6200, "quantity": 1}
-  ]
-}"""
+    def tier_stats(self) -> Dict[str, int]:
+        """Receipts finally parsed by each model in tiered mode."""
+        with self._token_lock:
+            return {model: self._tier_counts[model] for model in [self.model] + self.escalation_models}
+
+    def _fetch_chunked(self, prompt_text: str, key: str) -> Dict:
+        """Parse a long receipt as overlapping line chunks in parallel.
+
+        A single call would hit the completion token cap and return
+        truncated JSON. Store and date come from the header (first) chunk,
+        falling back to the first chunk that has them; items are
+        concatenated with the overlap de-duplicated.
+        """
+        chunks = split_line_chunks(prompt_text.splitlines(), self.chunk_lines, self.chunk_overlap)
+        workers = max(1, min(len(chunks), int(os.getenv("LLM_MAX_CONCURRENCY", "8"))))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-chunk") as executor:
+            parts = list(executor.map(self._request_parse, ["\n".join(chunk) for chunk in chunks]))
+        if any(part is None for part in parts):
+            # A missing middle chunk would silently drop items; report failure
+            return {"store": None, "date": None, "items": []}
+
+        items: List[Dict[str, Any]] = []
+        for part in parts:
+            items = merge_overlapping_items(items, list(part.get("items") or []), self.chunk_overlap)
+        result = {
+            "store": next((p.get("store") for p in parts if p.get("store")), None),
+            "date": next((p.get("date") for p in parts if p.get("date")), None),
+            "items": items,
+        }
+        self._store(key, result)
+        return result
 
+    def _is_long(self, prompt_text: str) -> bool:
+        return len(prompt_text.splitlines()) > self.chunk_lines
+
+    def _fetch(self, prompt_text: str, key: str) -> Dict:
+        """Ask the LLM for one receipt and cache the result unless it failed."""
+        if self._is_long(prompt_text):
+            return self._fetch_chunked(prompt_text, key)
+        result = self._request_parse(prompt_text)
+        if result is None:
+            return {"store": None, "date": None, "items": []}
+        self._store(key, result)
+        return result
+
+    def _store(self, key: str, result: Dict[str, Any]) -> None:
+        # Empty answers are usually transient model/API hiccups; retry later
+        if result.get("store") or result.get("date") or result.get("items"):
+            self.cache.put(key, result)
+
+    def _prompt_text(self, ocr_text: str) -> str:
+        """The user message for ``ocr_text``, prefiltered when enabled."""
+        if not self.prefilter:
+            return ocr_text
+        filtered = prefilter_ocr_text(ocr_text)
+        with self._token_lock:
+            self._token_counts["texts"] += 1
+            self._token_counts["tokens_before"] += estimate_tokens(ocr_text)
+            self._token_counts["tokens_after"] += estimate_tokens(filtered)
+        return filtered
+
+    def token_stats(self) -> Dict[str, int]:
+        """Estimated user-message tokens before/after prefiltering, and the
+        prompt tokens the API reported for calls actually made."""
+        with self._token_lock:
+            return {
+                name: self._token_counts[name]
+                for name in (
+                    "texts", "tokens_before", "tokens_after", "api_calls", "prompt_tokens", "rate_limited",
+                    "transient_retries", "batch_fallbacks",
+                )
+            }
+
+    def _request_parse(self, ocr_text: str) -> Optional[Dict[str, Any]]:
+        """Call the LLM and decode its JSON object; None on any failure."""
+        result = self._request_json(ocr_text)
+        return result if isinstance(result, dict) else None
+
+    def _request_json(
+        self,
+        user_content: str,
+        system_prompt: str = SYSTEM_PROMPT,
+        max_tokens: int = MAX_COMPLETION_TOKENS,
+    ) -> Any:
+        """Call the LLM and decode its JSON answer; None on any failure."""
         try:
-            response = self._make_api_call(system_prompt, ocr_text)
-            
-            content = response.choices[0].message.content.strip()
-            
-            # Parse JSON response
-            try:
-                result = json.loads(content)
-                return result
-            except json.JSONDecodeError:
-                # Try to extract JSON from response if there's extra text
-                try:
-                    start = content.find('{')
-                    end = content.rfind('}') + 1
-                    if start != -1 and end > start:
-                        json_str = content[start:end]
-                        result = json.loads(json_str)
-                        return result
-                except json.JSONDecodeError:
-                    pass
-                    
-                # If JSON parsing fails, return empty result
-                return {"store": None, "date": None, "items": []}
-                
+            response = self._call_with_retry(user_content, system_prompt, max_tokens)
+            prompt_tokens = getattr(getattr(response, "usage", None), "prompt_tokens", None)
+            with self._token_lock:
+                self._token_counts["api_calls"] += 1
+                if isinstance(prompt_tokens, int):
+                    self._token_counts["prompt_tokens"] += prompt_tokens
+            choice = response.choices[0]
+            if getattr(choice, "finish_reason", None) == "length":
+                logging.warning("LLM response hit max_tokens; JSON is likely truncated")
+            content = choice.message.content.strip()
+        except CircuitOpenError:
+            # Counted as rejected by the breaker; no per-call log noise
+            return None
         except Exception as e:
             logging.error(f"LLM parsing failed: {e}")
-            # On any error, return empty result
-            return {"store": None, "date": None, "items": []}
+            return None
+
+        # Parse JSON response
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            pass
+        # Try to extract JSON from response if there's extra text
+        opener = '[' if system_prompt is BATCH_SYSTEM_PROMPT else '{'
+        closer = ']' if opener == '[' else '}'
+        start = content.find(opener)
+        end = content.rfind(closer) + 1
+        if start == -1 or end <= start:
+            return None
+        try:
+            return json.loads(content[start:end])
+        except json.JSONDecodeError:
+            return None
     
     def parse_store_name(self, ocr_text: str) -> Optional[str]:
         """Extract store name from OCR text using LLM."""
@@ -1,11 +1,192 @@
-import re
-from typing import List, Dict, Optional
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Dict, Optional, Sequence
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker
+from .ocr_cache import OCRResultCache, content_key
+from .image_preprocessor import ImagePreprocessor
+from .receipt_layout import ReceiptLayout, WordBox, build_layout, words_from_annotations
+from .receipt_scanner import DATE_PATTERN, ITEMS_PATTERN, ReceiptScan, scan_receipt_text
+
+
+# Process-wide Vision client. ImageAnnotatorClient is thread-safe (gRPC
+# channel), so one instance is shared by every request thread instead of
+# paying channel setup and auth on each upload.
+_vision_client = None
+_vision_client_lock = threading.Lock()
+
+
+def get_vision_client():
+    """Return the shared Vision client, creating it on first use."""
+    global _vision_client
+    if _vision_client is None:
+        with _vision_client_lock:
+            if _vision_client is None:
+                from google.cloud import vision
+
+                _vision_client = vision.ImageAnnotatorClient()
+    return _vision_client
+
+
+def reset_vision_client() -> None:
+    """Drop the shared Vision client (tests, or after credential rotation)."""
+    global _vision_client
+    with _vision_client_lock:
+        _vision_client = None
+
+
+def _as_bytes(content) -> bytes:
+    # Uploads may arrive as a memoryview/mmap; the Vision request needs bytes
+    return content if isinstance(content, bytes) else bytes(content)
+
+
+def _default_retry(timeout: float):
+    from google.api_core import retry
+
+    # Retry transient errors (UNAVAILABLE, DEADLINE_EXCEEDED...) within the
+    # overall timeout budget.
+    return retry.Retry(
+        predicate=retry.if_transient_error,
+        initial=0.2,
+        maximum=2.0,
+        multiplier=2.0,
+        timeout=timeout,
+    )
+
+
+@dataclass
+class OCRResult:
+    """Text extracted from one image; ``error`` is set when that image failed.
+
+    ``words`` keeps Vision's word-level boxes when the result came from the
+    API (not from the text cache); ``layout`` is rebuilt from them.
+    """
+    text: str
+    error: Optional[str] = None
+    words: List[WordBox] = field(default_factory=list)
+
+    @property
+    def layout(self) -> Optional[ReceiptLayout]:
+        return build_layout(self.words)
 
 
 class OCRService:
-    # Pre-compile regex patterns for better performance
-    ITEMS_PATTERN = re.compile(r"^\s*(.+?)\s+([0-9][0-9,\s]*)\s*원\s*$")
-    DATE_PATTERN = re.compile(r"일시:\s*([0-9]{4}-[0-9]{2}-[0-9]{2}\s+[0-9]{2}:[0-9]{2}:[0-9]{2})")
+    # Vision's synchronous batch_annotate_images accepts at most 16 images
+    MAX_IMAGES_PER_BATCH = 16
+
+    # Pre-compiled patterns, shared with the single-pass scanner
+    ITEMS_PATTERN = ITEMS_PATTERN
+    DATE_PATTERN = DATE_PATTERN
+
+    def __init__(
+        self,
+        client: Any = None,
+        timeout: Optional[float] = None,
+        retry: Any = None,
+        cache: Optional[OCRResultCache] = None,
+        preprocessor: Optional[ImagePreprocessor] = None,
+        layout: Optional[bool] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Args:
+            client: Vision client to use. If None, the process-wide shared
+                client is created lazily on first OCR call.
+            timeout: Per-call timeout in seconds. If None, reads from the
+                OCR_TIMEOUT_SECONDS env var (default 10).
+            retry: google.api_core Retry policy. Defaults to retrying
+                transient errors within ``timeout``.
+            cache: Optional content-hash cache; identical image bytes are
+                answered from it without calling Vision.
+            layout: Rebuild the text from word bounding boxes (rows and
+                price columns) instead of Vision's reading order. If None,
+                reads OCR_LAYOUT (default off).
+            breaker: Circuit breaker for Vision calls. If None, the
+                process-wide "ocr" breaker is used.
+        """
+        self._client = client
+        self.cache = cache
+        self.preprocessor = preprocessor
+        if timeout is None:
+            timeout = float(os.getenv("OCR_TIMEOUT_SECONDS", "10"))
+        self.timeout = timeout
+        self._retry = retry
+        if layout is None:
+            layout = (os.getenv("OCR_LAYOUT", "0") or "").lower() not in ("0", "false", "no")
+        self.layout = layout
+        self.breaker = breaker if breaker is not None else get_breaker("ocr")
+
+    @property
+    def client(self):
+        return self._client if self._client is not None else get_vision_client()
+
+    @property
+    def retry(self):
+        if self._retry is None:
+            self._retry = _default_retry(self.timeout)
+        return self._retry
+
+    def _cache_key(self, content: bytes) -> str:
+        # Layout and plain Vision text differ for the same image
+        return content_key(content, "layout" if self.layout else "vision")
+
+    def _detect_text(self, content: bytes) -> str:
+        return self._detect(content).text
+
+    def _detect(self, content: bytes) -> OCRResult:
+        if self.cache is None:
+            return self._call_text_detection(content)
+        key = self._cache_key(content)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return OCRResult(text=cached)
+        result = self._call_text_detection(content)
+        # Empty text usually means a failed or unreadable image; don't pin it
+        if result.text:
+            self.cache.put(key, result.text)
+        return result
+
+    def _result_from_annotations(self, annotations) -> OCRResult:
+        if not annotations:
+            return OCRResult(text="")
+        words = words_from_annotations(annotations)
+        layout = build_layout(words) if self.layout else None
+        # Vision's own text follows reading order, which interleaves columns
+        text = layout.text() if layout is not None else (annotations[0].description or "")
+        return OCRResult(text=text, words=words)
+
+    def _guarded(self, call: Callable[[], Any]) -> Any:
+        """Run a Vision RPC behind the circuit breaker.
+
+        Raises ``CircuitOpenError`` without calling Vision while the breaker
+        is open. Server errors and exhausted retries count as failures; any
+        other answer (including 4xx) means Vision is up.
+        """
+        from google.api_core import exceptions
+
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.breaker.name} circuit open")
+        try:
+            response = call()
+        except (exceptions.ServerError, exceptions.RetryError):
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return response
+
+    def _call_text_detection(self, content: bytes) -> OCRResult:
+        from google.cloud import vision
+
+        if self.preprocessor is not None:
+            content = self.preprocessor.preprocess(content)
+        image = vision.Image(content=_as_bytes(content))
+        response = self._guarded(lambda: self.client.text_detection(
+            image=image, retry=self.retry, timeout=self.timeout
+        ))
+        return self._result_from_annotations(getattr(response, "text_annotations", []))
 
     def extract_text(self, image_path: str) -> str:
         """Extract text from a receipt image using Google Cloud Vision.
@@ -13,95 +194,133 @@ class OCRService:
         Returns a non-empty string when OCR succeeds, or an empty string on
         failure. This function is written to be easy to mock in tests.
         """
-        try:
-            from google.cloud import vision
-            from google.api_core import exceptions
+        from google.api_core import exceptions
 
-            client = vision.ImageAnnotatorClient()
+        try:
             with open(image_path, "rb") as f:
                 content = f.read()
-
-            image = vision.Image(content=content)
-            response = client.text_detection(image=image)
-            annotations = getattr(response, "text_annotations", [])
-            if annotations:
-                return annotations[0].description or ""
-            return ""
-        except (FileNotFoundError, exceptions.GoogleAPICallError):
+            return self._detect_text(content)
+        except (FileNotFoundError, CircuitOpenError, exceptions.GoogleAPICallError, exceptions.RetryError):
             # Be forgiving in the absence of credentials or on errors.
             return ""
 
     def extract_text_from_image(self, content: bytes) -> str:
         """Extract text from image bytes using Google Cloud Vision.
 
+        ``content`` may be any buffer (bytes, memoryview, mmap); it is only
+        copied into a request once, after preprocessing.
+
         Returns a non-empty string when OCR succeeds, or an empty string on
         failure. Safe to call without credentials in tests via mocking.
         """
+        from google.api_core import exceptions
+
         try:
-            from google.cloud import vision
-            from google.api_core import exceptions
-
-            client = vision.ImageAnnotatorClient()
-            image = vision.Image(content=content)
-            response = client.text_detection(image=image)
-            annotations = getattr(response, "text_annotations", [])
-            if annotations:
-                return annotations[0].description or ""
-            return ""
-        except exceptions.GoogleAPICallError:
+            return self._detect_text(content)
+        except (CircuitOpenError, exceptions.GoogleAPICallError, exceptions.RetryError):
             return ""
 
-    def parse_store_name(self, ocr_text: str) -> Optional[str]:
-        lines = ocr_text.strip().split("\n")
-        for raw in lines:
-            line = raw.strip()
-            if not line:
-                continue
-            lowered = line.lower()
-            if (
-                "tel" in lowered
-                or "총계" in line
-                or "원" in line
-                or lowered.startswith("일시:")
-                or line[0:1].isdigit()
-            ):
-                continue
-            # Heuristic: prefer the first non-empty, non-metadata line
-            return line
-        return None
+    def extract_result_from_image(self, content: bytes) -> OCRResult:
+        """Like ``extract_text_from_image`` but keeps the word boxes.
 
-    def parse_items_and_prices(self, ocr_text: str) -> List[Dict[str, int]]:
-        items: List[Dict[str, int]] = []
-        lines = ocr_text.strip().split("\n")
+        Failures are reported through ``OCRResult.error`` instead of an
+        empty string.
+        """
+        from google.api_core import exceptions
 
-        for raw in lines:
-            line = raw.strip()
-            if not line or "총계" in line or line.upper().startswith("TEL"):
-                continue
-            if "원" not in line:
+        try:
+            return self._detect(content)
+        except (CircuitOpenError, exceptions.GoogleAPICallError, exceptions.RetryError) as e:
+            return OCRResult(text="", error=str(e))
+
+    def extract_text_batch(self, images: Sequence[bytes]) -> List[OCRResult]:
+        """Extract text from several images with as few Vision RPCs as possible.
+
+        Images are sent ``MAX_IMAGES_PER_BATCH`` at a time through
+        ``batch_annotate_images``. Results are returned in input order; an
+        image that failed (or whose whole batch failed) gets an empty text
+        and an error message instead of aborting the others. Images already
+        in the cache are not sent to Vision.
+        """
+        results: List[Optional[OCRResult]] = [None] * len(images)
+        keys: List[Optional[str]] = [None] * len(images)
+        if self.cache is not None:
+            for index, content in enumerate(images):
+                keys[index] = self._cache_key(content)
+                cached = self.cache.get(keys[index])
+                if cached is not None:
+                    results[index] = OCRResult(text=cached)
+
+        misses = [index for index, result in enumerate(results) if result is None]
+        fetched = self._batch_annotate([images[index] for index in misses])
+        for index, result in zip(misses, fetched):
+            results[index] = result
+            if self.cache is not None and result.text and not result.error:
+                self.cache.put(keys[index], result.text)
+        return results
+
+    def _batch_annotate(self, images: Sequence[bytes]) -> List[OCRResult]:
+        from google.cloud import vision
+        from google.api_core import exceptions
+
+        if self.preprocessor is not None:
+            images = self.preprocessor.preprocess_many(images)
+        feature = vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)
+        results: List[OCRResult] = []
+        for start in range(0, len(images), self.MAX_IMAGES_PER_BATCH):
+            chunk = images[start:start + self.MAX_IMAGES_PER_BATCH]
+            requests = [
+                vision.AnnotateImageRequest(image=vision.Image(content=_as_bytes(content)), features=[feature])
+                for content in chunk
+            ]
+            try:
+                response = self._guarded(lambda: self.client.batch_annotate_images(
+                    requests=requests, retry=self.retry, timeout=self.timeout
+                ))
+            except (CircuitOpenError, exceptions.GoogleAPICallError, exceptions.RetryError) as e:
+                results.extend(OCRResult(text="", error=str(e)) for _ in chunk)
                 continue
 
-            match = self.ITEMS_PATTERN.match(line)
-            if match:
-                name = match.group(1).strip()
-                # Remove commas and spaces inside the number
-                price_str = re.sub(r"[\s,]", "", match.group(2))
-                try:
-                    price = int(price_str)
-                except ValueError:
+            responses = list(getattr(response, "responses", []))
+            for index in range(len(chunk)):
+                if index >= len(responses):
+                    results.append(OCRResult(text="", error="missing response"))
                     continue
-                items.append({"name": name, "price": price})
+                image_response = responses[index]
+                error_message = getattr(getattr(image_response, "error", None), "message", "")
+                if error_message:
+                    results.append(OCRResult(text="", error=error_message))
+                    continue
+                results.append(
+                    self._result_from_annotations(getattr(image_response, "text_annotations", []))
+                )
+        return results
+
+    def cache_stats(self) -> Optional[Dict[str, float]]:
+        """Hit/miss counters and size of the OCR cache, or None when disabled."""
+        return self.cache.stats() if self.cache is not None else None
 
-        return items
+    def scan(self, ocr_text: str) -> ReceiptScan:
+        """Single-pass scan of the text: store, date and items together."""
+        return scan_receipt_text(ocr_text)
+
+    def parse_store_name(self, ocr_text: str) -> Optional[str]:
+        return self.scan(ocr_text).store_name
+
+    def parse_items_and_prices(self, ocr_text: str) -> List[Dict[str, int]]:
+        return self.scan(ocr_text).item_dicts()
 
     def parse_date(self, ocr_text: str) -> Optional[str]:
-        lines = ocr_text.strip().split("\n")
+        return self.scan(ocr_text).date
+
 
-        for raw in lines:
-            line = raw.strip()
-            if "일시:" in line:
-                date_match = self.DATE_PATTERN.search(line)
-                if date_match:
-                    return date_match.group(1).strip()
+def parse_ocr_text(ocr_service, text):
+    """Store name and items for ``text`` from a single parse.
 
-        return None
+    Services exposing ``scan(text)`` answer both from one pass; others get
+    the individual parse calls. Shared by the upload views and upload jobs.
+    """
+    if hasattr(type(ocr_service), 'scan'):
+        scan = ocr_service.scan(text)
+        return scan.store_name, scan.item_dicts()
+    return ocr_service.parse_store_name(text), ocr_service.parse_items_and_prices(text) or []
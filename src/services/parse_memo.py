@@ -0,0 +1,57 @@
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Callable, Optional
+
+from .receipt_parser_interface import ParsedReceiptDTO
+
+
+def copy_result(result: ParsedReceiptDTO) -> ParsedReceiptDTO:
+    """Copy of ``result`` whose item dicts can be mutated safely."""
+    return replace(result, items=[dict(item) for item in result.items])
+
+
+class ParseMemo:
+    """Bounded LRU of ``ParsedReceiptDTO`` per OCR text.
+
+    Lets the ``parse_*`` accessors of a parser share one full parse per
+    receipt. Entries are copied on the way out, so callers may mutate the
+    items they get. Exceptions are not cached, and neither are results
+    rejected by ``keep`` (e.g. the empty result of a failed LLM call), so
+    the next call retries instead of pinning a transient failure.
+    """
+
+    def __init__(self, maxsize: int = 128, keep: Optional[Callable[[ParsedReceiptDTO], bool]] = None):
+        self.maxsize = maxsize
+        self.keep = keep
+        self._entries: "OrderedDict[str, ParsedReceiptDTO]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, ocr_text: str) -> Optional[ParsedReceiptDTO]:
+        with self._lock:
+            result = self._entries.get(ocr_text)
+            if result is None:
+                return None
+            self._entries.move_to_end(ocr_text)
+            return copy_result(result)
+
+    def put(self, ocr_text: str, result: ParsedReceiptDTO) -> None:
+        if self.keep is not None and not self.keep(result):
+            return
+        with self._lock:
+            self._entries[ocr_text] = copy_result(result)
+            self._entries.move_to_end(ocr_text)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_parse(self, ocr_text: str, parse: Callable[[str], ParsedReceiptDTO]) -> ParsedReceiptDTO:
+        cached = self.get(ocr_text)
+        if cached is not None:
+            return cached
+        result = copy_result(parse(ocr_text))
+        self.put(ocr_text, result)
+        return copy_result(result)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Collection, FrozenSet, Optional
+
+from .receipt_parser_interface import ParsedReceiptDTO
+from .receipt_scanner import scan_receipt_text
+
+# Weights sum to 1.0. Items plus a matching 총계 line is the strongest signal
+# that nothing was missed or misread; store and date are cheap extras.
+WEIGHT_ITEMS = 0.4
+WEIGHT_TOTAL = 0.3
+WEIGHT_STORE = 0.2
+WEIGHT_DATE = 0.1
+DEFAULT_KNOWN_STORES_TTL = 300.0
+
+
+class KnownStores:
+    """Store names from ``store_repo.list_all()``, loaded on first lookup and
+    reloaded once ``ttl`` seconds old.
+
+    Nothing is read from the repository at construction, so shared parsers
+    can be built without a Firestore round trip, and stores added later are
+    recognized without a restart. Until a load succeeds every name counts
+    as known, as when no list is given; a failed reload keeps the old names.
+    """
+
+    def __init__(
+        self,
+        store_repo: Any,
+        ttl: float = DEFAULT_KNOWN_STORES_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.store_repo = store_repo
+        self.ttl = ttl
+        self._clock = clock
+        self._names: Optional[FrozenSet[str]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def names(self) -> Optional[FrozenSet[str]]:
+        with self._lock:
+            if self._names is not None and self._clock() - self._loaded_at < self.ttl:
+                return self._names
+        # Load outside the lock; concurrent reloads just race to the same answer
+        try:
+            names = frozenset(store.name for store in self.store_repo.list_all() if store.name)
+        except Exception as e:
+            logging.warning(f"Loading known stores failed: {e}")
+            with self._lock:
+                return self._names
+        with self._lock:
+            self._names, self._loaded_at = names, self._clock()
+        return names
+
+    def __contains__(self, name: object) -> bool:
+        names = self.names()
+        return names is None or name in names
+
+
+def _item_sum(parsed: ParsedReceiptDTO) -> Optional[int]:
+    """Sum of price * quantity, or None when any item has no usable price."""
+    try:
+        amounts = [int(i.get("price", 0)) * int(i.get("quantity", 1)) for i in parsed.items]
+    except (TypeError, ValueError):
+        return None
+    if not amounts or any(amount <= 0 for amount in amounts):
+        return None
+    return sum(amounts)
+
+
+def matches_total(parsed: ParsedReceiptDTO, ocr_text: str) -> bool:
+    """True when the item sum equals an amount on a 총계/합계/결제금액 line."""
+    item_sum = _item_sum(parsed)
+    return item_sum is not None and item_sum in scan_receipt_text(ocr_text).totals
+
+
+def score_receipt(
+    parsed: ParsedReceiptDTO,
+    ocr_text: str,
+    known_stores: Optional[Collection[str]] = None,
+) -> float:
+    """Confidence in ``parsed`` between 0.0 and 1.0.
+
+    - items: at least one item with a positive price
+    - total: the item sum equals an amount on a 총계/합계/결제금액 line
+    - store: the store name is one of ``known_stores`` (or, when no list is
+      given, merely present)
+    - date: a purchase date was found
+    """
+    score = 0.0
+    item_sum = _item_sum(parsed)
+    if item_sum is not None:
+        score += WEIGHT_ITEMS
+        if matches_total(parsed, ocr_text):
+            score += WEIGHT_TOTAL
+    if parsed.store_name:
+        if known_stores is None or parsed.store_name in known_stores:
+            score += WEIGHT_STORE
+    if parsed.date:
+        score += WEIGHT_DATE
+    return round(score, 2)
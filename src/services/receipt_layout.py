@@ -0,0 +1,174 @@
+import re
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+# A price/quantity cell: "2", "4,500", "9,000원", "x2"
+_AMOUNT_CELL = re.compile(r"^(?:[xX×*]?[0-9][0-9,]*원?|[0-9][0-9,]*[xX×*])$")
+
+# Words closer than this fraction of the line height are one token that
+# Vision split (e.g. "9,000" + "원"); anything wider is a real space.
+MERGE_GAP = 0.25
+# Words whose vertical centers differ by less than this fraction of the
+# line height sit on the same row.
+ROW_TOLERANCE = 0.5
+
+
+@dataclass(frozen=True)
+class WordBox:
+    """One word from Vision with its axis-aligned bounding box (pixels)."""
+    text: str
+    x_min: float
+    y_min: float
+    x_max: float
+    y_max: float
+
+    @property
+    def height(self) -> float:
+        return max(self.y_max - self.y_min, 1.0)
+
+    @property
+    def y_center(self) -> float:
+        return (self.y_min + self.y_max) / 2
+
+
+@dataclass(frozen=True)
+class ReceiptLayout:
+    """Rows of words (top to bottom, each left to right) and price columns.
+
+    ``price_columns`` are the right edges of amount columns, left to right;
+    an amount cell belongs to the column whose edge is nearest its own.
+    """
+    rows: Tuple[Tuple[WordBox, ...], ...]
+    price_columns: Tuple[float, ...]
+
+    def lines(self) -> List[str]:
+        return [_render_row(row, self.price_columns) for row in self.rows]
+
+    def text(self) -> str:
+        return "\n".join(self.lines())
+
+
+def words_from_annotations(annotations: Sequence[Any]) -> List[WordBox]:
+    """Word boxes from a Vision ``text_annotations`` list.
+
+    Entry 0 is the whole-page text; the rest are single words. Returns an
+    empty list when the annotations carry no usable geometry.
+    """
+    words = []
+    for annotation in list(annotations)[1:]:
+        text = (getattr(annotation, "description", "") or "").strip()
+        vertices = getattr(getattr(annotation, "bounding_poly", None), "vertices", None)
+        try:
+            xs = [float(getattr(v, "x", 0) or 0) for v in vertices]
+            ys = [float(getattr(v, "y", 0) or 0) for v in vertices]
+        except TypeError:
+            return []
+        if not text or not xs:
+            continue
+        words.append(WordBox(text, min(xs), min(ys), max(xs), max(ys)))
+    return words
+
+
+def group_rows(words: Sequence[WordBox], tolerance: float = ROW_TOLERANCE) -> List[List[WordBox]]:
+    """Group words into rows with one sweep over their vertical centers.
+
+    Words are sorted by center once; the sweep keeps only the open row and
+    starts a new one when the next center is further than ``tolerance`` line
+    heights from the row's running center, so grouping is O(n log n).
+    """
+    rows: List[List[WordBox]] = []
+    row: List[WordBox] = []
+    row_center = row_height = 0.0
+    for word in sorted(words, key=lambda w: w.y_center):
+        if row and abs(word.y_center - row_center) <= tolerance * max(row_height, word.height):
+            row.append(word)
+            # Running mean keeps slightly tilted lines together
+            row_center += (word.y_center - row_center) / len(row)
+            row_height = max(row_height, word.height)
+            continue
+        if row:
+            rows.append(row)
+        row = [word]
+        row_center, row_height = word.y_center, word.height
+    if row:
+        rows.append(row)
+    return [_merge_split_words(sorted(r, key=lambda w: w.x_min)) for r in rows]
+
+
+def _merge_split_words(row: List[WordBox]) -> List[WordBox]:
+    merged: List[WordBox] = []
+    for word in row:
+        if merged:
+            previous = merged[-1]
+            if word.x_min - previous.x_max <= MERGE_GAP * min(previous.height, word.height):
+                merged[-1] = WordBox(
+                    previous.text + word.text,
+                    previous.x_min, min(previous.y_min, word.y_min),
+                    word.x_max, max(previous.y_max, word.y_max),
+                )
+                continue
+        merged.append(word)
+    return merged
+
+
+def _is_amount(word: WordBox) -> bool:
+    return bool(_AMOUNT_CELL.match(word.text))
+
+
+def find_price_columns(rows: Sequence[Sequence[WordBox]], min_rows: int = 2) -> List[float]:
+    """Right edges of amount columns, found by sweeping sorted cell edges.
+
+    Only trailing amount cells are considered (a number inside an item name
+    is not a column). Edges within one line height of each other form a
+    column; columns seen on fewer than ``min_rows`` rows are dropped.
+    """
+    cells = []
+    for row in rows:
+        for word in reversed(row):
+            if not _is_amount(word):
+                break
+            cells.append(word)
+    if not cells:
+        return []
+
+    columns: List[float] = []
+    cluster: List[float] = []
+    height = sorted(w.height for w in cells)[len(cells) // 2]
+    for edge in sorted(w.x_max for w in cells):
+        if cluster and edge - cluster[-1] > height:
+            if len(cluster) >= min_rows:
+                columns.append(sum(cluster) / len(cluster))
+            cluster = []
+        cluster.append(edge)
+    if len(cluster) >= min_rows:
+        columns.append(sum(cluster) / len(cluster))
+    return columns
+
+
+def _render_row(row: Sequence[WordBox], columns: Sequence[float]) -> str:
+    """Label words, then amount cells ordered by price column."""
+    if not columns:
+        return " ".join(word.text for word in row)
+    label: List[str] = []
+    cells: List[Tuple[int, float, str]] = []
+    trailing = len(row)
+    while trailing and _is_amount(row[trailing - 1]):
+        trailing -= 1
+    for index, word in enumerate(row):
+        if index < trailing:
+            label.append(word.text)
+            continue
+        column = min(range(len(columns)), key=lambda c: abs(columns[c] - word.x_max))
+        cells.append((column, word.x_max, word.text))
+    return " ".join(label + [text for _, _, text in sorted(cells)])
+
+
+def build_layout(words: Sequence[WordBox]) -> Optional[ReceiptLayout]:
+    """Rows and price columns for ``words``; None when there are no words."""
+    if not words:
+        return None
+    rows = group_rows(words)
+    return ReceiptLayout(
+        rows=tuple(tuple(row) for row in rows),
+        price_columns=tuple(find_price_columns(rows)),
+    )
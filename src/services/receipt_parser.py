@@ -2,20 +2,28 @@ from typing import TYPE_CHECKING, Optional
 from src.models.store import Store
 from src.models.receipt import Receipt
 from src.services.receipt_parser_factory import ReceiptParserFactory
+from src.services.parse_memo import ParseMemo
 
 if TYPE_CHECKING:
     from src.services.ocr_service import OCRService
-    from src.services.receipt_parser_interface import ReceiptParserInterface
+    from src.services.receipt_parser_interface import ParsedReceiptDTO, ReceiptParserInterface
     from src.models.user import User
 
 
 class ReceiptParser:
-    def __init__(self, ocr_service: Optional["OCRService"] = None, parser: Optional["ReceiptParserInterface"] = None):
+    def __init__(
+        self,
+        ocr_service: Optional["OCRService"] = None,
+        parser: Optional["ReceiptParserInterface"] = None,
+        store_repo=None,
+    ):
         """Initialize receipt parser with either OCR service or parser interface
         
         Args:
             ocr_service: Legacy OCR service (for backward compatibility)
             parser: New parser interface (LLM or regex-based)
+            store_repo: Store repository for learned per-store templates
+                (used with the shared parser only)
         """
         if parser is not None:
             self.parser = parser
@@ -24,15 +32,21 @@ class ReceiptParser:
             from src.services.regex_receipt_parser import RegexReceiptParser
             self.parser = RegexReceiptParser(ocr_service)
         else:
-            # Use factory to create appropriate parser based on environment
-            self.parser = ReceiptParserFactory.create_parser()
+            # Shared parser for the environment's configuration
+            self.parser = ReceiptParserFactory.get_parser(store_repo=store_repo)
             
         # Keep reference to OCR service for backward compatibility
         self.ocr_service = getattr(self.parser, 'ocr_service', None)
+        # Empty results (e.g. a failed LLM call) are retried, not memoized
+        self._memo = ParseMemo(keep=lambda result: bool(result.store_name or result.date or result.items))
+
+    def parse(self, ocr_text: str) -> "ParsedReceiptDTO":
+        """Parse ``ocr_text`` once; repeated calls reuse the result"""
+        return self._memo.get_or_parse(ocr_text, self.parser.parse)
 
     def create_receipt_from_ocr_result(self, user: "User", ocr_text: str) -> Receipt:
         # Parse using the new interface
-        parsed_data = self.parser.parse(ocr_text)
+        parsed_data = self.parse(ocr_text)
         
         # Parse store name
         store_name = parsed_data.store_name
@@ -45,6 +59,8 @@ class ReceiptParser:
 
         # Create receipt with purchase date
         receipt = Receipt(user=user, store=store, purchase_date=purchase_date)
+        receipt.ocr_text = ocr_text
+        receipt.parsed_by = parsed_data.model or "regex"
 
         # Parse and add items
         items = parsed_data.items
@@ -1,20 +1,85 @@
 import logging
 import os
-from typing import Optional
-from .receipt_parser_interface import ReceiptParserInterface
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import replace
+from typing import Any, Collection, Deque, Dict, List, Optional, Tuple
+from .circuit_breaker import CircuitOpenError, is_unavailable
+from .parse_memo import ParseMemo
+from .receipt_confidence import DEFAULT_KNOWN_STORES_TTL, KnownStores, score_receipt
+from .receipt_parser_interface import ReceiptParserInterface, ParsedReceiptDTO
+from .receipt_scanner import scan_receipt_text
+from .receipt_template import MIN_TEMPLATE_SAMPLES, ReceiptTemplate, apply_template, learn_template, receipt_key
 from .regex_receipt_parser import RegexReceiptParser
 from .llm_receipt_parser import LLMReceiptParser
 from .ocr_service import OCRService
 
 
+# Process-wide parsers, one per configuration. Parsers are thread-safe, so
+# request threads share their OpenAI client, OCRService, caches and pools
+# instead of rebuilding them for every ReceiptParser.
+_shared_parsers: Dict[Tuple, ReceiptParserInterface] = {}
+_shared_parsers_lock = threading.Lock()
+
+
 class ReceiptParserFactory:
     """Factory for creating receipt parsers based on configuration"""
     
+    @staticmethod
+    def get_parser(
+        use_llm: Optional[bool] = None,
+        llm_model: str = "gpt-4o-mini",
+        openai_api_key: Optional[str] = None,
+        mode: Optional[str] = None,
+        known_stores: Optional[Collection[str]] = None,
+        store_repo: Any = None,
+    ) -> ReceiptParserInterface:
+        """Return the shared parser for this configuration, creating it on first use
+
+        Takes the same arguments as ``create_parser``; configurations that
+        resolve to the same model, API key, mode and store repository share
+        one instance. Release them with ``close_parsers``. Building a parser
+        makes no repository calls (known stores load on first use), so the
+        lock is only held while the parser is constructed.
+        """
+        if use_llm is None:
+            use_llm = os.getenv("LLM_PARSER_ENABLED", "false").lower() == "true"
+        api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
+        if use_llm and api_key:
+            if mode is None:
+                mode = os.getenv("LLM_PARSER_MODE", "llm_first")
+            stores = frozenset(known_stores) if known_stores is not None else None
+            key: Tuple = ("llm", llm_model, api_key, mode, stores, store_repo)
+        else:
+            key = ("regex", store_repo)
+        with _shared_parsers_lock:
+            parser = _shared_parsers.get(key)
+            if parser is None:
+                parser = _shared_parsers[key] = ReceiptParserFactory.create_parser(
+                    use_llm, llm_model, api_key, mode, known_stores, store_repo
+                )
+            return parser
+
+    @staticmethod
+    def close_parsers() -> None:
+        """Close and drop every shared parser (worker shutdown, tests, key rotation)"""
+        with _shared_parsers_lock:
+            parsers = list(_shared_parsers.values())
+            _shared_parsers.clear()
+        for parser in parsers:
+            if hasattr(type(parser), "close"):
+                parser.close()
+
     @staticmethod
     def create_parser(
         use_llm: Optional[bool] = None,
         llm_model: str = "gpt-4o-mini",
-        openai_api_key: Optional[str] = None
+        openai_api_key: Optional[str] = None,
+        mode: Optional[str] = None,
+        known_stores: Optional[Collection[str]] = None,
+        store_repo: Any = None,
     ) -> ReceiptParserInterface:
         """Create a receipt parser based on configuration
         
@@ -22,10 +87,33 @@ class ReceiptParserFactory:
             use_llm: Whether to use LLM parser. If None, reads from LLM_PARSER_ENABLED env var
             llm_model: LLM model to use (default: gpt-4o-mini)
             openai_api_key: OpenAI API key. If None, reads from OPENAI_API_KEY env var
+            mode: "llm_first" (LLM, regex when it fails or its circuit is
+                open), "cheap_first" (regex, LLM
+                below the confidence threshold) or "hedged" (both at once,
+                best result within a deadline). If None, reads LLM_PARSER_MODE
+            known_stores: Store names that count as recognized when scoring.
+                If None, read lazily from ``store_repo.list_all()`` when the
+                repository has it (``KnownStores``, refreshed every
+                KNOWN_STORES_TTL_SECONDS)
+            store_repo: Store repository. When given, the parser is wrapped
+                in a StoreTemplateReceiptParser that tries learned per-store
+                templates first
             
         Returns:
-            ReceiptParserInterface implementation (LLM or regex-based)
+            ReceiptParserInterface implementation (LLM with regex fallback,
+            regex or cheap-first), template-first when ``store_repo`` is set
         """
+        if store_repo is not None:
+            if known_stores is None and hasattr(type(store_repo), "list_all"):
+                known_stores = KnownStores(
+                    store_repo,
+                    ttl=float(os.getenv("KNOWN_STORES_TTL_SECONDS", str(DEFAULT_KNOWN_STORES_TTL))),
+                )
+            return ReceiptParserFactory.create_template_parser(
+                ReceiptParserFactory.create_parser(use_llm, llm_model, openai_api_key, mode, known_stores),
+                store_repo,
+            )
+
         # Determine parser type from parameter or environment
         if use_llm is None:
             use_llm = os.getenv("LLM_PARSER_ENABLED", "false").lower() == "true"
@@ -36,7 +124,25 @@ class ReceiptParserFactory:
         # Use LLM parser if explicitly requested and API key is available
         if use_llm and api_key:
             try:
-                return LLMReceiptParser(api_key=api_key, model=llm_model)
+                llm_parser = LLMReceiptParser(api_key=api_key, model=llm_model)
+                if mode is None:
+                    mode = os.getenv("LLM_PARSER_MODE", "llm_first")
+                if mode == "hedged":
+                    return FallbackReceiptParser(
+                        llm_parser,
+                        RegexReceiptParser(OCRService()),
+                        deadline=float(os.getenv("LLM_HEDGE_DEADLINE_SECONDS", str(DEFAULT_HEDGE_DEADLINE))),
+                        known_stores=known_stores,
+                    )
+                if mode == "cheap_first":
+                    return CheapFirstReceiptParser(
+                        RegexReceiptParser(OCRService()),
+                        llm_parser,
+                        threshold=float(os.getenv("LLM_CONFIDENCE_THRESHOLD", str(DEFAULT_CONFIDENCE_THRESHOLD))),
+                        known_stores=known_stores,
+                    )
+                # Regex fallback so an open LLM circuit degrades instead of failing
+                return FallbackReceiptParser(llm_parser, RegexReceiptParser(OCRService()))
             except Exception as e:
                 logging.warning(f"LLM parser initialization failed: {e}. Falling back to regex parser.")
                 # Fallback to regex parser if LLM initialization fails
@@ -76,68 +182,466 @@ class ReceiptParserFactory:
     @staticmethod
     def create_fallback_parser(
         primary_parser: ReceiptParserInterface,
-        fallback_parser: ReceiptParserInterface
+        fallback_parser: ReceiptParserInterface,
+        deadline: Optional[float] = None,
     ) -> 'FallbackReceiptParser':
         """Create a parser that tries primary parser first, then falls back
         
         Args:
             primary_parser: Parser to try first (e.g., LLM parser)
             fallback_parser: Parser to use if primary fails (e.g., regex parser)
+            deadline: Seconds to wait in hedged mode (both parsers run
+                concurrently). None keeps the sequential behaviour
             
         Returns:
             FallbackReceiptParser instance
         """
-        return FallbackReceiptParser(primary_parser, fallback_parser)
+        return FallbackReceiptParser(primary_parser, fallback_parser, deadline=deadline)
+
+    @staticmethod
+    def create_cheap_first_parser(
+        cheap_parser: ReceiptParserInterface,
+        expensive_parser: ReceiptParserInterface,
+        threshold: Optional[float] = None,
+        known_stores: Optional[Collection[str]] = None,
+    ) -> 'CheapFirstReceiptParser':
+        """Create a parser that only calls ``expensive_parser`` when the
+        cheap result scores below ``threshold``
+
+        Args:
+            cheap_parser: Fast parser tried first (e.g., regex parser)
+            expensive_parser: Parser used for low-confidence receipts (e.g., LLM parser)
+            threshold: Minimum confidence to accept the cheap result
+            known_stores: Store names that count as recognized when scoring
+
+        Returns:
+            CheapFirstReceiptParser instance
+        """
+        if threshold is None:
+            threshold = DEFAULT_CONFIDENCE_THRESHOLD
+        return CheapFirstReceiptParser(cheap_parser, expensive_parser, threshold, known_stores)
+
+    @staticmethod
+    def create_template_parser(
+        parser: ReceiptParserInterface,
+        store_repo: Any,
+        min_samples: Optional[int] = None,
+    ) -> 'StoreTemplateReceiptParser':
+        """Create a parser that tries the matched store's learned template
+        before ``parser``
+
+        Args:
+            parser: Parser used on template misses (e.g., cheap-first parser)
+            store_repo: Repository whose ``find_by_name``/``update`` load and
+                save ``Store.parse_template``
+            min_samples: Parses a template must be confirmed by before use.
+                If None, reads STORE_TEMPLATE_MIN_SAMPLES (default 2)
+
+        Returns:
+            StoreTemplateReceiptParser instance
+        """
+        if min_samples is None:
+            min_samples = int(os.getenv("STORE_TEMPLATE_MIN_SAMPLES", str(MIN_TEMPLATE_SAMPLES)))
+        return StoreTemplateReceiptParser(parser, store_repo, min_samples)
+
+
+DEFAULT_CONFIDENCE_THRESHOLD = 0.8
+DEFAULT_HEDGE_DEADLINE = 2.0
+
+
+def _is_empty(result: ParsedReceiptDTO) -> bool:
+    return not result.store_name and not result.date and not result.items
+
+
+def _store_names(known_stores: Optional[Collection[str]]) -> Optional[Collection[str]]:
+    # KnownStores refreshes itself; plain collections are frozen
+    if known_stores is None or isinstance(known_stores, KnownStores):
+        return known_stores
+    return frozenset(known_stores)
 
 
 class FallbackReceiptParser(ReceiptParserInterface):
-    """Parser that tries primary parser first, then falls back to secondary"""
+    """Parser that tries primary parser first, then falls back to secondary
+
+    With a ``deadline`` the parser is hedged: the primary (LLM) parse starts
+    on a worker thread while the fallback (regex) runs inline, and the
+    higher-confidence result available at the deadline wins. Primary results
+    that arrive after the deadline are kept in ``late_results`` for
+    comparison; ``outcomes`` counts which path each parse took.
+
+    While the primary parser's circuit breaker is open, the fallback is used
+    directly ("circuit_open") instead of waiting on a degraded dependency.
+
+    ``parse`` and the ``parse_*`` accessors share memoized results, so a
+    parser runs once per OCR text. Empty or failed primary results and
+    hedged races the primary did not finish are not memoized; the next call
+    asks the primary again.
+    """
     
-    def __init__(self, primary: ReceiptParserInterface, fallback: ReceiptParserInterface):
+    def __init__(
+        self,
+        primary: ReceiptParserInterface,
+        fallback: ReceiptParserInterface,
+        deadline: Optional[float] = None,
+        max_workers: int = 4,
+        known_stores: Optional[Collection[str]] = None,
+    ):
         self.primary = primary
         self.fallback = fallback
-    
+        self.deadline = deadline
+        self.max_workers = max_workers
+        self.known_stores = _store_names(known_stores)
+        self.outcomes: Counter = Counter()
+        self.late_results: Deque[Dict[str, Any]] = deque(maxlen=100)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # One parse per receipt text, shared by parse() and the accessors
+        self._primary_memo = ParseMemo(keep=lambda result: not _is_empty(result))
+        self._fallback_memo = ParseMemo()
+        self._hedged_memo = ParseMemo()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="hedged-parse"
+                )
+            return self._executor
+
+    def _record(self, outcome: str) -> None:
+        with self._lock:
+            self.outcomes[outcome] += 1
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+    def close(self) -> None:
+        self.shutdown()
+        for parser in (self.primary, self.fallback):
+            if hasattr(type(parser), "close"):
+                parser.close()
+
+    def _primary_result(self, ocr_text: str) -> ParsedReceiptDTO:
+        if is_unavailable(self.primary):
+            raise CircuitOpenError("primary parser circuit open")
+        return self._primary_memo.get_or_parse(ocr_text, self.primary.parse)
+
+    def _fallback_result(self, ocr_text: str) -> ParsedReceiptDTO:
+        return self._fallback_memo.get_or_parse(ocr_text, self.fallback.parse)
+
     def parse(self, ocr_text: str):
         """Try primary parser first, fallback on empty results"""
+        if is_unavailable(self.primary):
+            self._record("circuit_open")
+            return self._fallback_result(ocr_text)
+        if self.deadline is not None:
+            cached = self._hedged_memo.get(ocr_text)
+            if cached is not None:
+                return cached
+            result, settled = self._hedge(ocr_text)
+            if settled:
+                self._hedged_memo.put(ocr_text, result)
+            return result
         try:
-            result = self.primary.parse(ocr_text)
+            result = self._primary_result(ocr_text)
             # If primary parser returns empty results, use fallback
-            if (not result.store_name and 
-                not result.date and 
-                not result.items):
-                return self.fallback.parse(ocr_text)
+            if _is_empty(result):
+                return self._fallback_result(ocr_text)
             return result
         except Exception as e:
             logging.warning(f"Primary parser failed: {e}. Falling back.")
             # On any error with primary parser, use fallback
-            return self.fallback.parse(ocr_text)
+            return self._fallback_result(ocr_text)
     
+    def _parse_hedged(self, ocr_text: str) -> ParsedReceiptDTO:
+        return self._hedge(ocr_text)[0]
+
+    def _hedge(self, ocr_text: str) -> Tuple[ParsedReceiptDTO, bool]:
+        """Race the parsers; the flag is True only when the primary answered
+        with a usable result in time (the outcome is safe to memoize)."""
+        started = time.monotonic()
+        future = self._pool().submit(self.primary.parse, ocr_text)
+
+        fallback_result = self.fallback.parse(ocr_text)
+        fallback_result.confidence = score_receipt(fallback_result, ocr_text, self.known_stores)
+
+        remaining = self.deadline - (time.monotonic() - started)
+        try:
+            primary_result = future.result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            if not future.cancel():
+                # Already running; threads can't be interrupted, so keep the
+                # answer for comparison when it lands
+                future.add_done_callback(
+                    lambda done: self._record_late(done, ocr_text, fallback_result, started)
+                )
+            self._record("deadline")
+            return fallback_result, False
+        except Exception as e:
+            logging.warning(f"Primary parser failed: {e}. Using fallback result.")
+            self._record("primary_error")
+            return fallback_result, False
+
+        if _is_empty(primary_result):
+            self._record("fallback")
+            return fallback_result, False
+        primary_result.confidence = score_receipt(primary_result, ocr_text, self.known_stores)
+        if primary_result.confidence >= fallback_result.confidence:
+            self._record("primary")
+            return primary_result, True
+        self._record("fallback")
+        return fallback_result, True
+
+    def _record_late(
+        self, future: Future, ocr_text: str, fallback_result: ParsedReceiptDTO, started: float
+    ) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        primary_result = future.result()
+        self.late_results.append({
+            "elapsed": time.monotonic() - started,
+            "fallback_confidence": fallback_result.confidence,
+            "primary_confidence": score_receipt(primary_result, ocr_text, self.known_stores),
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            outcomes = dict(self.outcomes)
+        late: List[Dict[str, Any]] = list(self.late_results)
+        return {"outcomes": outcomes, "late_results": len(late),
+                "late_better": sum(1 for r in late if r["primary_confidence"] > r["fallback_confidence"])}
+
     def parse_store_name(self, ocr_text: str) -> Optional[str]:
         """Try primary parser first, fallback on None/empty result"""
+        if self.deadline is not None:
+            return self.parse(ocr_text).store_name
         try:
-            result = self.primary.parse_store_name(ocr_text)
+            result = self._primary_result(ocr_text).store_name
             if result is None or result.strip() == "":
-                return self.fallback.parse_store_name(ocr_text)
+                return self._fallback_result(ocr_text).store_name
             return result
         except Exception:
-            return self.fallback.parse_store_name(ocr_text)
+            return self._fallback_result(ocr_text).store_name
     
     def parse_items_and_prices(self, ocr_text: str):
         """Try primary parser first, fallback on empty result"""
+        if self.deadline is not None:
+            return self.parse(ocr_text).items
         try:
-            result = self.primary.parse_items_and_prices(ocr_text)
+            result = self._primary_result(ocr_text).items
             if not result:
-                return self.fallback.parse_items_and_prices(ocr_text)
+                return self._fallback_result(ocr_text).items
             return result
         except Exception:
-            return self.fallback.parse_items_and_prices(ocr_text)
+            return self._fallback_result(ocr_text).items
     
     def parse_date(self, ocr_text: str) -> Optional[str]:
         """Try primary parser first, fallback on None/empty result"""
+        if self.deadline is not None:
+            return self.parse(ocr_text).date
         try:
-            result = self.primary.parse_date(ocr_text)
+            result = self._primary_result(ocr_text).date
             if result is None or result.strip() == "":
-                return self.fallback.parse_date(ocr_text)
+                return self._fallback_result(ocr_text).date
             return result
         except Exception:
-            return self.fallback.parse_date(ocr_text)
\ No newline at end of file
+            return self._fallback_result(ocr_text).date
+
+
+class CheapFirstReceiptParser(ReceiptParserInterface):
+    """Parser that accepts the cheap result when it is confident enough
+
+    The cheap parser (regex) runs first and its result is scored with
+    ``score_receipt``. Only results below ``threshold`` go to the expensive
+    parser (LLM); if that fails or finds nothing the cheap result is kept.
+    ``counts`` records how often each path was taken; while the expensive
+    parser's circuit breaker is open the cheap result is kept
+    ("circuit_open"). ``parse`` and the ``parse_*`` accessors share memoized
+    results; a cheap result kept because the expensive parser failed or was
+    unavailable is not memoized, so the next call escalates again.
+    """
+
+    def __init__(
+        self,
+        cheap: ReceiptParserInterface,
+        expensive: ReceiptParserInterface,
+        threshold: float = DEFAULT_CONFIDENCE_THRESHOLD,
+        known_stores: Optional[Collection[str]] = None,
+    ):
+        self.cheap = cheap
+        self.expensive = expensive
+        self.threshold = threshold
+        self.known_stores = _store_names(known_stores)
+        self.counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+        self._memo = ParseMemo()
+
+    def _count(self, path: str) -> None:
+        with self._counts_lock:
+            self.counts[path] += 1
+
+    def _score(self, result: ParsedReceiptDTO, ocr_text: str) -> ParsedReceiptDTO:
+        result.confidence = score_receipt(result, ocr_text, self.known_stores)
+        return result
+
+    def parse(self, ocr_text: str) -> ParsedReceiptDTO:
+        """Cheap parse first; escalate only below the confidence threshold"""
+        cached = self._memo.get(ocr_text)
+        if cached is not None:
+            return cached
+        result, settled = self._parse(ocr_text)
+        if settled:
+            self._memo.put(ocr_text, result)
+        return result
+
+    def _parse(self, ocr_text: str) -> Tuple[ParsedReceiptDTO, bool]:
+        """Result and whether it is safe to memoize"""
+        cheap_result = self._score(self.cheap.parse(ocr_text), ocr_text)
+        if cheap_result.confidence >= self.threshold:
+            self._count("cheap")
+            return cheap_result, True
+
+        if is_unavailable(self.expensive):
+            self._count("circuit_open")
+            return cheap_result, False
+        self._count("escalated")
+        try:
+            result = self.expensive.parse(ocr_text)
+        except Exception as e:
+            logging.warning(f"Expensive parser failed: {e}. Keeping cheap result.")
+            return cheap_result, False
+        if _is_empty(result):
+            return cheap_result, False
+        return self._score(result, ocr_text), True
+
+    def close(self) -> None:
+        for parser in (self.cheap, self.expensive):
+            if hasattr(type(parser), "close"):
+                parser.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._counts_lock:
+            return {path: self.counts[path] for path in ("cheap", "escalated", "circuit_open")}
+
+    def parse_store_name(self, ocr_text: str) -> Optional[str]:
+        return self.parse(ocr_text).store_name
+
+    def parse_items_and_prices(self, ocr_text: str):
+        return self.parse(ocr_text).items
+
+    def parse_date(self, ocr_text: str) -> Optional[str]:
+        return self.parse(ocr_text).date
+
+
+class StoreTemplateReceiptParser(ReceiptParserInterface):
+    """Parser that tries a per-store learned template before the inner parser
+
+    The store is matched by the scanned store name. When it has a template
+    confirmed by ``min_samples`` parses and the template reproduces the
+    receipt total, that result is returned without calling the inner
+    parser (regex chain or LLM). Otherwise the inner parser runs and its
+    result is used to learn or confirm the store's template, which is saved
+    with the ``Store``. Only distinct receipts confirm a template; parsing the
+    same receipt again does not. A confirmed template is only replaced by a
+    new layout once that layout is confirmed by ``min_samples`` receipts of
+    its own, so one odd receipt does not discard it. ``parse`` and the ``parse_*`` accessors share
+    memoized results. ``stats()`` counts hits, misses and learned updates.
+    """
+
+    def __init__(
+        self,
+        parser: ReceiptParserInterface,
+        store_repo: Any,
+        min_samples: int = MIN_TEMPLATE_SAMPLES,
+    ):
+        self.parser = parser
+        self.store_repo = store_repo
+        self.min_samples = min_samples
+        self.counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+        self._memo = ParseMemo(keep=lambda result: not _is_empty(result))
+
+    def _count(self, outcome: str) -> None:
+        with self._counts_lock:
+            self.counts[outcome] += 1
+
+    def parse(self, ocr_text: str) -> ParsedReceiptDTO:
+        """Store template first; inner parser on a miss"""
+        return self._memo.get_or_parse(ocr_text, self._parse)
+
+    def _parse(self, ocr_text: str) -> ParsedReceiptDTO:
+        store_name = scan_receipt_text(ocr_text).store_name
+        store = self.store_repo.find_by_name(store_name) if store_name else None
+        template = ReceiptTemplate.from_dict(getattr(store, "parse_template", None))
+        if template is not None and template.samples >= self.min_samples:
+            result = apply_template(template, ocr_text)
+            if result is not None:
+                self._count("hit")
+                result.store_name = store_name
+                return result
+            self._count("miss")
+
+        result = self.parser.parse(ocr_text)
+        if store is not None and not _is_empty(result):
+            self._learn(store, template, ocr_text, result)
+        return result
+
+    def _learn(
+        self, store: Any, template: Optional[ReceiptTemplate], ocr_text: str, result: ParsedReceiptDTO
+    ) -> None:
+        store_id = getattr(store, "id", None)
+        learned = learn_template(ocr_text, result.items)
+        if store_id is None or learned is None:
+            return
+        key = receipt_key(ocr_text)
+        if template is not None and template.same_shape(learned):
+            if template.samples >= self.min_samples or key in template.receipts:
+                return
+            learned = replace(template, samples=template.samples + 1, receipts=template.receipts + (key,))
+        elif template is not None and template.samples >= self.min_samples:
+            # Keep the confirmed template; the new layout must earn its place
+            candidate = self._confirm(template.candidate, learned, key)
+            if candidate is None:
+                return
+            if candidate.samples >= self.min_samples:
+                learned = candidate
+            else:
+                learned = replace(template, candidate=candidate)
+        else:
+            # New or changed layout; start counting over
+            learned = replace(learned, receipts=(key,))
+        self.store_repo.update(store_id, {"parse_template": learned.to_dict()})
+        store.parse_template = learned.to_dict()
+        self._count("learned")
+
+    @staticmethod
+    def _confirm(
+        candidate: Optional[ReceiptTemplate], learned: ReceiptTemplate, key: str
+    ) -> Optional[ReceiptTemplate]:
+        """``candidate`` counting one more receipt, a fresh candidate when the
+        layout differs, or None when this receipt was already counted."""
+        if candidate is None or not candidate.same_shape(learned):
+            return replace(learned, receipts=(key,))
+        if key in candidate.receipts:
+            return None
+        return replace(candidate, samples=candidate.samples + 1, receipts=candidate.receipts + (key,))
+
+    def stats(self) -> Dict[str, int]:
+        with self._counts_lock:
+            return {outcome: self.counts[outcome] for outcome in ("hit", "miss", "learned")}
+
+    def close(self) -> None:
+        if hasattr(type(self.parser), "close"):
+            self.parser.close()
+
+    def parse_store_name(self, ocr_text: str) -> Optional[str]:
+        return self.parse(ocr_text).store_name
+
+    def parse_items_and_prices(self, ocr_text: str):
+        return self.parse(ocr_text).items
+
+    def parse_date(self, ocr_text: str) -> Optional[str]:
+        return self.parse(ocr_text).date
@@ -9,6 +9,8 @@ class ParsedReceiptDTO:
     store_name: Optional[str]
     date: Optional[str]
     items: List[Dict[str, any]]  # List of {"name": str, "price": int, "quantity": int}
+    confidence: Optional[float] = None  # 0.0-1.0 when scored, see receipt_confidence
+    model: Optional[str] = None  # LLM model that produced the result, if any
     
     
 class ReceiptParserInterface(ABC):
@@ -0,0 +1,338 @@
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+ITEMS_PATTERN = re.compile(r"^\s*(.+?)\s+([0-9][0-9,\s]*)\s*원\s*$")
+DATE_PATTERN = re.compile(r"일시:\s*([0-9]{4}-[0-9]{2}-[0-9]{2}\s+[0-9]{2}:[0-9]{2}:[0-9]{2})")
+_NUMBER_NOISE = re.compile(r"[\s,]")
+
+# Line classifications produced by scan_receipt_text
+STORE = "store"
+DATE = "date"
+ITEM = "item"
+META = "meta"
+
+# Lines containing these are never items for the extended patterns (the
+# legacy "name price원" pattern keeps its original, narrower exclusions).
+META_KEYWORDS = (
+    "총계", "소계", "합계", "부가세", "과세", "면세", "할인", "카드", "현금", "승인",
+    "결제", "받을", "거스름", "잔액", "전화", "사업자", "영수증", "번호", "일시", "tel",
+    "포인트", "주소", "가맹점", "대표",
+)
+
+# Lines naming the receipt total; their amount is recorded, never an item
+TOTAL_KEYWORDS = ("총계", "합계", "총액", "결제금액", "받을금액")
+# Subtotal/payment lines that no pattern (legacy included) treats as items
+_NON_ITEM_KEYWORDS = TOTAL_KEYWORDS + ("소계", "결제", "승인", "거스름")
+_TRAILING_AMOUNT = re.compile(r"([0-9][0-9,]*)\s*원?\s*$")
+
+# Meta lines that carry nothing an item parser needs (contact details,
+# approval/card numbers, tax breakdown, footer). Dropped before LLM calls;
+# totals, discounts and payment amounts are kept as sanity checks.
+NOISE_KEYWORDS = (
+    "tel", "전화", "fax", "승인", "카드번호", "사업자", "가맹점", "대표", "주소", "영수증",
+    "번호", "부가세", "과세", "면세", "거스름", "포인트", "www", "http", "감사합니다",
+)
+_SEPARATOR = re.compile(r"^[\W_]+$")
+
+# Column header such as "상품명 단가 수량 금액" or "품명 수량 단가 금액"
+_HEADER_NAME = re.compile(r"(상품명|품명|메뉴|품목)")
+
+
+class ScannedItem(NamedTuple):
+    name: str
+    price: int  # unit price
+    quantity: Optional[int]  # None when the line carries no quantity
+    pattern: str
+
+
+@dataclass(frozen=True)
+class ReceiptScan:
+    """Result of a single pass over OCR text.
+
+    Immutable so it can be shared from the scan cache; use ``item_dicts()``
+    for a fresh, mutable item list.
+    """
+    store_name: Optional[str]
+    date: Optional[str]
+    items: Tuple[ScannedItem, ...]
+    lines: Tuple[Tuple[str, str], ...]  # (kind, stripped line) for non-empty lines
+    totals: Tuple[int, ...] = ()  # amounts on 총계/합계/결제금액 lines, in order
+
+    def item_dicts(self) -> List[Dict[str, int]]:
+        items = []
+        for item in self.items:
+            entry = {"name": item.name, "price": item.price}
+            if item.quantity is not None:
+                entry["quantity"] = item.quantity
+            items.append(entry)
+        return items
+
+
+def _to_int(text: str) -> Optional[int]:
+    try:
+        return int(_NUMBER_NOISE.sub("", text))
+    except ValueError:
+        return None
+
+
+def _is_meta(line: str) -> bool:
+    lowered = line.lower()
+    return any(keyword in lowered for keyword in META_KEYWORDS)
+
+
+def _valid_name(name: str) -> bool:
+    name = name.strip()
+    return bool(name) and not name.replace(",", "").replace(" ", "").isdigit()
+
+
+# Extractors return (name, unit_price, quantity) or None -------------------
+
+def _extract_won_suffix(match, layout):
+    price = _to_int(match.group(2))
+    if price is None:
+        return None
+    return match.group(1).strip(), price, None
+
+
+def _extract_marker_amount(match, layout):
+    qty, amount = int(match.group("qty")), _to_int(match.group("amount"))
+    if not qty or amount is None or amount % qty:
+        return None
+    return match.group("name").strip(), amount // qty, qty
+
+
+def _extract_unit_marker(match, layout):
+    qty, unit = int(match.group("qty")), _to_int(match.group("unit"))
+    if not qty or unit is None:
+        return None
+    return match.group("name").strip(), unit, qty
+
+
+def _extract_columns(match, layout):
+    a, b, amount = (_to_int(match.group(g)) for g in ("a", "b", "amount"))
+    if None in (a, b, amount):
+        return None
+    # Header tells us which column is quantity; otherwise try both orders
+    orders = [(a, b), (b, a)] if layout != "unit_first" else [(b, a), (a, b)]
+    for qty, unit in orders:
+        if 0 < qty < 100 and qty * unit == amount:
+            return match.group("name").strip(), unit, qty
+    return None
+
+
+def _extract_qty_amount(match, layout):
+    qty, amount = int(match.group("qty")), _to_int(match.group("amount"))
+    if not qty or amount is None or amount % qty:
+        return None
+    return match.group("name").strip(), amount // qty, qty
+
+
+def _extract_bare_price(match, layout):
+    price = _to_int(match.group("price"))
+    # Korean prices are whole tens of won; this rejects most stray numbers
+    if price is None or price < 100 or price % 10:
+        return None
+    return match.group("name").strip(), price, None
+
+
+@dataclass(frozen=True)
+class ItemPattern:
+    name: str
+    regex: "re.Pattern[str]"
+    extract: Callable
+    prefilter: Callable[[str], bool]
+    legacy: bool = False  # legacy pattern keeps its original meta exclusions
+
+
+_AMOUNT = r"[0-9][0-9,]*"
+_GROUPED = r"[0-9]{1,3}(?:,[0-9]{3})+"
+_MARKERS = frozenset("xX×*")
+
+# Tried in order; cheap prefilters skip patterns that cannot match. Specific
+# multi-number layouts come before the legacy "name price원" rule, which would
+# otherwise glue "2 9,000원" into a single price.
+ITEM_PATTERNS: Tuple[ItemPattern, ...] = (
+    ItemPattern(
+        "marker_amount",  # 아메리카노 x2 9,000원
+        re.compile(rf"^(?P<name>.+?)\s*[xX×*]\s*(?P<qty>\d{{1,2}})\s+(?P<amount>{_AMOUNT})\s*원?$"),
+        _extract_marker_amount,
+        lambda line: not _MARKERS.isdisjoint(line),
+    ),
+    ItemPattern(
+        "unit_marker",  # 카페라떼 4,500 x 2
+        re.compile(rf"^(?P<name>.+?)\s+(?P<unit>{_AMOUNT})\s*원?\s*[xX×*]\s*(?P<qty>\d{{1,2}})$"),
+        _extract_unit_marker,
+        lambda line: not _MARKERS.isdisjoint(line),
+    ),
+    ItemPattern(
+        "columns",  # 아메리카노 4,500 2 9,000  (단가 수량 금액, either order)
+        re.compile(rf"^(?P<name>.+?)\s+(?P<a>{_AMOUNT})\s+(?P<b>{_AMOUNT})\s+(?P<amount>{_AMOUNT})\s*원?$"),
+        _extract_columns,
+        lambda line: line.count(" ") >= 3,
+    ),
+    ItemPattern(
+        "qty_amount",  # 아메리카노 2 9,000원
+        re.compile(rf"^(?P<name>.+?)\s+(?P<qty>\d{{1,2}})\s+(?P<amount>{_GROUPED})\s*원?$"),
+        _extract_qty_amount,
+        lambda line: line.count(" ") >= 2,
+    ),
+    ItemPattern(
+        "won_suffix",  # 사과 2,000원
+        ITEMS_PATTERN,
+        _extract_won_suffix,
+        lambda line: "원" in line,
+        legacy=True,
+    ),
+    ItemPattern(
+        "bare_price",  # 치즈케이크 6,200
+        re.compile(r"^(?P<name>.*?[^\d\s,].*?)\s+(?P<price>[0-9]{1,3}(?:,[0-9]{3})+|[0-9]{3,7})$"),
+        _extract_bare_price,
+        lambda line: line[-1:].isdigit(),
+    ),
+)
+
+_pattern_hits: Counter = Counter()
+_pattern_hits_lock = threading.Lock()
+
+
+def item_pattern_stats() -> Dict[str, int]:
+    """Lines matched per item pattern since start (counted on scan cache misses)."""
+    with _pattern_hits_lock:
+        return {pattern.name: _pattern_hits[pattern.name] for pattern in ITEM_PATTERNS}
+
+
+def detect_layout(line: str) -> Optional[str]:
+    """Column order from a header line: 'qty_first', 'unit_first' or None."""
+    if not _HEADER_NAME.search(line):
+        return None
+    qty_at, unit_at = line.find("수량"), line.find("단가")
+    if qty_at == -1 or unit_at == -1:
+        return None
+    return "qty_first" if qty_at < unit_at else "unit_first"
+
+
+def _match_item(line: str, layout: Optional[str]) -> Optional[ScannedItem]:
+    if not any(ch.isdigit() for ch in line):
+        return None
+    legacy_excluded = "총계" in line or line.upper().startswith("TEL")
+    meta = None
+    for pattern in ITEM_PATTERNS:
+        if not pattern.prefilter(line):
+            continue
+        if pattern.legacy:
+            if legacy_excluded:
+                continue
+        else:
+            if meta is None:
+                meta = _is_meta(line)
+            if meta:
+                continue
+        match = pattern.regex.match(line)
+        if not match:
+            continue
+        extracted = pattern.extract(match, layout)
+        if extracted is None or not _valid_name(extracted[0]):
+            continue
+        with _pattern_hits_lock:
+            _pattern_hits[pattern.name] += 1
+        return ScannedItem(*extracted, pattern=pattern.name)
+    return None
+
+
+def _is_store_candidate(line: str, lowered: str) -> bool:
+    return not (
+        "tel" in lowered
+        or "총계" in line
+        or "원" in line
+        or lowered.startswith("일시:")
+        or line[0:1].isdigit()
+    )
+
+
+@lru_cache(maxsize=512)
+def scan_receipt_text(ocr_text: str) -> ReceiptScan:
+    """Tokenize ``ocr_text`` once and classify every line.
+
+    - store: first non-empty line that is not metadata (TEL, totals, prices,
+      ``일시:``, or starting with a digit) and not an item
+    - date: first ``일시: YYYY-MM-DD HH:MM:SS`` match
+    - item: first match in ``ITEM_PATTERNS``; a ``수량``/``단가`` header line
+      fixes the column order for the lines after it. Total, subtotal and
+      payment lines are never items; total amounts go to ``totals``. Item
+      matching stops at the first total line with an amount (points,
+      payment and footer lines follow it)
+    - meta: everything else
+
+    Results are memoized per text, so calling the individual parse methods
+    for one receipt costs a single scan.
+    """
+    store_name: Optional[str] = None
+    date: Optional[str] = None
+    layout: Optional[str] = None
+    items: List[ScannedItem] = []
+    lines: List[Tuple[str, str]] = []
+    totals: List[int] = []
+    past_total = False
+
+    for raw in ocr_text.strip().split("\n"):
+        line = raw.strip()
+        if not line:
+            continue
+        kind = META
+
+        header_layout = detect_layout(line)
+        if header_layout is not None:
+            layout = header_layout
+            lines.append((kind, line))
+            continue
+
+        item = None
+        if any(keyword in line for keyword in _NON_ITEM_KEYWORDS):
+            if any(keyword in line for keyword in TOTAL_KEYWORDS):
+                amount = _TRAILING_AMOUNT.search(line)
+                if amount and _to_int(amount.group(1)) is not None:
+                    totals.append(_to_int(amount.group(1)))
+                    past_total = True
+        elif not past_total:
+            item = _match_item(line, layout)
+        if item is not None:
+            items.append(item)
+            kind = ITEM
+
+        if date is None and "일시:" in line:
+            date_match = DATE_PATTERN.search(line)
+            if date_match:
+                date = date_match.group(1).strip()
+                kind = DATE
+
+        if store_name is None and item is None and _is_store_candidate(line, line.lower()):
+            store_name = line
+            kind = STORE
+
+        lines.append((kind, line))
+
+    return ReceiptScan(
+        store_name=store_name, date=date, items=tuple(items), lines=tuple(lines), totals=tuple(totals),
+    )
+
+
+def prefilter_ocr_text(ocr_text: str) -> str:
+    """OCR text with noise lines removed and whitespace collapsed.
+
+    Uses the scan's line kinds: store, date and item lines are always kept;
+    other lines are dropped when they are separators or contain one of
+    ``NOISE_KEYWORDS``. Unrecognized lines stay, since they may be items the
+    patterns missed. Returns the input unchanged if nothing would be left.
+    """
+    kept = []
+    for kind, line in scan_receipt_text(ocr_text).lines:
+        if kind == META:
+            lowered = line.lower()
+            if _SEPARATOR.match(line) or any(keyword in lowered for keyword in NOISE_KEYWORDS):
+                continue
+        kept.append(" ".join(line.split()))
+    return "\n".join(kept) if kept else ocr_text
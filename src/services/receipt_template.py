@@ -0,0 +1,147 @@
+import hashlib
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .llm_cache import normalize_ocr_text
+from .receipt_parser_interface import ParsedReceiptDTO
+from .receipt_scanner import (
+    DATE_PATTERN, ITEM, ITEM_PATTERNS, META_KEYWORDS, TOTAL_KEYWORDS, detect_layout, scan_receipt_text,
+)
+
+# Parses a template must be confirmed by before it is used
+MIN_TEMPLATE_SAMPLES = 2
+
+_PATTERNS = {pattern.name: pattern for pattern in ITEM_PATTERNS}
+_TOTAL_AMOUNT = re.compile(r"([0-9][0-9,]*)\s*원?\s*$")
+
+
+@dataclass(frozen=True)
+class ReceiptTemplate:
+    """Learned layout of one store's receipts.
+
+    The first ``header_lines`` non-empty lines are skipped; every following
+    line is matched against the single ``item_pattern`` until the line
+    containing ``total_keyword``. ``samples`` counts the distinct receipts
+    whose successful parse produced the same template; ``receipts`` holds
+    their ``receipt_key`` so a re-parse of one receipt is not counted twice.
+    ``candidate`` is a different layout seen since this one was confirmed;
+    it replaces this template only once it is confirmed in turn.
+    """
+    header_lines: int
+    item_pattern: str
+    total_keyword: str
+    layout: Optional[str] = None
+    samples: int = 1
+    receipts: Tuple[str, ...] = ()
+    candidate: Optional["ReceiptTemplate"] = None
+
+    def same_shape(self, other: "ReceiptTemplate") -> bool:
+        return (self.header_lines, self.item_pattern, self.total_keyword, self.layout) == (
+            other.header_lines, other.item_pattern, other.total_keyword, other.layout
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["receipts"] = list(self.receipts)
+        data["candidate"] = self.candidate.to_dict() if self.candidate is not None else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Any) -> Optional["ReceiptTemplate"]:
+        """Template stored with a ``Store``, or None when absent or malformed."""
+        if not isinstance(data, dict):
+            return None
+        try:
+            return cls(
+                header_lines=int(data["header_lines"]),
+                item_pattern=str(data["item_pattern"]),
+                total_keyword=str(data["total_keyword"]),
+                layout=data.get("layout"),
+                samples=int(data.get("samples", 1)),
+                receipts=tuple(str(key) for key in data.get("receipts") or ()),
+                candidate=cls.from_dict(data.get("candidate")),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+def receipt_key(ocr_text: str) -> str:
+    """Short hash identifying one receipt across OCR whitespace variants."""
+    return hashlib.sha256(normalize_ocr_text(ocr_text).encode("utf-8")).hexdigest()[:16]
+
+
+def _line_total(item: Dict[str, Any]) -> int:
+    return int(item.get("price", 0)) * int(item.get("quantity", 1))
+
+
+def apply_template(template: ReceiptTemplate, ocr_text: str) -> Optional[ParsedReceiptDTO]:
+    """Parse ``ocr_text`` with ``template`` alone.
+
+    Returns None (a miss) unless items were found and their sum equals the
+    amount on the total line, so a layout change falls back to the generic
+    parsers instead of returning a wrong item list. ``store_name`` is left
+    for the caller, which matched the store to pick the template.
+    """
+    pattern = _PATTERNS.get(template.item_pattern)
+    if pattern is None:
+        return None
+    lines = [line.strip() for line in ocr_text.strip().split("\n") if line.strip()]
+
+    items: List[Dict[str, Any]] = []
+    total: Optional[int] = None
+    for line in lines[template.header_lines:]:
+        if template.total_keyword in line:
+            amount = _TOTAL_AMOUNT.search(line)
+            if amount:
+                total = int(amount.group(1).replace(",", ""))
+            break
+        if not pattern.legacy and any(keyword in line.lower() for keyword in META_KEYWORDS):
+            continue
+        match = pattern.regex.match(line)
+        extracted = pattern.extract(match, template.layout) if match else None
+        if extracted is not None:
+            name, price, quantity = extracted
+            items.append({"name": name, "price": price, "quantity": quantity or 1})
+
+    if not items or total is None or sum(_line_total(item) for item in items) != total:
+        return None
+    date = DATE_PATTERN.search(ocr_text)
+    return ParsedReceiptDTO(store_name=None, date=date.group(1).strip() if date else None, items=items)
+
+
+def learn_template(ocr_text: str, items: List[Dict[str, Any]]) -> Optional[ReceiptTemplate]:
+    """Derive a template from a successful parse of ``ocr_text``.
+
+    ``items`` is the accepted result (from any parser). A template is only
+    returned when every scanned item used one pattern, a total line follows
+    the items, and the template reproduces the accepted item sum.
+    """
+    scan = scan_receipt_text(ocr_text)
+    patterns = {item.pattern for item in scan.items}
+    if len(patterns) != 1 or not items:
+        return None
+    kinds = [kind for kind, _ in scan.lines]
+    header_lines = kinds.index(ITEM)
+
+    total_keyword = None
+    for _, line in scan.lines[header_lines:]:
+        total_keyword = next((keyword for keyword in TOTAL_KEYWORDS if keyword in line), None)
+        if total_keyword is not None:
+            break
+    if total_keyword is None:
+        return None
+
+    layout = None
+    for _, line in scan.lines[:header_lines]:
+        layout = detect_layout(line) or layout
+
+    template = ReceiptTemplate(header_lines, patterns.pop(), total_keyword, layout)
+    parsed = apply_template(template, ocr_text)
+    try:
+        expected = sum(_line_total(item) for item in items)
+    except (TypeError, ValueError):
+        return None
+    if parsed is None or sum(_line_total(item) for item in parsed.items) != expected:
+        return None
+    return template
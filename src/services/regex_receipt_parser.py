@@ -11,6 +11,14 @@ class RegexReceiptParser(ReceiptParserInterface):
         
     def parse(self, ocr_text: str) -> ParsedReceiptDTO:
         """Parse OCR text using regex patterns"""
+        if hasattr(type(self.ocr_service), "scan"):
+            # One scan yields all three fields, as in parse_ocr_text
+            scan = self.ocr_service.scan(ocr_text)
+            items = scan.item_dicts()
+            for item in items:
+                item.setdefault('quantity', 1)
+            return ParsedReceiptDTO(store_name=scan.store_name, date=scan.date, items=items)
+
         store_name = self.parse_store_name(ocr_text)
         date = self.parse_date(ocr_text)
         items = self.parse_items_and_prices(ocr_text)
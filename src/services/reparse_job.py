@@ -0,0 +1,221 @@
+"""Re-run the regex parser over stored receipts after pattern changes.
+
+Usage:
+    python -m src.services.reparse_job --checkpoint reparse.ckpt [--apply]
+        [--parser scan|regex] [--workers N] [--batch-size 200] [--diff-out diffs.jsonl]
+
+Receipts that kept their OCR text are streamed from Firestore and parsed
+across a process pool. Each receipt whose items would change is written as
+one JSON line (old and new items). With ``--apply`` the changes are written
+back in batched updates, but only when the new items are non-empty and
+either add up to the receipt's 합계/총계 line or replace items that the regex
+parser produced (``parsed_by == "regex"``). A failed re-parse never
+overwrites an LLM result. Receipts with assigned items or recorded split
+payments are reported but never rewritten. Receipts are read in pages in
+document-id order, and processed ids are appended to the checkpoint file
+after each batch, so an interrupted run resumes after the last checkpointed
+id instead of re-reading the collection.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from .image_preprocessor import pool_context
+from .receipt_confidence import matches_total
+from .receipt_parser_interface import ParsedReceiptDTO
+from .receipt_scanner import scan_receipt_text
+
+PARSERS = ("scan", "regex")
+
+_worker_parser = None
+
+
+def _init_worker(parser: str) -> None:
+    global _worker_parser
+    if parser == "regex":
+        from .regex_receipt_parser import RegexReceiptParser
+
+        _worker_parser = RegexReceiptParser()
+    else:
+        _worker_parser = None
+
+
+def reparse_text(ocr_text: str) -> List[Dict[str, Any]]:
+    """Items for ``ocr_text`` from the worker's parser (single-pass scan by default)."""
+    if _worker_parser is not None:
+        items = _worker_parser.parse(ocr_text).items
+    else:
+        items = scan_receipt_text(ocr_text).item_dicts()
+    for item in items:
+        item.setdefault("quantity", 1)
+    return items
+
+
+def _item_key(items: Iterable[Dict[str, Any]]) -> List[Tuple[str, int, int]]:
+    # Stored prices are strings; compare on whole-won values
+    try:
+        return [(str(i.get("name")), int(i.get("price", 0)), int(i.get("quantity", 1))) for i in items]
+    except (TypeError, ValueError):
+        return []
+
+
+def _acceptable(items: List[Dict[str, Any]], ocr_text: str, receipt_data: dict) -> bool:
+    """Whether ``items`` may replace the stored list."""
+    if not items:
+        return False
+    if receipt_data.get("parsed_by") == "regex":
+        return True
+    return matches_total(ParsedReceiptDTO(store_name=None, date=None, items=items), ocr_text)
+
+
+def _locked(receipt_data: dict) -> bool:
+    """Receipts already split between users must keep their item list."""
+    return bool(receipt_data.get("split_transactions")) or any(
+        item.get("assigned_users") for item in receipt_data.get("items") or []
+    )
+
+
+class ReparseCheckpoint:
+    """Append-only file of processed receipt ids, one per line.
+
+    Receipts are processed in id order, so ``last_id`` is the resume cursor.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done.update(line.strip() for line in f if line.strip())
+
+    def mark(self, receipt_ids: Iterable[str]) -> None:
+        ids = [receipt_id for receipt_id in receipt_ids if receipt_id not in self.done]
+        if not ids:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{receipt_id}\n" for receipt_id in ids))
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(ids)
+
+    @property
+    def last_id(self) -> Optional[str]:
+        return max(self.done) if self.done else None
+
+
+def _batches(rows: Iterator, size: int) -> Iterator[list]:
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def run_reparse(
+    receipt_repo: Any,
+    checkpoint: ReparseCheckpoint,
+    parser: str = "scan",
+    apply: bool = False,
+    workers: Optional[int] = None,
+    batch_size: int = 200,
+    diff_out: Optional[TextIO] = None,
+) -> Dict[str, int]:
+    """Re-parse every stored OCR text not yet in ``checkpoint``.
+
+    Returns counts: scanned, skipped (already checkpointed), unchanged,
+    changed, locked (split receipts, not rewritten), rejected (new items empty
+    or not matching the total, not rewritten) and updated.
+    """
+    if parser not in PARSERS:
+        raise ValueError(f"parser must be one of {PARSERS}")
+    counts: Counter = Counter()
+    workers = workers or os.cpu_count() or 1
+
+    def pending():
+        rows = receipt_repo.stream_ocr_texts(page_size=batch_size, start_after=checkpoint.last_id)
+        for row in rows:
+            if row[0] in checkpoint.done:
+                counts["skipped"] += 1
+            else:
+                yield row
+
+    # Firestore's gRPC threads are live while streaming; never fork them
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(parser,), mp_context=pool_context()
+    ) as pool:
+        for batch in _batches(pending(), batch_size):
+            texts = [ocr_text for _, ocr_text, _ in batch]
+            # A few chunks per worker: amortizes pickling, keeps workers busy
+            chunksize = max(1, len(texts) // (4 * workers))
+            updates: Dict[str, List[Dict[str, Any]]] = {}
+            parsed = pool.map(reparse_text, texts, chunksize=chunksize)
+            for (receipt_id, ocr_text, receipt_data), items in zip(batch, parsed):
+                counts["scanned"] += 1
+                old_items = receipt_data.get("items") or []
+                if _item_key(old_items) == _item_key(items):
+                    counts["unchanged"] += 1
+                    continue
+                counts["changed"] += 1
+                locked = _locked(receipt_data)
+                acceptable = _acceptable(items, ocr_text, receipt_data)
+                if locked:
+                    counts["locked"] += 1
+                elif not acceptable:
+                    counts["rejected"] += 1
+                elif apply:
+                    updates[receipt_id] = items
+                if diff_out is not None:
+                    diff_out.write(json.dumps({
+                        "receipt_id": receipt_id,
+                        "old_items": [{"name": n, "price": p, "quantity": q} for n, p, q in _item_key(old_items)],
+                        "new_items": items,
+                        "locked": locked,
+                        "acceptable": acceptable,
+                    }, ensure_ascii=False) + "\n")
+            if updates:
+                receipt_repo.update_items_many(updates)
+                counts["updated"] += len(updates)
+            if diff_out is not None:
+                diff_out.flush()
+            # Only after the batch's writes landed, so a crash re-does it
+            checkpoint.mark(receipt_id for receipt_id, _, _ in batch)
+    return {key: counts[key] for key in ("scanned", "skipped", "unchanged", "changed", "locked", "rejected", "updated")}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checkpoint", required=True, help="processed-id file; reused to resume")
+    parser.add_argument("--apply", action="store_true", help="write changed items back (default: diff only)")
+    parser.add_argument("--parser", choices=PARSERS, default="scan")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--diff-out", default=None, help="JSON lines of changed receipts (default: stdout)")
+    args = parser.parse_args(argv)
+
+    from src.repositories.receipt_repository import ReceiptRepository
+
+    diff_out = open(args.diff_out, "a", encoding="utf-8") if args.diff_out else sys.stdout
+    try:
+        counts = run_reparse(
+            ReceiptRepository(),
+            ReparseCheckpoint(args.checkpoint),
+            parser=args.parser,
+            apply=args.apply,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            diff_out=diff_out,
+        )
+    finally:
+        if diff_out is not sys.stdout:
+            diff_out.close()
+    print(" ".join(f"{key}={value}" for key, value in counts.items()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from .image_preprocessor import map_file
+from .ocr_service import parse_ocr_text
+
+
+@dataclass
+class UploadJob:
+    """Progress of one asynchronous receipt upload.
+
+    ``status`` moves ``queued -> ocr -> parsing -> done`` (or ``failed``);
+    ``progress`` is a rough percentage for the UI.
+    """
+    id: str
+    status: str = "queued"
+    progress: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[Dict[str, str]] = None
+    created_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+    done_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"job_id": self.id, "status": self.status, "progress": self.progress}
+        if self.result is not None:
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+class UploadQueueFull(Exception):
+    """Raised when the bounded upload queue cannot accept another job."""
+
+
+class UploadJobService:
+    """Runs OCR, parsing and store lookup for uploads on a bounded worker pool.
+
+    ``submit`` returns immediately with a job id; ``get`` reports progress and,
+    once done, the parsed store and items in the same shape the synchronous
+    ``/upload`` flow stores in the session. ``submit_file`` takes an upload
+    spooled to disk instead, so pending jobs don't pin image bytes in memory.
+    """
+
+    def __init__(
+        self,
+        ocr_service,
+        store_repo=None,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        job_ttl_seconds: float = 900.0,
+    ):
+        if max_workers is None:
+            max_workers = int(os.getenv("UPLOAD_WORKERS", "4"))
+        if max_pending is None:
+            max_pending = int(os.getenv("UPLOAD_MAX_PENDING", str(max_workers * 8)))
+        self.ocr_service = ocr_service
+        self.store_repo = store_repo
+        self.max_pending = max_pending
+        self.job_ttl_seconds = job_ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload-job")
+        self._jobs: Dict[str, UploadJob] = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def submit(self, content: bytes) -> UploadJob:
+        job = self._reserve()
+        self._executor.submit(self._run, job, content)
+        return job
+
+    def submit_file(self, path: str) -> UploadJob:
+        """Queue the upload stored at ``path``; the job deletes the file once
+        OCR has read it, or right away if the queue is full."""
+        try:
+            job = self._reserve()
+        except UploadQueueFull:
+            _remove(path)
+            raise
+        self._executor.submit(self._run, job, path=path)
+        return job
+
+    def get(self, job_id: str) -> Optional[UploadJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[UploadJob]:
+        """Block until the job finishes (or ``timeout`` elapses); for tests/CLI."""
+        job = self.get(job_id)
+        if job is not None:
+            job.done_event.wait(timeout)
+        return job
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _reserve(self) -> UploadJob:
+        with self._lock:
+            self._evict_expired()
+            if self._pending >= self.max_pending:
+                raise UploadQueueFull(f"{self._pending} uploads already pending")
+            job = UploadJob(id=uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self._pending += 1
+        return job
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self.job_ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _fail(self, job: UploadJob, code: str, message: str) -> None:
+        job.error = {"code": code, "message": message}
+        job.status = "failed"
+
+    def _extract_text(self, content: Optional[bytes], path: Optional[str]) -> str:
+        if path is None:
+            return self.ocr_service.extract_text_from_image(content)
+        try:
+            with map_file(path) as mapped:
+                return self.ocr_service.extract_text_from_image(mapped)
+        finally:
+            _remove(path)
+
+    def _run(self, job: UploadJob, content: Optional[bytes] = None, path: Optional[str] = None) -> None:
+        try:
+            job.status, job.progress = "ocr", 10
+            text = self._extract_text(content, path)
+
+            job.status, job.progress = "parsing", 60
+            store_name, items = parse_ocr_text(self.ocr_service, text)
+
+            if not store_name:
+                self._fail(job, "store_not_recognized", "Store name not recognized")
+                return
+            if self.store_repo is None:
+                self._fail(job, "store_repo_unavailable", "Store repository unavailable")
+                return
+            store_id = getattr(self.store_repo.find_by_name(store_name), "id", None)
+            if not store_id:
+                self._fail(job, "store_not_found", "Store not found")
+                return
+
+            try:
+                total_amount = sum(int(i.get("price", 0)) * int(i.get("quantity", 1)) for i in items)
+            except (ValueError, TypeError):
+                total_amount = 0
+
+            job.result = {
+                "store_id": store_id,
+                "store_name": store_name,
+                "items": items,
+                "total": total_amount,
+            }
+            job.status = "done"
+        except Exception as e:
+            logging.exception("Upload job %s failed", job.id)
+            self._fail(job, "processing_error", str(e))
+        finally:
+            job.progress = 100
+            job.finished_at = time.monotonic()
+            with self._lock:
+                self._pending -= 1
+            job.done_event.set()
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -5,8 +5,15 @@ from datetime import datetime
 from src.repositories.user_repository import UserRepository
 from src.repositories.receipt_repository import ReceiptRepository
 from src.repositories.coupon_repository import CouponRepository
-from src.services.ocr_service import OCRService
+from src.services.ocr_service import OCRService, parse_ocr_text as _parse_ocr_text
+from src.services.ocr_cache import OCRResultCache
+from src.services.circuit_breaker import breaker_stats
+from src.services.receipt_scanner import item_pattern_stats
+from src.services.image_preprocessor import ImagePreprocessor
 from src.services.coupon_service import CouponService
+from src.services.upload_job_service import UploadJobService, UploadQueueFull
+from src.web.uploads import SpooledUploadRequest, spool_upload, upload_buffer, upload_limits_from_env
+from contextlib import ExitStack
 from src.models.user import User
 from src.models.store import Store
 from markupsafe import escape
@@ -32,6 +39,16 @@ def _wants_json(req: request) -> bool:
     accept = (req.headers.get('Accept') or '').lower()
     return fmt == 'json' and 'application/json' in accept
 
+def _wants_async_upload(req: request) -> bool:
+    """True if the upload should be queued as a job instead of processed inline.
+
+    Opt in per request with ``?async=1`` (or an ``async`` form field), or for
+    every upload with env ``ENABLE_ASYNC_UPLOAD=1``.
+    """
+    truthy = ('1', 'true', 'yes')
+    flag = (req.args.get('async') or req.form.get('async') or '').lower()
+    return flag in truthy or (os.environ.get('ENABLE_ASYNC_UPLOAD') or '').lower() in truthy
+
 def _ensure_csrf_token() -> str:
     token = session.get('csrf_token')
     if not token:
@@ -80,6 +97,25 @@ def _first_value(source, keys: list[str], default=''):
     return default
 
 
+def _load_users(user_repo, user_ids) -> dict:
+    """Fetch users keyed by id, in one round trip when the repo supports it.
+
+    Repositories may expose ``get_many(user_ids) -> dict``; otherwise fall back
+    to one ``get_by_id`` per id. Missing users are omitted from the result.
+    """
+    ids = [uid for uid in dict.fromkeys(user_ids) if uid]
+    if not ids:
+        return {}
+    if hasattr(type(user_repo), 'get_many'):
+        return user_repo.get_many(ids) or {}
+    users = {}
+    for uid in ids:
+        user = user_repo.get_by_id(uid)
+        if user:
+            users[uid] = user
+    return users
+
+
 def create_app(
     user_repo=None,
     receipt_repo=None,
@@ -87,9 +123,19 @@ def create_app(
     ocr_service=None,
     store_repo=None,
     coupon_service: CouponService | None = None,
+    upload_jobs: UploadJobService | None = None,
 ) -> Flask:
     app = Flask(__name__)
     app.secret_key = os.environ.get('APP_SECRET_KEY', 'test_secret_key')
+    # Bound per-request memory: reject oversized bodies early and spool large
+    # uploads to disk instead of holding them in the worker
+    app.request_class = SpooledUploadRequest
+    app.config.update(upload_limits_from_env())
+
+    @app.errorhandler(413)
+    def _payload_too_large(error):
+        limit_mb = app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024)
+        return _json_error('payload_too_large', f'Upload exceeds {limit_mb:g} MB limit', 413)
 
     @app.before_request
     def _csrf_protect_and_prepare():
@@ -115,10 +161,15 @@ def create_app(
         from src.repositories.store_repository import StoreRepository
         store_repo = StoreRepository()
     if ocr_service is None:
-        ocr_service = OCRService()
+        ocr_service = OCRService(
+            cache=OCRResultCache.from_env(),
+            preprocessor=ImagePreprocessor.from_env(),
+        )
     # coupon_service is expected to be injected by caller/tests, but create default if not provided.
     if coupon_service is None and (coupon_repo is not None and store_repo is not None):
         coupon_service = CouponService(coupon_repo, store_repo)
+    if upload_jobs is None:
+        upload_jobs = UploadJobService(ocr_service, store_repo)
 
     # Add custom Jinja2 filters
     def format_currency(value):
@@ -171,10 +222,20 @@ def create_app(
             if file.filename == '':
                 return _json_error('no_file_selected', 'No file selected', 400)
 
-            content_bytes = file.read()
-            text = ocr_service.extract_text_from_image(content_bytes)
-            store_name = ocr_service.parse_store_name(text)
-            items = ocr_service.parse_items_and_prices(text)
+            if _wants_async_upload(request):
+                # The job outlives this request, so it gets its own copy on disk
+                try:
+                    job = upload_jobs.submit_file(spool_upload(file))
+                except UploadQueueFull:
+                    return _json_error('upload_queue_full', 'Too many uploads in progress', 503)
+                status_url = url_for('upload_job_status', job_id=job.id)
+                response = jsonify({**job.to_dict(), 'status_url': status_url})
+                response.headers['Location'] = status_url
+                return response, 202
+
+            with upload_buffer(file) as content:
+                text = ocr_service.extract_text_from_image(content)
+            store_name, items = _parse_ocr_text(ocr_service, text)
 
             if not store_name:
                 return _json_error('store_not_recognized', 'Store name not recognized', 400)
@@ -192,7 +253,7 @@ def create_app(
 
             # Compute total from parsed items (fallback to 0)
             try:
-                total_amount = sum(int(i.get('price', 0)) for i in items)
+                total_amount = sum(int(i.get('price', 0)) * int(i.get('quantity', 1)) for i in items)
             except (ValueError, TypeError):
                 total_amount = 0
 
@@ -202,6 +263,67 @@ def create_app(
 
         return render_template('upload.html')
 
+    @app.route('/upload/jobs/<job_id>', methods=['GET'])
+    def upload_job_status(job_id):
+        job = upload_jobs.get(job_id)
+        if job is None:
+            return _json_error('job_not_found', 'Upload job not found', 404)
+
+        data = job.to_dict()
+        if job.status == 'done':
+            # Same session state the synchronous flow sets before redirecting
+            session['parsed_items'] = job.result['items']
+            session['assignment_store_id'] = job.result['store_id']
+            data['confirm_url'] = url_for('confirm_receipt',
+                                          store_id=job.result['store_id'],
+                                          total=str(job.result['total']))
+        return jsonify(data)
+
+    @app.route('/upload/batch', methods=['POST'])
+    def upload_batch():
+        """OCR several receipts at once; one Vision RPC per 16 images."""
+        files = [f for f in request.files.getlist('files') if f.filename]
+        if not files:
+            return _json_error('missing_file', 'No files', 400)
+
+        with ExitStack() as stack:
+            contents = [stack.enter_context(upload_buffer(f)) for f in files]
+            ocr_results = ocr_service.extract_text_batch(contents)
+
+        receipts = []
+        store_ids = {}
+        for file, ocr_result in zip(files, ocr_results):
+            entry = {'filename': file.filename}
+            if ocr_result.error or not ocr_result.text:
+                entry['error'] = {'code': 'ocr_failed', 'message': ocr_result.error or 'No text detected'}
+                receipts.append(entry)
+                continue
+
+            store_name, items = _parse_ocr_text(ocr_service, ocr_result.text)
+            items = items or []
+            entry['store_name'] = store_name
+            entry['items'] = items
+            try:
+                entry['total'] = sum(int(i.get('price', 0)) * int(i.get('quantity', 1)) for i in items)
+            except (ValueError, TypeError):
+                entry['total'] = 0
+
+            if not store_name:
+                entry['error'] = {'code': 'store_not_recognized', 'message': 'Store name not recognized'}
+            else:
+                # Receipts from one outing usually share a store; look each name up once
+                if store_name not in store_ids:
+                    store = store_repo.find_by_name(store_name) if store_repo else None
+                    store_ids[store_name] = getattr(store, 'id', None)
+                store_id = store_ids[store_name]
+                if store_id:
+                    entry['store_id'] = store_id
+                else:
+                    entry['error'] = {'code': 'store_not_found', 'message': 'Store not found'}
+            receipts.append(entry)
+
+        return jsonify({'receipts': receipts})
+
     @app.route('/csrf-token', methods=['GET'])
     def csrf_token():
         # Expose CSRF token for clients wanting to include it in subsequent POSTs
@@ -410,8 +532,9 @@ def create_app(
         insufficient_balance_count = 0
         total_amount = 0
         
+        users_by_id = _load_users(user_repo, split_assignments.keys())
         for user_id, amount in split_assignments.items():
-            user = user_repo.get_by_id(user_id)
+            user = users_by_id.get(user_id)
             if user:
                 user_name = str(_get_value(user, 'name'))
                 user_deposit = _get_value(user, 'deposit') or 0
@@ -457,8 +580,9 @@ def create_app(
         user_payment_data = []
         total_amount = 0
         
+        users_by_id = _load_users(user_repo, confirmed_payments.keys())
         for user_id, payment_info in confirmed_payments.items():
-            user = user_repo.get_by_id(user_id)
+            user = users_by_id.get(user_id)
             if user:
                 user_name = str(_get_value(user, 'name'))
                 amount = payment_info.get('amount', 0)
@@ -521,6 +645,7 @@ def create_app(
         payment_operations = []
         
         # Pre-validate all payments
+        users_by_id = _load_users(user_repo, [p.get('user_id') for p in user_payments])
         for payment in user_payments:
             user_id = payment.get('user_id')
             amount = payment.get('amount', 0)
@@ -530,7 +655,7 @@ def create_app(
                 failed_payments.append({'user_id': user_id, 'error': 'missing_user_id'})
                 continue
                 
-            user = user_repo.get_by_id(user_id)
+            user = users_by_id.get(user_id)
             if not user:
                 failed_payments.append({'user_id': user_id, 'error': 'user_not_found'})
                 continue
@@ -758,8 +883,9 @@ def create_app(
         enable_bulk = (os.environ.get('ENABLE_BULK_SAVE') or '').lower() in ('1', 'true', 'yes')
         has_bulk_method = hasattr(user_repo, 'save_many')
         
+        users_by_id = _load_users(user_repo, user_ids)
         for user_id in user_ids:
-            user = user_repo.get_by_id(user_id)
+            user = users_by_id.get(user_id)
             if not user:
                 failed_users.append({'user_id': user_id, 'error': 'user_not_found'})
                 continue
@@ -965,6 +1091,18 @@ def create_app(
             result += f'{payer["user_name"]}{payer["amount"]}'
         return result
     
+    @app.route('/admin/metrics')
+    def admin_metrics():
+        if not session.get('admin_logged_in'):
+            return redirect(url_for('admin_login'))
+
+        metrics = {}
+        if hasattr(type(ocr_service), 'cache_stats'):
+            metrics['ocr_cache'] = ocr_service.cache_stats()
+        metrics['item_patterns'] = item_pattern_stats()
+        metrics['circuit_breakers'] = breaker_stats()
+        return jsonify(metrics)
+
     @app.route('/admin/transactions/financial-report')
     def admin_financial_report():
         if not session.get('admin_logged_in'):
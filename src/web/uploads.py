@@ -0,0 +1,100 @@
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Union
+
+from flask import Request, current_app
+
+from src.services.image_preprocessor import MappedFile
+
+DEFAULT_MAX_UPLOAD_MB = 20
+DEFAULT_SPOOL_THRESHOLD_KB = 512
+
+UploadBuffer = Union[memoryview, mmap.mmap]
+
+
+def upload_limits_from_env() -> dict:
+    """Flask config for upload size limits, read from the environment."""
+    max_mb = float(os.environ.get('MAX_UPLOAD_MB', DEFAULT_MAX_UPLOAD_MB))
+    spool_kb = int(os.environ.get('UPLOAD_SPOOL_THRESHOLD_KB', DEFAULT_SPOOL_THRESHOLD_KB))
+    return {
+        # Requests above this are rejected with 413 before the body is read
+        'MAX_CONTENT_LENGTH': int(max_mb * 1024 * 1024),
+        'UPLOAD_SPOOL_THRESHOLD': spool_kb * 1024,
+    }
+
+
+class SpooledUploadRequest(Request):
+    """Request that keeps small uploads in memory and spools larger ones to disk.
+
+    Unlike werkzeug's default ``SpooledTemporaryFile`` the choice is made up
+    front from the request size, so the stream is either a plain ``BytesIO``
+    (exposed without copying via ``getbuffer``) or a named temp file that can
+    be memory-mapped and opened by path from preprocessing workers.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        threshold = current_app.config.get('UPLOAD_SPOOL_THRESHOLD', DEFAULT_SPOOL_THRESHOLD_KB * 1024)
+        if total_content_length is None or total_content_length > threshold:
+            return tempfile.NamedTemporaryFile('rb+')
+        return io.BytesIO()
+
+
+@contextmanager
+def upload_buffer(file) -> Iterator[UploadBuffer]:
+    """Read-only view of an uploaded file's bytes, without copying them.
+
+    Yields a ``memoryview`` for in-memory uploads or a ``MappedFile`` of the
+    spooled temp file (with its ``path`` when the file has one); the mapping
+    is closed when the block exits, so background jobs that outlive the
+    request take their own copy on disk with ``spool_upload``.
+    """
+    stream = file.stream
+    if isinstance(stream, io.BytesIO):
+        view = stream.getbuffer()
+        try:
+            yield view
+        finally:
+            # An outstanding export would stop the BytesIO from being closed
+            view.release()
+        return
+
+    try:
+        fd = stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        yield memoryview(stream.read())
+        return
+
+    stream.flush()
+    if os.fstat(fd).st_size == 0:
+        yield memoryview(b'')
+        return
+    mapped = MappedFile(fd, 0, access=mmap.ACCESS_READ)
+    name = getattr(stream, 'name', None)
+    if isinstance(name, str) and os.path.exists(name):
+        mapped.path = name
+    try:
+        yield mapped
+    finally:
+        mapped.close()
+
+
+def spool_upload(file) -> str:
+    """Copy an upload to a temp file that outlives the request; returns its path.
+
+    Used for background jobs so queued uploads wait on disk rather than in
+    memory. The caller owns the file and must delete it.
+    """
+    stream = file.stream
+    stream.seek(0)
+    with tempfile.NamedTemporaryFile('wb', prefix='upload-job-', delete=False) as out:
+        try:
+            shutil.copyfileobj(stream, out)
+        except BaseException:
+            out.close()
+            os.remove(out.name)
+            raise
+    return out.name
@@ -0,0 +1,43 @@
+from unittest.mock import Mock
+from src.services.ocr_cache import OCRResultCache
+from src.services.ocr_service import OCRService
+from src.web.app import create_app
+
+
+def _app(ocr_service):
+    return create_app(user_repo=Mock(), receipt_repo=Mock(), coupon_repo=Mock(),
+                      ocr_service=ocr_service, store_repo=Mock(), coupon_service=Mock())
+
+
+def test_should_expose_ocr_cache_hit_rate(tmp_path):
+    cache = OCRResultCache(str(tmp_path / "ocr.sqlite3"))
+    cache.put("k", "text")
+    cache.get("k")
+    client = _app(OCRService(client=Mock(), cache=cache)).test_client()
+    with client.session_transaction() as sess:
+        sess['admin_logged_in'] = True
+
+    response = client.get('/admin/metrics')
+
+    assert response.status_code == 200
+    assert response.get_json()['ocr_cache']['hit_rate'] == 1.0
+
+
+def test_should_require_admin_login_for_metrics():
+    client = _app(Mock()).test_client()
+
+    response = client.get('/admin/metrics')
+
+    assert response.status_code == 302
+    assert '/admin/login' in response.location
+
+
+def test_should_expose_circuit_breaker_states():
+    OCRService(client=Mock())
+    client = _app(Mock()).test_client()
+    with client.session_transaction() as sess:
+        sess['admin_logged_in'] = True
+
+    response = client.get('/admin/metrics')
+
+    assert response.get_json()['circuit_breakers']['ocr']['state'] == 'closed'
@@ -150,6 +150,43 @@ class TestAdminUserManagement:
         self.user_repo.save.assert_any_call(user1)
         self.user_repo.save.assert_any_call(user2)
     
+    def test_bulk_deposit_reads_users_in_one_batch(self, call_budget):
+        class BatchUserRepo:
+            def __init__(self, users):
+                self.users = users
+
+            def get_by_id(self, user_id):
+                return self.users.get(user_id)
+
+            def get_many(self, user_ids):
+                return {uid: self.users[uid] for uid in user_ids if uid in self.users}
+
+            def save(self, user):
+                pass
+
+        users = {f'user{i}': Mock(deposit=Decimal('0')) for i in range(10)}
+        user_repo = call_budget.wrap('user_repo', BatchUserRepo(users))
+        app = call_budget.attach(create_app(
+            user_repo=user_repo,
+            receipt_repo=Mock(),
+            coupon_repo=Mock(),
+            ocr_service=Mock(),
+            store_repo=Mock(),
+            coupon_service=Mock()
+        ))
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['admin_logged_in'] = True
+
+        response = client.post('/admin/users/bulk-deposit', data={
+            'amount': '50.0',
+            'user_ids': ','.join(users)
+        })
+
+        assert response.status_code == 302
+        call_budget.assert_at_most(1, 'user_repo', 'get_by_id', 'get_many')
+        assert call_budget.calls('user_repo', 'save') == 10
+
     @patch.dict('os.environ', {'ENABLE_BULK_SAVE': 'true'})
     def test_should_use_bulk_save_when_enabled_and_supported(self, client):
         # Log in as admin
@@ -0,0 +1,124 @@
+from collections import Counter
+from unittest.mock import NonCallableMock
+
+import pytest
+from flask import request
+
+from src.services.circuit_breaker import reset_breakers
+from src.services.receipt_parser_factory import ReceiptParserFactory
+
+
+class _CountingProxy:
+    """Forwards attribute access to a repository and counts method calls."""
+
+    def __init__(self, target, name: str, budget: "CallBudget"):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_budget", budget)
+
+    def __getattr__(self, attr):
+        value = getattr(self._target, attr)
+        if attr.startswith("_") or not callable(value):
+            return value
+
+        def counted(*args, **kwargs):
+            self._budget.record(self._name, attr)
+            return value(*args, **kwargs)
+
+        return counted
+
+    def __setattr__(self, attr, value):
+        setattr(self._target, attr, value)
+
+
+def _proxy_class_for(target):
+    """Build a proxy type exposing the same public methods as the target's class.
+
+    The app probes optional repository capabilities with
+    ``hasattr(type(repo), ...)``, so the proxy class must advertise them too.
+    Mocks are forwarded purely through ``__getattr__``.
+    """
+    if isinstance(target, NonCallableMock):
+        return _CountingProxy
+
+    attrs = {}
+    for klass in type(target).__mro__:
+        if klass is object:
+            continue
+        for attr, value in vars(klass).items():
+            if attr.startswith("_") or attr in attrs or not callable(value):
+                continue
+            attrs[attr] = property(lambda self, _attr=attr: self.__getattr__(_attr))
+    return type(f"Counting{type(target).__name__}", (_CountingProxy,), attrs)
+
+
+class CallBudget:
+    """Counts repository calls per request made through the Flask test client.
+
+    Wrap repositories with ``wrap()`` before handing them to ``create_app``,
+    then ``attach()`` the app. Each request gets its own ``Counter`` keyed by
+    ``"<repo>.<method>"``; ``assert_at_most`` checks the last one by default.
+    """
+
+    def __init__(self):
+        self.requests: list[tuple[str, Counter]] = []
+        self._current: Counter | None = None
+
+    def wrap(self, name: str, repo):
+        return _proxy_class_for(repo)(repo, name, self)
+
+    def attach(self, app):
+        @app.before_request
+        def _start_call_budget():
+            self._current = Counter()
+            self.requests.append((f"{request.method} {request.path}", self._current))
+
+        @app.teardown_request
+        def _finish_call_budget(exc=None):
+            self._current = None
+
+        return app
+
+    def record(self, name: str, method: str) -> None:
+        # Calls made outside a request (test setup) are not budgeted
+        if self._current is not None:
+            self._current[f"{name}.{method}"] += 1
+
+    def calls(self, name: str, *methods: str, index: int = -1) -> int:
+        """Total calls on ``name`` (optionally limited to ``methods``) for one request."""
+        _, counts = self.requests[index]
+        total = 0
+        for key, count in counts.items():
+            repo, _, method = key.partition(".")
+            if repo == name and (not methods or method in methods):
+                total += count
+        return total
+
+    def assert_at_most(self, limit: int, name: str, *methods: str, index: int = -1) -> None:
+        actual = self.calls(name, *methods, index=index)
+        label, counts = self.requests[index]
+        assert actual <= limit, (
+            f"{label}: expected at most {limit} {name} call(s) "
+            f"{list(methods) or ''} but got {actual}: {dict(counts)}"
+        )
+
+
+@pytest.fixture
+def call_budget():
+    return CallBudget()
+
+
+@pytest.fixture(autouse=True)
+def fresh_circuit_breakers():
+    """Failures recorded by one test must not open a shared breaker for the next."""
+    reset_breakers()
+    yield
+    reset_breakers()
+
+
+@pytest.fixture(autouse=True)
+def fresh_shared_parsers():
+    """Each test builds shared parsers from its own (patched) environment."""
+    ReceiptParserFactory.close_parsers()
+    yield
+    ReceiptParserFactory.close_parsers()
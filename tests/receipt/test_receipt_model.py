@@ -73,3 +73,13 @@ def test_should_track_who_uploaded_receipt():
     assert receipt.uploader.name == "김영희"
     assert receipt.user == uploader  # backward compatibility
     assert receipt.uploader != participant
+
+
+def test_should_persist_ocr_text_only_when_known():
+    receipt = Receipt(user=User(name="김영희", deposit=0), store=Store(name="이마트"))
+
+    assert "ocr_text" not in receipt.to_firestore_dict()
+
+    receipt.ocr_text = "이마트\n사과 2,000원"
+
+    assert receipt.to_firestore_dict()["ocr_text"] == "이마트\n사과 2,000원"
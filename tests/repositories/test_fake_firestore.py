@@ -0,0 +1,96 @@
+import pytest
+from google.api_core import exceptions
+from src.models.store import Store
+from src.models.user import User
+from src.repositories.coupon_repository import CouponRepository
+from src.repositories.fake_firestore import FakeFirestore
+from src.repositories.store_repository import StoreRepository
+from src.repositories.user_repository import UserRepository
+
+
+def test_should_round_trip_documents_through_store_repository():
+    client = FakeFirestore()
+    repo = StoreRepository(client)
+
+    store_id = repo.save(Store(name="스타벅스"))
+    repo.update(store_id, {"coupon_goal": 10})
+
+    found = repo.find_by_name("스타벅스")
+    assert found.id == store_id
+    assert found.coupon_goal == 10
+    assert repo.get_by_id("missing") is None
+    assert [s.name for s in repo.list_all()] == ["스타벅스"]
+
+
+def test_should_support_where_limit_and_set_merge():
+    client = FakeFirestore()
+    coll = client.collection("receipts")
+    coll.document("r1").set({"user_id": "u1", "meta": {"a": 1}, "participants": ["u2"]})
+    coll.document("r2").set({"user_id": "u1", "participants": []})
+    coll.document("r3").set({"user_id": "u2"})
+
+    coll.document("r1").set({"meta": {"b": 2}}, merge=True)
+
+    assert len(coll.where("user_id", "==", "u1").get()) == 2
+    assert len(list(coll.where("user_id", "==", "u1").limit(1).stream())) == 1
+    assert [d.id for d in coll.where("participants", "array-contains", "u2").get()] == ["r1"]
+    assert coll.document("r1").get().to_dict()["meta"] == {"a": 1, "b": 2}
+
+
+def test_should_batch_read_users_with_get_all():
+    client = FakeFirestore()
+    users = client.collection("users")
+    users.document("u1").set(User(name="홍길동", deposit=1000).to_dict())
+
+    found = UserRepository(client).get_many(["u1", "u2"])
+
+    assert list(found) == ["u1"]
+    assert client.rpc_counts["batch_get"] == 1
+
+
+def test_should_apply_batch_writes_atomically_on_commit():
+    client = FakeFirestore()
+    batch = client.batch()
+    batch.set(client.collection("users").document("u1"), {"name": "A"})
+    batch.set(client.collection("users").document("u2"), {"name": "B"})
+
+    assert client.collection("users").get() == []
+    batch.commit()
+    assert len(client.collection("users").get()) == 2
+
+
+def test_should_inject_latency_and_jitter_per_call():
+    delays = []
+    client = FakeFirestore(latency=0.05, jitter=0.01, seed=1, sleep=delays.append)
+
+    client.collection("stores").document("s1").get()
+    client.collection("stores").get()
+
+    assert len(delays) == 2
+    assert all(0.05 <= d <= 0.06 for d in delays)
+
+
+def test_should_inject_errors_at_configured_rate():
+    client = FakeFirestore(error_rate=1.0)
+
+    with pytest.raises(exceptions.ServiceUnavailable):
+        client.collection("stores").get()
+
+
+def test_should_retry_coupon_increment_on_contention_aborts():
+    # Abort roughly half of the commits; transactional retries until success
+    client = FakeFirestore(contention_rate=0.5, seed=3)
+    repo = CouponRepository(client)
+
+    counts = [repo.increment("u1", "s1", goal=10) for _ in range(3)]
+
+    assert counts == [1, 2, 3]
+    assert client.rpc_counts["begin_transaction"] > 3
+
+
+def test_should_give_up_after_max_attempts_under_constant_contention():
+    client = FakeFirestore(contention_rate=1.0)
+    repo = CouponRepository(client)
+
+    with pytest.raises(ValueError):
+        repo.increment("u1", "s1")
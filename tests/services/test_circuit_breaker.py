@@ -0,0 +1,92 @@
+from unittest.mock import Mock
+
+from google.api_core import exceptions
+
+from src.services.circuit_breaker import CircuitBreaker, breaker_stats, get_breaker
+from src.services.ocr_service import OCRService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(clock):
+    return CircuitBreaker("test", failure_rate=0.5, window=4, min_calls=4, reset_timeout=10, clock=clock)
+
+
+def test_should_open_when_failure_rate_reached_over_window():
+    breaker = _breaker(FakeClock())
+
+    for _ in range(2):
+        breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert breaker.allow() is False
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_should_not_open_before_min_calls():
+    breaker = _breaker(FakeClock())
+
+    for _ in range(3):
+        breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+
+def test_should_allow_one_trial_when_half_open_and_close_on_success():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.state == "half_open"
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.allow() is True
+
+
+def test_should_reopen_when_half_open_trial_fails():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.allow() is True
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert breaker.stats()["times_opened"] == 2
+
+
+def test_should_share_breakers_per_dependency():
+    assert get_breaker("llm") is get_breaker("llm")
+    assert set(breaker_stats()) == {"llm"}
+
+
+def test_should_skip_vision_while_ocr_breaker_is_open():
+    # Given: a breaker that opens after one failure
+    breaker = CircuitBreaker("ocr", min_calls=1, reset_timeout=60)
+    client = Mock()
+    client.text_detection.side_effect = exceptions.ServiceUnavailable("down")
+    ocr_service = OCRService(client=client, retry=None, breaker=breaker)
+
+    # When: the first call fails and the second arrives
+    assert ocr_service.extract_text_from_image(b"img") == ""
+    assert ocr_service.extract_text_from_image(b"img") == ""
+
+    # Then: Vision was called once and the second call was rejected
+    assert client.text_detection.call_count == 1
+    assert breaker.stats()["rejected"] == 1
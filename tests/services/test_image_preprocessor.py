@@ -0,0 +1,126 @@
+import io
+import struct
+import zlib
+
+import pytest
+from unittest.mock import Mock
+from src.services.image_preprocessor import ImagePreprocessor, map_file, preprocess_image
+from src.services.ocr_service import OCRService
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _photo(width=2400, height=1800, orientation=None) -> bytes:
+    # Noisy content so the "photo" compresses like a real one
+    image = Image.effect_noise((width, height), 64).convert("RGB")
+    out = io.BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(out, format="JPEG", quality=95, exif=exif)
+    return out.getvalue()
+
+
+def test_should_downscale_grayscale_and_shrink_photo():
+    original = _photo()
+
+    processed = preprocess_image(original, max_side=1024)
+
+    assert len(processed) < len(original)
+    with Image.open(io.BytesIO(processed)) as image:
+        assert image.mode == "L"
+        assert max(image.size) == 1024
+
+
+def test_should_apply_exif_orientation():
+    # Orientation 6: stored landscape, displayed rotated 90° (portrait)
+    processed = preprocess_image(_photo(1200, 900, orientation=6), max_side=1024)
+
+    with Image.open(io.BytesIO(processed)) as image:
+        width, height = image.size
+    assert height > width
+
+
+def test_should_pass_through_non_images():
+    assert preprocess_image(b"%PDF-1.7 not an image") == b"%PDF-1.7 not an image"
+
+
+def _bomb_png(side=20000) -> bytes:
+    # PNG header claiming side x side pixels; Pillow rejects it on open
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    header = struct.pack(">IIBBBBB", side, side, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(b"")) + chunk(b"IEND", b"")
+
+
+def test_should_pass_through_decompression_bombs():
+    bomb = _bomb_png()
+    preprocessor = ImagePreprocessor(max_workers=1, max_side=1024)
+    try:
+        processed = preprocessor.preprocess_many([bomb, _photo(2000, 1500)])
+    finally:
+        preprocessor.shutdown()
+
+    assert preprocess_image(bomb) == bomb
+    assert processed[0] == bomb
+    with Image.open(io.BytesIO(processed[1])) as image:
+        assert max(image.size) == 1024
+
+
+def test_should_preprocess_in_process_pool():
+    preprocessor = ImagePreprocessor(max_workers=1, max_side=1024)
+    try:
+        processed = preprocessor.preprocess_many([_photo(2000, 1500), b"raw"])
+        # Never fork the threaded web process
+        assert preprocessor._pool()._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        preprocessor.shutdown()
+
+    with Image.open(io.BytesIO(processed[0])) as image:
+        assert max(image.size) == 1024
+    assert processed[1] == b"raw"
+
+
+def test_should_send_mapped_files_to_workers_by_path(tmp_path, monkeypatch):
+    photo, raw = tmp_path / "photo.jpg", tmp_path / "raw.bin"
+    photo.write_bytes(_photo(2000, 1500))
+    raw.write_bytes(b"raw")
+    preprocessor = ImagePreprocessor(max_workers=1, max_side=1024)
+    try:
+        with map_file(str(photo)) as photo_buffer, map_file(str(raw)) as raw_buffer:
+            # Workers get the path and map the file themselves, no pickled bytes
+            pool, submitted = preprocessor._pool(), []
+            submit = pool.submit
+            monkeypatch.setattr(pool, "submit", lambda fn, *args: submitted.append(args[0]) or submit(fn, *args))
+            processed = preprocessor.preprocess_many([photo_buffer, raw_buffer])
+
+            # Unchanged images come back as the caller's own buffer
+            assert processed[1] is raw_buffer
+    finally:
+        preprocessor.shutdown()
+
+    assert submitted == [str(photo), str(raw)]
+    with Image.open(io.BytesIO(processed[0])) as image:
+        assert max(image.size) == 1024
+
+def test_should_send_preprocessed_bytes_to_vision():
+    client = Mock()
+    client.text_detection.return_value = Mock(text_annotations=[])
+    preprocessor = Mock()
+    preprocessor.preprocess.return_value = b"small"
+    ocr_service = OCRService(client=client, preprocessor=preprocessor)
+
+    ocr_service.extract_text_from_image(b"large-original")
+
+    preprocessor.preprocess.assert_called_once_with(b"large-original")
+    image = client.text_detection.call_args.kwargs["image"]
+    assert image.content == b"small"
+
+
+def test_should_be_disabled_by_environment(monkeypatch):
+    monkeypatch.setenv("OCR_PREPROCESS", "0")
+    assert ImagePreprocessor.from_env() is None
+
+    monkeypatch.setenv("OCR_PREPROCESS", "1")
+    monkeypatch.setenv("OCR_PREPROCESS_MAX_SIDE", "1600")
+    assert ImagePreprocessor.from_env().max_side == 1600
@@ -0,0 +1,69 @@
+import time
+from unittest.mock import Mock, patch
+
+from src.services.llm_cache import LLMParseCache, normalize_ocr_text, parse_cache_key
+from src.services.llm_receipt_parser import LLMReceiptParser
+
+RESULT = {"store": "이마트 구로점", "date": None, "items": [{"name": "사과", "price": 2000, "quantity": 1}]}
+
+
+def _response(content='{"store": "이마트 구로점", "date": null, "items": []}'):
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = content
+    return response
+
+
+def test_should_key_on_normalized_text_model_and_prompt_version():
+    key = parse_cache_key("이마트  구로점\n\n  사과 2,000원 ", "gpt-4o-mini", "1")
+
+    assert normalize_ocr_text("이마트  구로점\n\n  사과 2,000원 ") == "이마트 구로점\n사과 2,000원"
+    assert key == parse_cache_key("이마트 구로점\n사과 2,000원", "gpt-4o-mini", "1")
+    assert key != parse_cache_key("이마트 구로점\n사과 2,000원", "gpt-4o", "1")
+    assert key != parse_cache_key("이마트 구로점\n사과 2,000원", "gpt-4o-mini", "2")
+
+
+def test_should_expire_entries_after_ttl(tmp_path):
+    cache = LLMParseCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=60)
+    cache.put("k", RESULT)
+
+    with patch("src.services.llm_cache.time.time", return_value=time.time() + 120):
+        assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_should_evict_least_recently_used_over_size_limit():
+    cache = LLMParseCache(max_bytes=300)
+    cache.put("old", RESULT)
+    cache.put("new", RESULT)
+    cache.put("newest", RESULT)
+
+    assert cache.get("old") is None
+    assert cache.get("newest") == RESULT
+    assert cache.stats()["evictions"] >= 1
+
+
+@patch('openai.OpenAI')
+def test_should_share_parses_across_parser_instances(mock_openai_client, tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    mock_openai_client.return_value.chat.completions.create.return_value = _response()
+    LLMReceiptParser(api_key="test-key", cache=LLMParseCache(path)).parse_receipt("이마트 구로점")
+
+    other = LLMReceiptParser(api_key="test-key", cache=LLMParseCache(path))
+    result = other.parse_receipt("  이마트 구로점  ")
+
+    assert result["store"] == "이마트 구로점"
+    assert mock_openai_client.return_value.chat.completions.create.call_count == 1
+
+
+@patch('openai.OpenAI')
+def test_should_not_cache_failed_parses(mock_openai_client):
+    create = mock_openai_client.return_value.chat.completions.create
+    create.side_effect = [Exception("API Error"), _response("not json"), _response()]
+    parser = LLMReceiptParser(api_key="test-key", cache=LLMParseCache())
+
+    assert parser.parse_receipt("text")["store"] is None
+    assert parser.parse_receipt("text")["store"] is None
+    assert parser.parse_receipt("text")["store"] == "이마트 구로점"
+    assert parser.parse_receipt("text")["store"] == "이마트 구로점"
+    assert create.call_count == 3
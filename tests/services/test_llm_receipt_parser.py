@@ -1,6 +1,13 @@
+import json
+import threading
+
 import pytest
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
 from unittest.mock import Mock, patch
-from src.services.llm_receipt_parser import LLMReceiptParser
+from src.services.circuit_breaker import CircuitBreaker
+from src.services.llm_receipt_parser import (
+    TRANSIENT_RETRIES, LLMReceiptParser, merge_overlapping_items, split_line_chunks, validate_parse_result,
+)
 
 
 @pytest.fixture
@@ -21,7 +28,7 @@ def mock_openai_response():
     return mock_response
 
 
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_should_parse_items_with_llm_for_korean_receipt(mock_openai_client, mock_openai_response):
     # Given
     korean_ocr_text = """
@@ -74,7 +81,7 @@ def test_should_parse_items_with_llm_for_korean_receipt(mock_openai_client, mock
     assert items[3]["price"] == 3000
 
 
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_should_ignore_meta_lines_with_llm(mock_openai_client, mock_openai_response):
     # Given
     korean_ocr_text = """
@@ -112,7 +119,7 @@ def test_should_ignore_meta_lines_with_llm(mock_openai_client, mock_openai_respo
     assert "현금결제" not in " ".join(item_names)
 
 
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_should_return_valid_json_schema_from_llm(mock_openai_client):
     # Given
     valid_json_response = Mock()
@@ -152,7 +159,7 @@ def test_should_return_valid_json_schema_from_llm(mock_openai_client):
         assert isinstance(item["quantity"], int)
 
 
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_should_handle_empty_llm_response(mock_openai_client):
     # Given
     empty_response = Mock()
@@ -175,7 +182,7 @@ def test_should_handle_empty_llm_response(mock_openai_client):
     assert result["items"] == []
         
 
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_should_extract_store_and_date_with_llm(mock_openai_client):
     # Given
     response_with_metadata = Mock()
@@ -205,7 +212,7 @@ def test_should_extract_store_and_date_with_llm(mock_openai_client):
     assert date == "2024-09-08 18:45:22"
 
 
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_should_handle_api_errors_gracefully(mock_openai_client):
     # Given
     mock_client_instance = Mock()
@@ -223,7 +230,7 @@ def test_should_handle_api_errors_gracefully(mock_openai_client):
     assert result["items"] == []
 
 
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_should_handle_invalid_json_response(mock_openai_client):
     # Given  
     invalid_json_response = Mock()
@@ -243,4 +250,361 @@ def test_should_handle_invalid_json_response(mock_openai_client):
     # Then - Should fallback to empty result
     assert result["store"] is None
     assert result["date"] is None
-    assert result["items"] == []
\ No newline at end of file
+    assert result["items"] == []
+
+@patch('openai.OpenAI')
+def test_should_send_prefiltered_text_and_record_token_counts(mock_openai_client):
+    # Given
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = '{"store": "GS25 역삼점", "date": null, "items": []}'
+    response.usage.prompt_tokens = 120
+    create = mock_openai_client.return_value.chat.completions.create
+    create.return_value = response
+    parser = LLMReceiptParser(api_key="test-key", prefilter=True)
+    ocr_text = """GS25 역삼점
+    사업자번호: 123-45-67890
+    TEL: 02-555-1234
+    ------------------------
+    삼각김밥     1,200원
+    카드번호: 1234-****-****-5678
+    승인번호: 98765432
+    """
+
+    # When
+    parser.parse_receipt(ocr_text)
+
+    # Then - only store and item lines reach the API
+    sent = create.call_args.kwargs["messages"][1]["content"]
+    assert sent == "GS25 역삼점\n삼각김밥 1,200원"
+    stats = parser.token_stats()
+    assert stats["tokens_after"] < stats["tokens_before"]
+    assert stats["api_calls"] == 1
+    assert stats["prompt_tokens"] == 120
+
+
+@patch('openai.OpenAI')
+def test_should_send_text_unchanged_when_prefilter_disabled(mock_openai_client):
+    # Given
+    create = mock_openai_client.return_value.chat.completions.create
+    create.return_value.choices = [Mock()]
+    create.return_value.choices[0].message.content = '{"store": null, "date": null, "items": []}'
+    parser = LLMReceiptParser(api_key="test-key", prefilter=False)
+
+    # When
+    parser.parse_receipt("GS25\nTEL: 02-555-1234")
+
+    # Then
+    assert create.call_args.kwargs["messages"][1]["content"] == "GS25\nTEL: 02-555-1234"
+
+
+def _json_response(store):
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = json.dumps({"store": store, "date": None, "items": []})
+    return response
+
+
+@patch('openai.OpenAI')
+def test_should_parse_many_concurrently_in_input_order(mock_openai_client):
+    # Given - each call blocks until several are in flight at once
+    in_flight = threading.Barrier(3, timeout=5)
+
+    def create(**kwargs):
+        in_flight.wait()
+        return _json_response(kwargs["messages"][1]["content"])
+
+    mock_openai_client.return_value.chat.completions.create.side_effect = create
+    parser = LLMReceiptParser(api_key="test-key", prefilter=False)
+
+    # When
+    results = parser.parse_many(["매장 A", "매장 B", "매장 C", "매장 A"], max_workers=3)
+
+    # Then
+    assert [r.store_name for r in results] == ["매장 A", "매장 B", "매장 C", "매장 A"]
+    assert mock_openai_client.return_value.chat.completions.create.call_count == 3
+
+
+@patch('openai.OpenAI')
+def test_should_retry_rate_limited_calls_with_backoff(mock_openai_client):
+    # Given - two 429s, the second with Retry-After
+    throttled = RateLimitError("rate limited", response=Mock(status_code=429, headers={}), body=None)
+    throttled_with_hint = RateLimitError(
+        "rate limited", response=Mock(status_code=429, headers={"retry-after": "2"}), body=None
+    )
+    create = mock_openai_client.return_value.chat.completions.create
+    create.side_effect = [throttled, throttled_with_hint, _json_response("이마트")]
+    parser = LLMReceiptParser(api_key="test-key")
+    parser._sleep = Mock()
+
+    # When
+    result = parser.parse_receipt("이마트")
+
+    # Then
+    assert result["store"] == "이마트"
+    assert create.call_count == 3
+    assert parser._sleep.call_count == 2
+    assert parser._sleep.call_args_list[1].args[0] >= 2
+    assert parser.token_stats()["rate_limited"] == 2
+
+
+
+@patch('openai.OpenAI')
+def test_should_retry_transient_errors_with_backoff(mock_openai_client):
+    # Given - a timeout and a 503 before the answer
+    unavailable = InternalServerError("unavailable", response=Mock(status_code=503, headers={}), body=None)
+    create = mock_openai_client.return_value.chat.completions.create
+    create.side_effect = [APITimeoutError(request=Mock()), unavailable, _json_response("이마트")]
+    parser = LLMReceiptParser(api_key="test-key", breaker=CircuitBreaker("test-llm"))
+    parser._sleep = Mock()
+
+    # When
+    result = parser.parse_receipt("이마트")
+
+    # Then
+    assert result["store"] == "이마트"
+    assert create.call_count == 3
+    assert parser._sleep.call_count == 2
+    assert parser.token_stats()["transient_retries"] == 2
+
+
+@patch('openai.OpenAI')
+def test_should_stop_retrying_transient_errors_after_limit_or_open_breaker(mock_openai_client):
+    # Given - the API keeps failing to connect
+    create = mock_openai_client.return_value.chat.completions.create
+    create.side_effect = APIConnectionError(request=Mock())
+    parser = LLMReceiptParser(api_key="test-key", breaker=CircuitBreaker("test-llm"))
+    parser._sleep = Mock()
+
+    # When / Then
+    with pytest.raises(APIConnectionError):
+        parser._call_with_retry("이마트")
+    assert create.call_count == 1 + TRANSIENT_RETRIES
+
+    # Given - another caller tripped the breaker while this one waited
+    create.reset_mock()
+    parser.breaker = Mock(allow=Mock(return_value=True), is_open=True)
+
+    # When / Then - no retry
+    with pytest.raises(APIConnectionError):
+        parser._call_with_retry("이마트")
+    assert create.call_count == 1
+
+def _content_response(content):
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = content
+    return response
+
+
+@patch('openai.OpenAI')
+def test_should_parse_several_receipts_in_one_batch_request(mock_openai_client):
+    # Given - the model answers out of order but numbers each receipt
+    create = mock_openai_client.return_value.chat.completions.create
+    create.return_value = _content_response(json.dumps([
+        {"receipt": 2, "store": "GS25", "date": None, "items": []},
+        {"receipt": 1, "store": "이마트", "date": None, "items": [{"name": "사과", "price": 2000, "quantity": 1}]},
+    ]))
+    parser = LLMReceiptParser(api_key="test-key", prefilter=False)
+
+    # When
+    results = parser.parse_batch(["이마트\n사과 2,000원", "GS25"])
+
+    # Then
+    assert [r.store_name for r in results] == ["이마트", "GS25"]
+    assert results[0].items[0]["price"] == 2000
+    create.assert_called_once()
+    user_content = create.call_args.kwargs["messages"][1]["content"]
+    assert "### Receipt 1 ###\n이마트\n사과 2,000원" in user_content
+    assert "### Receipt 2 ###\nGS25" in user_content
+    assert create.call_args.kwargs["max_tokens"] == 1000
+
+
+@patch('openai.OpenAI')
+def test_should_fall_back_to_individual_calls_on_malformed_batch(mock_openai_client):
+    # Given - the batch answer has one object for two receipts
+    create = mock_openai_client.return_value.chat.completions.create
+    create.side_effect = [
+        _content_response('[{"store": "이마트", "date": null, "items": []}]'),
+        _content_response('{"store": "이마트", "date": null, "items": []}'),
+        _content_response('{"store": "GS25", "date": null, "items": []}'),
+    ]
+    parser = LLMReceiptParser(api_key="test-key", prefilter=False)
+
+    # When
+    results = parser.parse_batch(["이마트", "GS25"])
+
+    # Then
+    assert [r.store_name for r in results] == ["이마트", "GS25"]
+    assert create.call_count == 3
+    assert parser.token_stats()["batch_fallbacks"] == 1
+
+
+@patch('openai.OpenAI')
+def test_should_batch_bulk_parses_by_configured_size(mock_openai_client):
+    # Given
+    def create(**kwargs):
+        content = kwargs["messages"][1]["content"]
+        if "### Receipt" not in content:
+            return _content_response(json.dumps({"store": content, "date": None, "items": []}))
+        receipts = content.split("### Receipt ")[1:]
+        return _content_response(json.dumps([
+            {"store": receipt.split("###\n")[1].strip(), "date": None, "items": []} for receipt in receipts
+        ]))
+
+    mock_openai_client.return_value.chat.completions.create.side_effect = create
+    parser = LLMReceiptParser(api_key="test-key", prefilter=False)
+    texts = [f"매장 {n}" for n in range(5)]
+
+    # When
+    results = parser.parse_many(texts, batch_size=2)
+
+    # Then - 3 requests (2 + 2 + 1), results still in input order
+    assert [r.store_name for r in results] == texts
+    assert mock_openai_client.return_value.chat.completions.create.call_count == 3
+
+
+def test_should_split_lines_into_overlapping_chunks():
+    lines = [str(n) for n in range(10)]
+
+    chunks = split_line_chunks(lines, size=4, overlap=1)
+
+    assert chunks == [["0", "1", "2", "3"], ["3", "4", "5", "6"], ["6", "7", "8", "9"]]
+
+
+def test_should_drop_items_read_twice_from_the_overlap_only():
+    coffee = {"name": "아메리카노", "price": 4500, "quantity": 1}
+    latte = {"name": "라떼", "price": 5000, "quantity": 1}
+    cake = {"name": "케이크", "price": 6000, "quantity": 1}
+
+    merged = merge_overlapping_items([coffee, coffee, latte], [latte, cake, coffee], overlap=2)
+
+    assert merged == [coffee, coffee, latte, cake, coffee]
+
+
+@patch.dict('os.environ', {"LLM_CHUNK_LINES": "4", "LLM_CHUNK_OVERLAP": "1"})
+@patch('openai.OpenAI')
+def test_should_parse_long_receipt_in_chunks_and_merge(mock_openai_client):
+    # Given - header chunk has the store/date; the overlap line is read twice
+    lines = ["이마트 구로점", "일시: 2024-01-15 14:30:22"] + [f"상품{n} {n},000원" for n in range(1, 6)]
+
+    def create(**kwargs):
+        chunk = kwargs["messages"][1]["content"].splitlines()
+        items = [
+            {"name": line.split()[0], "price": int(line.split()[1].replace(",", "").rstrip("원")), "quantity": 1}
+            for line in chunk if line.startswith("상품")
+        ]
+        store = "이마트 구로점" if chunk[0] == "이마트 구로점" else None
+        date = "2024-01-15 14:30:22" if store else None
+        return _content_response(json.dumps({"store": store, "date": date, "items": items}))
+
+    create_mock = mock_openai_client.return_value.chat.completions.create
+    create_mock.side_effect = create
+    parser = LLMReceiptParser(api_key="test-key", prefilter=False)
+
+    # When
+    result = parser.parse_receipt("\n".join(lines))
+
+    # Then
+    assert result["store"] == "이마트 구로점"
+    assert result["date"] == "2024-01-15 14:30:22"
+    assert [item["name"] for item in result["items"]] == ["상품1", "상품2", "상품3", "상품4", "상품5"]
+    assert create_mock.call_count == 2
+    assert all(call.kwargs["max_tokens"] == 500 for call in create_mock.call_args_list)
+
+
+@patch.dict('os.environ', {"LLM_CHUNK_LINES": "2", "LLM_CHUNK_OVERLAP": "0"})
+@patch('openai.OpenAI')
+def test_should_not_return_partial_items_when_a_chunk_fails(mock_openai_client):
+    # Given
+    create = mock_openai_client.return_value.chat.completions.create
+    create.side_effect = [_content_response('{"store": "이마트", "date": null, "items": []}'), Exception("timeout")]
+    parser = LLMReceiptParser(api_key="test-key", prefilter=False)
+
+    # When
+    result = parser.parse_receipt("이마트\n사과 2,000원\n배 3,000원")
+
+    # Then
+    assert result == {"store": None, "date": None, "items": []}
+
+
+def test_should_validate_shape_prices_and_total():
+    good = {"store": "이마트", "items": [{"name": "사과", "price": 2000, "quantity": 2}]}
+
+    assert validate_parse_result(good, totals=(4000,)) == []
+    assert validate_parse_result(good, totals=(9000,)) == ["item sum 4000 does not match total 9000"]
+    assert validate_parse_result({"items": [{"name": "사과", "price": "2,000"}]}) == ["bad price for 사과"]
+    assert validate_parse_result({"items": []}) == ["no items"]
+    assert validate_parse_result(["not", "a", "dict"]) == ["not an object"]
+
+
+@patch('openai.OpenAI')
+def test_should_escalate_to_stronger_model_only_on_validation_failure(mock_openai_client):
+    # Given - the cheap model misses an item, so its sum disagrees with 총계
+    answers = {
+        "gpt-4o-mini": {"store": "이마트", "date": None, "items": [{"name": "사과", "price": 2000, "quantity": 1}]},
+        "gpt-4o": {"store": "이마트", "date": None, "items": [
+            {"name": "사과", "price": 2000, "quantity": 1}, {"name": "배", "price": 3000, "quantity": 1},
+        ]},
+    }
+    create = mock_openai_client.return_value.chat.completions.create
+    create.side_effect = lambda **kwargs: _content_response(json.dumps(answers[kwargs["model"]]))
+    parser = LLMReceiptParser(api_key="test-key", escalation_models=["gpt-4o"])
+
+    # When
+    hard = parser.parse("이마트\n사과 2,000원\n배 3,000원\n총계: 5,000원")
+    easy = parser.parse("이마트\n사과 2,000원\n총계: 2,000원")
+
+    # Then
+    assert hard.model == "gpt-4o"
+    assert len(hard.items) == 2
+    assert easy.model == "gpt-4o-mini"
+    assert [call.kwargs["model"] for call in create.call_args_list] == ["gpt-4o-mini", "gpt-4o", "gpt-4o-mini"]
+    assert parser.tier_stats() == {"gpt-4o-mini": 1, "gpt-4o": 1}
+
+
+@patch('openai.OpenAI')
+def test_should_record_single_model_without_escalation(mock_openai_client):
+    # Given
+    create = mock_openai_client.return_value.chat.completions.create
+    create.return_value = _content_response('{"store": "이마트", "date": null, "items": []}')
+    parser = LLMReceiptParser(api_key="test-key", escalation_models=[])
+
+    # When
+    result = parser.parse("이마트")
+
+    # Then
+    assert result.model == "gpt-4o-mini"
+    create.assert_called_once()
+
+
+@patch('openai.OpenAI')
+def test_should_stop_calling_api_while_llm_breaker_is_open(mock_openai_client):
+    # Given - a breaker that opens after two connection failures
+    create = mock_openai_client.return_value.chat.completions.create
+    create.side_effect = APIConnectionError(request=Mock())
+    breaker = CircuitBreaker("llm", min_calls=2, reset_timeout=60)
+    parser = LLMReceiptParser(api_key="test-key", breaker=breaker)
+    parser._sleep = Mock()
+
+    # When
+    results = [parser.parse_receipt(f"매장 {n}") for n in range(4)]
+
+    # Then - the last two fail fast without reaching the API
+    assert all(not result.get("items") for result in results)
+    assert create.call_count == 2 * (1 + TRANSIENT_RETRIES)
+    assert breaker.stats()["state"] == "open"
+    assert breaker.stats()["rejected"] == 2
+
+
+@patch('openai.OpenAI')
+def test_should_build_client_with_configured_timeout_and_no_sdk_retries(mock_openai_client, monkeypatch):
+    # Given
+    monkeypatch.setenv("LLM_TIMEOUT_SECONDS", "3.5")
+
+    # When
+    LLMReceiptParser(api_key="test-key")
+
+    # Then
+    assert mock_openai_client.call_args.kwargs["timeout"] == 3.5
+    assert mock_openai_client.call_args.kwargs["max_retries"] == 0
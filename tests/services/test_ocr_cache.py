@@ -0,0 +1,100 @@
+from unittest.mock import Mock
+from src.services.ocr_cache import OCRResultCache, content_key
+from src.services.ocr_service import OCRService
+
+
+def _vision_client(text="이마트\n사과 2,000원"):
+    annotation = Mock()
+    annotation.description = text
+    client = Mock()
+    client.text_detection.return_value = Mock(text_annotations=[annotation])
+    return client
+
+
+def test_should_return_cached_text_for_duplicate_upload(tmp_path):
+    cache = OCRResultCache(str(tmp_path / "ocr.sqlite3"))
+    client = _vision_client()
+    ocr_service = OCRService(client=client, cache=cache)
+
+    first = ocr_service.extract_text_from_image(b"same-receipt")
+    second = ocr_service.extract_text_from_image(b"same-receipt")
+
+    assert first == second == "이마트\n사과 2,000원"
+    client.text_detection.assert_called_once()
+    stats = ocr_service.cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_should_persist_results_across_instances(tmp_path):
+    path = str(tmp_path / "ocr.sqlite3")
+    OCRService(client=_vision_client(), cache=OCRResultCache(path)).extract_text_from_image(b"img")
+
+    client = _vision_client()
+    text = OCRService(client=client, cache=OCRResultCache(path)).extract_text_from_image(b"img")
+
+    assert text == "이마트\n사과 2,000원"
+    client.text_detection.assert_not_called()
+
+
+
+def test_should_not_share_cached_text_between_layout_modes(tmp_path):
+    cache = OCRResultCache(str(tmp_path / "ocr.sqlite3"))
+    OCRService(client=_vision_client(), cache=cache, layout=False).extract_text_from_image(b"img")
+
+    client = _vision_client()
+    OCRService(client=client, cache=cache, layout=True).extract_text_from_image(b"img")
+
+    client.text_detection.assert_called_once()
+
+def test_should_not_cache_failed_ocr(tmp_path):
+    cache = OCRResultCache(str(tmp_path / "ocr.sqlite3"))
+    client = Mock()
+    client.text_detection.return_value = Mock(text_annotations=[])
+
+    OCRService(client=client, cache=cache).extract_text_from_image(b"blurry")
+
+    assert cache.get(content_key(b"blurry", "vision")) is None
+
+
+def test_should_evict_least_recently_used_entries_beyond_size_limit(tmp_path):
+    cache = OCRResultCache(str(tmp_path / "ocr.sqlite3"), max_bytes=10)
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    cache.get("a")  # touch a so b becomes the oldest
+    cache.put("c", "12345")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "12345"
+    assert cache.get("c") == "12345"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 10
+
+
+def test_should_only_send_uncached_images_in_batch(tmp_path):
+    cache = OCRResultCache(str(tmp_path / "ocr.sqlite3"))
+    cache.put(content_key(b"known", "vision"), "캐시된 영수증")
+    annotation = Mock()
+    annotation.description = "새 영수증"
+    client = Mock()
+    client.batch_annotate_images.return_value = Mock(
+        responses=[Mock(error=Mock(message=""), text_annotations=[annotation])]
+    )
+    ocr_service = OCRService(client=client, cache=cache)
+
+    results = ocr_service.extract_text_batch([b"known", b"new"])
+
+    assert [r.text for r in results] == ["캐시된 영수증", "새 영수증"]
+    assert len(client.batch_annotate_images.call_args.kwargs["requests"]) == 1
+    assert cache.get(content_key(b"new", "vision")) == "새 영수증"
+
+
+def test_should_build_cache_from_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv("OCR_CACHE_PATH", raising=False)
+    assert OCRResultCache.from_env() is None
+
+    monkeypatch.setenv("OCR_CACHE_PATH", str(tmp_path / "cache" / "ocr.sqlite3"))
+    monkeypatch.setenv("OCR_CACHE_MAX_MB", "1")
+    cache = OCRResultCache.from_env()
+    assert cache.max_bytes == 1024 * 1024
@@ -1,9 +1,17 @@
 import pytest
 from unittest.mock import Mock, patch
-from src.services.ocr_service import OCRService
+from src.services.ocr_service import OCRService, reset_vision_client
 from unittest.mock import patch, Mock, mock_open
 
 
+@pytest.fixture(autouse=True)
+def fresh_vision_client():
+    # The Vision client is shared process-wide; isolate tests from each other
+    reset_vision_client()
+    yield
+    reset_vision_client()
+
+
 def test_should_extract_text_from_receipt_image():
     # Given: mock Vision API client
     ocr_service = OCRService()
@@ -128,3 +136,95 @@ def test_should_parse_date_from_ocr_text():
     
     # Then
     assert date == "2024-01-15 14:30:22"
+
+
+def test_should_reuse_one_vision_client_across_calls_and_instances():
+    fake_annotation = Mock()
+    fake_annotation.description = "이마트"
+
+    class FakeResponse:
+        text_annotations = [fake_annotation]
+
+    with patch("google.cloud.vision.ImageAnnotatorClient") as mock_client_cls:
+        mock_client_cls.return_value.text_detection.return_value = FakeResponse()
+
+        first = OCRService().extract_text_from_image(b"one")
+        second = OCRService().extract_text_from_image(b"two")
+
+    assert first == second == "이마트"
+    mock_client_cls.assert_called_once()
+    assert mock_client_cls.return_value.text_detection.call_count == 2
+
+
+def test_should_pass_configured_timeout_and_retry_to_vision():
+    client = Mock()
+    client.text_detection.return_value = Mock(text_annotations=[])
+    retry = Mock()
+    ocr_service = OCRService(client=client, timeout=3.5, retry=retry)
+
+    assert ocr_service.extract_text_from_image(b"bytes") == ""
+
+    _, kwargs = client.text_detection.call_args
+    assert kwargs["timeout"] == 3.5
+    assert kwargs["retry"] is retry
+
+
+def test_should_read_timeout_from_environment():
+    with patch.dict("os.environ", {"OCR_TIMEOUT_SECONDS": "4"}):
+        assert OCRService(client=Mock()).timeout == 4.0
+
+
+def test_should_return_empty_text_when_vision_call_fails():
+    from google.api_core import exceptions
+
+    client = Mock()
+    client.text_detection.side_effect = exceptions.ServiceUnavailable("down")
+
+    assert OCRService(client=client).extract_text_from_image(b"bytes") == ""
+
+
+def _text_response(description):
+    annotation = Mock()
+    annotation.description = description
+    return Mock(error=Mock(message=""), text_annotations=[annotation])
+
+
+def test_should_extract_text_batch_in_input_order_with_per_image_errors():
+    client = Mock()
+    failed = Mock(error=Mock(message="Bad image data"), text_annotations=[])
+    client.batch_annotate_images.return_value = Mock(
+        responses=[_text_response("이마트"), failed, _text_response("스타벅스")]
+    )
+    ocr_service = OCRService(client=client)
+
+    results = ocr_service.extract_text_batch([b"a", b"b", b"c"])
+
+    client.batch_annotate_images.assert_called_once()
+    assert [r.text for r in results] == ["이마트", "", "스타벅스"]
+    assert [r.error for r in results] == [None, "Bad image data", None]
+
+
+def test_should_split_batches_at_vision_request_limit():
+    client = Mock()
+    client.batch_annotate_images.side_effect = lambda requests, **kwargs: Mock(
+        responses=[_text_response("영수증") for _ in requests]
+    )
+    ocr_service = OCRService(client=client)
+
+    results = ocr_service.extract_text_batch([b"img"] * 20)
+
+    assert len(results) == 20
+    sizes = [len(c.kwargs["requests"]) for c in client.batch_annotate_images.call_args_list]
+    assert sizes == [16, 4]
+
+
+def test_should_mark_every_image_failed_when_batch_rpc_fails():
+    from google.api_core import exceptions
+
+    client = Mock()
+    client.batch_annotate_images.side_effect = exceptions.ServiceUnavailable("down")
+
+    results = OCRService(client=client).extract_text_batch([b"a", b"b"])
+
+    assert [r.text for r in results] == ["", ""]
+    assert all("down" in r.error for r in results)
@@ -0,0 +1,54 @@
+import pytest
+
+from src.services.rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_should_allow_burst_up_to_capacity_then_wait_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(60, capacity=2, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(1.0)
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_should_cap_oversized_requests_at_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(600, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire(10_000) == 0
+
+
+def test_should_limit_requests_and_tokens_per_minute():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=100, tokens_per_minute=1000, clock=clock, sleep=clock.sleep)
+
+    limiter.acquire(tokens=1000)
+    waited = limiter.acquire(tokens=500)
+
+    # 500 tokens at 1000/minute take 30 seconds to refill
+    assert waited == pytest.approx(30.0)
+
+
+def test_should_build_limiter_only_when_configured(monkeypatch):
+    monkeypatch.delenv("LLM_RPM", raising=False)
+    monkeypatch.delenv("LLM_TPM", raising=False)
+    assert RateLimiter.from_env() is None
+
+    monkeypatch.setenv("LLM_RPM", "500")
+    limiter = RateLimiter.from_env()
+    assert limiter.requests is not None and limiter.tokens is None
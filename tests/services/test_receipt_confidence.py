@@ -0,0 +1,73 @@
+from unittest.mock import Mock
+
+from src.models.store import Store
+from src.services.receipt_confidence import KnownStores, score_receipt
+from src.services.receipt_parser_interface import ParsedReceiptDTO
+from src.services.receipt_scanner import scan_receipt_text
+
+TEXT = """
+GS25 역삼점
+일시: 2024-03-02 09:10:00
+삼각김밥 x2 2,400원
+생수 1,000원
+합계 3,400원
+"""
+
+
+def _dto(store_name="GS25 역삼점", date="2024-03-02 09:10:00", items=None):
+    if items is None:
+        items = [{"name": "삼각김밥", "price": 1200, "quantity": 2}, {"name": "생수", "price": 1000, "quantity": 1}]
+    return ParsedReceiptDTO(store_name=store_name, date=date, items=items)
+
+
+def test_should_record_total_lines_without_treating_them_as_items():
+    scan = scan_receipt_text(TEXT)
+
+    assert scan.totals == (3400,)
+    assert [item.name for item in scan.items] == ["삼각김밥", "생수"]
+
+
+def test_should_score_full_confidence_when_all_signals_agree():
+    assert score_receipt(_dto(), TEXT, known_stores={"GS25 역삼점"}) == 1.0
+
+
+def test_should_lower_score_for_unknown_store_and_total_mismatch():
+    items = [{"name": "생수", "price": 1000, "quantity": 1}]
+
+    assert score_receipt(_dto(items=items), TEXT, known_stores={"CU 강남점"}) == 0.5
+
+
+def test_should_score_zero_without_items_store_or_date():
+    assert score_receipt(_dto(store_name=None, date=None, items=[]), TEXT) == 0.0
+
+
+def test_should_reload_known_stores_after_ttl():
+    # Given
+    now = [0.0]
+    store_repo = Mock()
+    store_repo.list_all.return_value = [Store(name="이마트")]
+    known = KnownStores(store_repo, ttl=60, clock=lambda: now[0])
+
+    # When / Then - loaded once, reused within the TTL
+    assert "이마트" in known
+    store_repo.list_all.return_value = [Store(name="이마트"), Store(name="GS25")]
+    assert "GS25" not in known
+    assert store_repo.list_all.call_count == 1
+
+    now[0] = 61
+    assert "GS25" in known
+    assert store_repo.list_all.call_count == 2
+
+
+def test_should_keep_known_stores_when_reload_fails():
+    # Given - the first load fails, then one succeeds, then reloads fail
+    now = [0.0]
+    store_repo = Mock()
+    store_repo.list_all.side_effect = [RuntimeError("down"), [Store(name="이마트")], RuntimeError("down")]
+    known = KnownStores(store_repo, ttl=60, clock=lambda: now[0])
+
+    # Then - no list yet counts every store as known, like known_stores=None
+    assert "GS25" in known
+    assert "GS25" not in known
+    now[0] = 61
+    assert "이마트" in known and "GS25" not in known
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from src.services.ocr_service import OCRService
+from src.services.receipt_layout import WordBox, build_layout, group_rows, words_from_annotations
+
+
+def _word(text, x, y, width=40, height=20):
+    return WordBox(text, x, y, x + width, y + height)
+
+
+def _annotation(text, x, y, width=40, height=20):
+    vertices = [
+        SimpleNamespace(x=x, y=y), SimpleNamespace(x=x + width, y=y),
+        SimpleNamespace(x=x + width, y=y + height), SimpleNamespace(x=x, y=y + height),
+    ]
+    return SimpleNamespace(description=text, bounding_poly=SimpleNamespace(vertices=vertices))
+
+
+def test_should_group_words_into_rows_left_to_right():
+    words = [
+        _word("2,000원", 300, 52), _word("바나나", 10, 100),
+        _word("사과", 10, 50), _word("3,000원", 300, 98),
+    ]
+
+    rows = group_rows(words)
+
+    assert [[w.text for w in row] for row in rows] == [["사과", "2,000원"], ["바나나", "3,000원"]]
+
+
+def test_should_merge_words_vision_split_inside_a_token():
+    rows = group_rows([_word("우유", 10, 0), _word("1,500", 200, 0), _word("원", 242, 0, width=20)])
+
+    assert [w.text for w in rows[0]] == ["우유", "1,500원"]
+
+
+def test_should_keep_slightly_tilted_lines_together():
+    words = [_word("아메리카노", 10, 100, width=80), _word("2", 150, 104), _word("9,000", 300, 108)]
+
+    assert len(group_rows(words)) == 1
+
+
+def test_should_find_price_columns_and_render_rows():
+    words = [
+        _word("상품명", 10, 0, width=60), _word("수량", 150, 0), _word("단가", 220, 0), _word("금액", 300, 0),
+        _word("김밥", 10, 40), _word("2", 170, 40, width=20), _word("2,000", 220, 40), _word("4,000", 300, 40),
+        _word("라면", 10, 80), _word("1", 170, 80, width=20), _word("3,500", 220, 80), _word("3,500", 300, 80),
+    ]
+
+    layout = build_layout(words)
+
+    assert layout.price_columns == (190.0, 260.0, 340.0)
+    assert layout.lines() == ["상품명 수량 단가 금액", "김밥 2 2,000 4,000", "라면 1 3,500 3,500"]
+
+
+def test_should_ignore_annotations_without_geometry():
+    assert words_from_annotations([Mock(description="all"), Mock(description="word")]) == []
+
+
+def test_ocr_service_should_rebuild_text_from_word_boxes():
+    # Vision's reading order lists the name column before the price column
+    annotations = [
+        SimpleNamespace(description="GS25\n사과\n바나나\n2,000원\n3,000원"),
+        _annotation("GS25", 10, 0), _annotation("사과", 10, 50), _annotation("바나나", 10, 100),
+        _annotation("2,000원", 300, 50), _annotation("3,000원", 300, 100),
+    ]
+    client = Mock()
+    client.text_detection.return_value = Mock(text_annotations=annotations)
+    service = OCRService(client=client, layout=True)
+
+    result = service.extract_result_from_image(b"img")
+
+    assert result.text == "GS25\n사과 2,000원\n바나나 3,000원"
+    assert len(result.words) == 5
+    assert service.parse_items_and_prices(result.text) == [
+        {"name": "사과", "price": 2000}, {"name": "바나나", "price": 3000},
+    ]
+
+
+def test_ocr_service_should_keep_vision_text_when_layout_disabled():
+    annotations = [SimpleNamespace(description="GS25\n사과\n2,000원"), _annotation("GS25", 10, 0)]
+    client = Mock()
+    client.text_detection.return_value = Mock(text_annotations=annotations)
+
+    text = OCRService(client=client, layout=False).extract_text_from_image(b"img")
+
+    assert text == "GS25\n사과\n2,000원"
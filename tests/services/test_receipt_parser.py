@@ -259,4 +259,37 @@ def test_should_parse_items_with_llm_for_korean_receipt():
     assert total_from_items == 19500  # Sum of individual items before discount
     
     # Verify the parser interface was called correctly
-    mock_parser.parse.assert_called_once_with(korean_ocr_text)
\ No newline at end of file
+    mock_parser.parse.assert_called_once_with(korean_ocr_text)
+
+def test_should_parse_same_ocr_text_once():
+    # Given
+    mock_parser = Mock()
+    mock_parser.parse.return_value = ParsedReceiptDTO(
+        store_name="이마트 구로점", date=None, items=[{"name": "사과", "price": 2000, "quantity": 1}]
+    )
+    receipt_parser = ReceiptParser(parser=mock_parser)
+    user = User(name="홍길동", deposit=50000)
+
+    # When
+    first = receipt_parser.create_receipt_from_ocr_result(user, "ocr text")
+    second = receipt_parser.create_receipt_from_ocr_result(user, "ocr text")
+
+    # Then
+    assert first.store.name == second.store.name == "이마트 구로점"
+    mock_parser.parse.assert_called_once_with("ocr text")
+
+
+def test_should_record_which_parser_produced_items():
+    # Given
+    mock_parser = Mock()
+    mock_parser.parse.return_value = ParsedReceiptDTO(
+        store_name="이마트", date=None, items=[{"name": "사과", "price": 2000, "quantity": 1}], model="gpt-4o-mini"
+    )
+    receipt_parser = ReceiptParser(parser=mock_parser)
+
+    # When
+    receipt = receipt_parser.create_receipt_from_ocr_result(User(name="김철수", deposit=0), "이마트\n사과 2,000원")
+
+    # Then
+    assert receipt.parsed_by == "gpt-4o-mini"
+    assert receipt.to_firestore_dict()["ocr_text"] == "이마트\n사과 2,000원"
@@ -1,6 +1,13 @@
+import threading
+import time
+
 import pytest
 from unittest.mock import Mock, patch
-from src.services.receipt_parser_factory import ReceiptParserFactory, FallbackReceiptParser
+from src.models.store import Store
+from src.services.circuit_breaker import CircuitBreaker
+from src.services.receipt_parser_factory import (
+    ReceiptParserFactory, FallbackReceiptParser, CheapFirstReceiptParser, StoreTemplateReceiptParser,
+)
 from src.services.regex_receipt_parser import RegexReceiptParser
 from src.services.llm_receipt_parser import LLMReceiptParser
 from src.services.receipt_parser_interface import ParsedReceiptDTO
@@ -22,7 +29,7 @@ def test_should_create_regex_parser_by_default(mock_getenv):
 
 
 @patch('src.services.receipt_parser_factory.os.getenv')
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_should_create_llm_parser_when_enabled_and_key_available(mock_openai, mock_getenv):
     # Given - LLM is enabled and API key is available
     mock_getenv.side_effect = lambda key, default=None: {
@@ -36,8 +43,10 @@ def test_should_create_llm_parser_when_enabled_and_key_available(mock_openai, mo
     # When
     parser = ReceiptParserFactory.create_parser()
     
-    # Then
-    assert isinstance(parser, LLMReceiptParser)
+    # Then - LLM first, regex when it fails or its circuit is open
+    assert isinstance(parser, FallbackReceiptParser)
+    assert isinstance(parser.primary, LLMReceiptParser)
+    assert isinstance(parser.fallback, RegexReceiptParser)
 
 
 @patch('src.services.receipt_parser_factory.os.getenv')
@@ -55,7 +64,7 @@ def test_should_fallback_to_regex_when_llm_enabled_but_no_key(mock_getenv):
     assert isinstance(parser, RegexReceiptParser)
 
 
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_should_create_llm_parser_explicitly(mock_openai):
     # Given
     mock_client = Mock()
@@ -76,7 +85,7 @@ def test_should_create_regex_parser_explicitly():
     assert isinstance(parser, RegexReceiptParser)
 
 
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_should_create_fallback_parser(mock_openai):
     # Given
     mock_client = Mock()
@@ -94,7 +103,7 @@ def test_should_create_fallback_parser(mock_openai):
     assert parser.fallback == fallback
 
 
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_fallback_parser_should_use_fallback_on_empty_result(mock_openai):
     # Given
     mock_client = Mock()
@@ -127,7 +136,7 @@ def test_fallback_parser_should_use_fallback_on_empty_result(mock_openai):
     assert result.items[0]["name"] == "사과"
 
 
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_fallback_parser_should_use_fallback_on_exception(mock_openai):
     # Given
     mock_client = Mock()
@@ -156,7 +165,7 @@ def test_fallback_parser_should_use_fallback_on_exception(mock_openai):
     assert result.items[0]["name"] == "아메리카노"
 
 
-@patch('src.services.llm_receipt_parser.OpenAI')
+@patch('openai.OpenAI')
 def test_fallback_parser_should_use_primary_when_successful(mock_openai):
     # Given
     mock_client = Mock()
@@ -185,4 +194,392 @@ def test_fallback_parser_should_use_primary_when_successful(mock_openai):
     assert result.items[0]["name"] == "라떼"
     
     # Verify fallback was not called
-    fallback_mock.parse.assert_not_called()
\ No newline at end of file
+    fallback_mock.parse.assert_not_called()
+
+
+CONFIDENT_TEXT = """
+이마트 구로점
+일시: 2024-01-15 14:30:22
+사과 2,000원
+바나나 3,000원
+총계: 5,000원
+"""
+
+
+def test_cheap_first_parser_should_skip_llm_for_confident_receipt():
+    # Given - regex finds items matching the 총계 line, a known store and a date
+    expensive_mock = Mock()
+    parser = CheapFirstReceiptParser(
+        RegexReceiptParser(), expensive_mock, threshold=0.8, known_stores={"이마트 구로점"}
+    )
+
+    # When
+    result = parser.parse(CONFIDENT_TEXT)
+
+    # Then
+    assert result.confidence == 1.0
+    assert [item["name"] for item in result.items] == ["사과", "바나나"]
+    expensive_mock.parse.assert_not_called()
+    assert parser.stats() == {"cheap": 1, "escalated": 0, "circuit_open": 0}
+
+
+def test_cheap_first_parser_should_call_llm_below_threshold():
+    # Given - the item sum does not match the total (a discount line)
+    text = CONFIDENT_TEXT.replace("총계: 5,000원", "할인 -500원\n총계: 4,500원")
+    expensive_mock = Mock()
+    expensive_mock.parse.return_value = ParsedReceiptDTO(
+        store_name="이마트 구로점", date="2024-01-15 14:30:22",
+        items=[{"name": "사과", "price": 2000, "quantity": 1}, {"name": "바나나", "price": 2500, "quantity": 1}],
+    )
+    parser = ReceiptParserFactory.create_cheap_first_parser(
+        RegexReceiptParser(), expensive_mock, threshold=0.8, known_stores={"이마트 구로점"}
+    )
+
+    # When
+    result = parser.parse(text)
+
+    # Then - LLM result is used and scored
+    expensive_mock.parse.assert_called_once_with(text)
+    assert result.items[1]["price"] == 2500
+    assert result.confidence == 1.0
+    assert parser.stats() == {"cheap": 0, "escalated": 1, "circuit_open": 0}
+
+
+def test_cheap_first_parser_should_keep_cheap_result_when_llm_fails():
+    # Given
+    expensive_mock = Mock()
+    expensive_mock.parse.side_effect = Exception("API Error")
+    parser = CheapFirstReceiptParser(RegexReceiptParser(), expensive_mock, threshold=1.1)
+
+    # When
+    result = parser.parse(CONFIDENT_TEXT)
+
+    # Then
+    assert result.store_name == "이마트 구로점"
+    assert result.confidence == 1.0
+
+
+@patch('src.services.receipt_parser_factory.os.getenv')
+@patch('openai.OpenAI')
+def test_should_create_cheap_first_parser_when_mode_configured(mock_openai, mock_getenv):
+    # Given
+    mock_getenv.side_effect = lambda key, default=None: {
+        "LLM_PARSER_ENABLED": "true",
+        "OPENAI_API_KEY": "test-key",
+        "LLM_PARSER_MODE": "cheap_first",
+        "LLM_CONFIDENCE_THRESHOLD": "0.6",
+    }.get(key, default)
+
+    # When
+    parser = ReceiptParserFactory.create_parser()
+
+    # Then
+    assert isinstance(parser, CheapFirstReceiptParser)
+    assert isinstance(parser.cheap, RegexReceiptParser)
+    assert isinstance(parser.expensive, LLMReceiptParser)
+    assert parser.threshold == 0.6
+
+
+def test_hedged_parser_should_return_fallback_at_deadline_and_record_late_result():
+    # Given - the LLM parser blocks past the deadline
+    release = threading.Event()
+    llm_result = ParsedReceiptDTO(store_name="이마트 구로점", date=None, items=[])
+
+    def slow_parse(text):
+        release.wait(5)
+        return llm_result
+
+    primary_mock = Mock()
+    primary_mock.parse.side_effect = slow_parse
+    parser = FallbackReceiptParser(primary_mock, RegexReceiptParser(), deadline=0.05)
+
+    # When
+    started = time.monotonic()
+    result = parser.parse(CONFIDENT_TEXT)
+    elapsed = time.monotonic() - started
+
+    # Then - regex result returned without waiting for the LLM
+    assert elapsed < 1
+    assert [item["name"] for item in result.items] == ["사과", "바나나"]
+    assert parser.stats()["outcomes"] == {"deadline": 1}
+
+    release.set()
+    parser.shutdown()
+    assert parser.stats()["late_results"] == 1
+    assert parser.late_results[0]["primary_confidence"] < parser.late_results[0]["fallback_confidence"]
+
+
+def test_hedged_parser_should_prefer_llm_result_that_scores_higher():
+    # Given - regex misreads a discounted receipt, LLM answers in time
+    text = CONFIDENT_TEXT.replace("총계: 5,000원", "할인 -500원\n총계: 4,500원")
+    primary_mock = Mock()
+    primary_mock.parse.return_value = ParsedReceiptDTO(
+        store_name="이마트 구로점", date="2024-01-15 14:30:22",
+        items=[{"name": "사과", "price": 2000, "quantity": 1}, {"name": "바나나", "price": 2500, "quantity": 1}],
+    )
+    parser = ReceiptParserFactory.create_fallback_parser(primary_mock, RegexReceiptParser(), deadline=5)
+
+    # When
+    result = parser.parse(text)
+
+    # Then
+    assert result == primary_mock.parse.return_value
+    assert result.confidence == 1.0
+    assert parser.stats()["outcomes"] == {"primary": 1}
+    parser.shutdown()
+
+
+def test_hedged_parser_should_use_fallback_when_llm_fails():
+    # Given
+    primary_mock = Mock()
+    primary_mock.parse.side_effect = Exception("API Error")
+    parser = FallbackReceiptParser(primary_mock, RegexReceiptParser(), deadline=5)
+
+    # When
+    result = parser.parse(CONFIDENT_TEXT)
+
+    # Then
+    assert result.store_name == "이마트 구로점"
+    assert parser.stats()["outcomes"] == {"primary_error": 1}
+    parser.shutdown()
+
+
+def test_fallback_parser_should_parse_each_text_once_across_accessors():
+    # Given - primary has no date, so the date comes from the fallback
+    primary_mock = Mock()
+    primary_mock.parse.return_value = ParsedReceiptDTO(
+        store_name="카페베네", date=None, items=[{"name": "라떼", "price": 5000, "quantity": 1}]
+    )
+    fallback_mock = Mock()
+    fallback_mock.parse.return_value = ParsedReceiptDTO(store_name=None, date="2024-09-08 14:00:00", items=[])
+    parser = FallbackReceiptParser(primary_mock, fallback_mock)
+
+    # When
+    store_name = parser.parse_store_name("ocr text")
+    items = parser.parse_items_and_prices("ocr text")
+    date = parser.parse_date("ocr text")
+    result = parser.parse("ocr text")
+
+    # Then
+    assert (store_name, date) == ("카페베네", "2024-09-08 14:00:00")
+    assert items == result.items
+    primary_mock.parse.assert_called_once_with("ocr text")
+    fallback_mock.parse.assert_called_once_with("ocr text")
+    primary_mock.parse_store_name.assert_not_called()
+
+
+def test_fallback_parser_should_return_independent_item_lists():
+    # Given
+    primary_mock = Mock()
+    primary_mock.parse.return_value = ParsedReceiptDTO(
+        store_name="카페베네", date=None, items=[{"name": "라떼", "price": 5000, "quantity": 1}]
+    )
+    parser = FallbackReceiptParser(primary_mock, Mock())
+
+    # When - a caller edits its copy
+    parser.parse("ocr text").items[0]["quantity"] = 3
+
+    # Then
+    assert parser.parse("ocr text").items[0]["quantity"] == 1
+
+
+def test_fallback_parser_should_retry_primary_after_empty_result():
+    # Given - the first LLM call fails soft (empty), the second succeeds
+    primary_mock = Mock()
+    primary_mock.parse.side_effect = [
+        ParsedReceiptDTO(store_name=None, date=None, items=[]),
+        ParsedReceiptDTO(store_name="카페베네", date=None, items=[{"name": "라떼", "price": 5000, "quantity": 1}]),
+    ]
+    fallback_mock = Mock()
+    fallback_mock.parse.return_value = ParsedReceiptDTO(store_name=None, date=None, items=[])
+    parser = FallbackReceiptParser(primary_mock, fallback_mock)
+
+    # When
+    parser.parse("ocr text")
+    result = parser.parse("ocr text")
+
+    # Then
+    assert result.store_name == "카페베네"
+    assert primary_mock.parse.call_count == 2
+
+
+def test_hedged_parser_should_not_memoize_deadline_outcome():
+    # Given - the LLM misses the deadline on the first call only
+    release = threading.Event()
+    llm_result = ParsedReceiptDTO(
+        store_name="이마트 구로점", date="2024-01-15 14:30:22",
+        items=[{"name": "사과", "price": 2000, "quantity": 1}, {"name": "바나나", "price": 3000, "quantity": 1}],
+    )
+    calls = []
+
+    def parse(text):
+        calls.append(text)
+        if len(calls) == 1:
+            release.wait(5)
+        return llm_result
+
+    primary_mock = Mock()
+    primary_mock.parse.side_effect = parse
+    parser = FallbackReceiptParser(primary_mock, RegexReceiptParser(), deadline=0.05)
+
+    # When
+    parser.parse(CONFIDENT_TEXT)
+    release.set()
+    parser.parse(CONFIDENT_TEXT)
+
+    # Then - the second parse asked the LLM again
+    assert len(calls) == 2
+    assert parser.stats()["outcomes"]["deadline"] == 1
+    parser.shutdown()
+
+
+def _open_breaker():
+    breaker = CircuitBreaker("llm", min_calls=1, reset_timeout=60)
+    breaker.record_failure()
+    return breaker
+
+
+def test_fallback_parser_should_short_circuit_to_fallback_while_breaker_is_open():
+    # Given - the primary's breaker is open
+    primary_mock = Mock()
+    primary_mock.breaker = _open_breaker()
+    fallback_mock = Mock()
+    fallback_mock.parse.return_value = ParsedReceiptDTO(store_name="이마트", date=None, items=[])
+    fallback_mock.parse_store_name.return_value = "이마트"
+    parser = FallbackReceiptParser(primary_mock, fallback_mock, deadline=1.0)
+
+    # When
+    result = parser.parse("이마트")
+    store_name = parser.parse_store_name("이마트")
+
+    # Then
+    assert result.store_name == "이마트"
+    assert store_name == "이마트"
+    primary_mock.parse.assert_not_called()
+    assert parser.stats()["outcomes"]["circuit_open"] >= 1
+
+
+def test_cheap_first_parser_should_keep_cheap_result_while_breaker_is_open():
+    # Given - a low-confidence receipt and an open LLM breaker
+    expensive_mock = Mock()
+    expensive_mock.breaker = _open_breaker()
+    parser = CheapFirstReceiptParser(RegexReceiptParser(), expensive_mock, threshold=0.8)
+
+    # When
+    result = parser.parse("알 수 없는 텍스트")
+
+    # Then
+    expensive_mock.parse.assert_not_called()
+    assert result.confidence < 0.8
+    assert parser.stats() == {"cheap": 0, "escalated": 0, "circuit_open": 1}
+
+
+def test_cheap_first_parser_should_parse_each_text_once_across_accessors():
+    # Given
+    cheap_mock = Mock()
+    cheap_mock.parse.return_value = ParsedReceiptDTO(
+        store_name="이마트 구로점", date="2024-01-15 14:30:22",
+        items=[{"name": "사과", "price": 2000}, {"name": "바나나", "price": 3000}],
+    )
+    parser = CheapFirstReceiptParser(cheap_mock, Mock(), threshold=0.8, known_stores={"이마트 구로점"})
+
+    # When
+    store_name = parser.parse_store_name(CONFIDENT_TEXT)
+    items = parser.parse_items_and_prices(CONFIDENT_TEXT)
+    date = parser.parse_date(CONFIDENT_TEXT)
+
+    # Then
+    assert (store_name, date) == ("이마트 구로점", "2024-01-15 14:30:22")
+    assert [item["name"] for item in items] == ["사과", "바나나"]
+    cheap_mock.parse.assert_called_once_with(CONFIDENT_TEXT)
+    assert parser.stats()["cheap"] == 1
+
+
+class _StoreRepo:
+    def __init__(self):
+        self.list_calls = 0
+
+    def list_all(self):
+        self.list_calls += 1
+        return [Store(name="이마트 구로점"), Store(name="스타벅스 강남점")]
+
+
+@pytest.mark.parametrize("mode", ["cheap_first", "hedged"])
+@patch('src.services.receipt_parser_factory.os.getenv')
+@patch('openai.OpenAI')
+def test_should_load_known_stores_from_store_repo(mock_openai, mock_getenv, mode):
+    # Given
+    mock_getenv.side_effect = lambda key, default=None: {
+        "LLM_PARSER_ENABLED": "true",
+        "OPENAI_API_KEY": "test-key",
+        "LLM_PARSER_MODE": mode,
+    }.get(key, default)
+
+    store_repo = _StoreRepo()
+
+    # When
+    parser = ReceiptParserFactory.create_parser(store_repo=store_repo)
+
+    # Then - nothing is read while building; the scoring parser inside the
+    # template wrapper loads the stores on first lookup
+    assert store_repo.list_calls == 0
+    assert "이마트 구로점" in parser.parser.known_stores
+    assert "홈플러스" not in parser.parser.known_stores
+    assert store_repo.list_calls == 1
+    parser.close()
+
+
+@patch('src.services.receipt_parser_factory.os.getenv')
+@patch('openai.OpenAI')
+def test_should_share_one_parser_per_configuration(mock_openai, mock_getenv):
+    # Given
+    mock_getenv.side_effect = lambda key, default=None: {
+        "LLM_PARSER_ENABLED": "true",
+        "OPENAI_API_KEY": "test-key"
+    }.get(key, default)
+
+    # When
+    first = ReceiptParserFactory.get_parser()
+    second = ReceiptParserFactory.get_parser()
+    other_model = ReceiptParserFactory.get_parser(llm_model="gpt-4o")
+
+    # Then - one OpenAI client per configuration
+    assert first is second
+    assert other_model is not first
+    assert mock_openai.call_count == 2
+
+
+@patch('src.services.receipt_parser_factory.os.getenv')
+def test_should_try_store_templates_first_when_store_repo_given(mock_getenv):
+    # Given
+    mock_getenv.side_effect = lambda key, default=None: {"LLM_PARSER_ENABLED": "false"}.get(key, default)
+    store_repo = Mock()
+
+    # When
+    parser = ReceiptParserFactory.get_parser(store_repo=store_repo)
+
+    # Then
+    assert isinstance(parser, StoreTemplateReceiptParser)
+    assert parser.store_repo is store_repo
+    assert isinstance(parser.parser, RegexReceiptParser)
+    assert ReceiptParserFactory.get_parser(store_repo=store_repo) is parser
+    assert ReceiptParserFactory.get_parser() is not parser
+
+
+@patch('src.services.receipt_parser_factory.os.getenv')
+@patch('openai.OpenAI')
+def test_should_close_shared_parsers(mock_openai, mock_getenv):
+    # Given
+    mock_getenv.side_effect = lambda key, default=None: {
+        "LLM_PARSER_ENABLED": "true",
+        "OPENAI_API_KEY": "test-key",
+        "LLM_PARSER_MODE": "hedged",
+    }.get(key, default)
+    parser = ReceiptParserFactory.get_parser()
+
+    # When
+    ReceiptParserFactory.close_parsers()
+
+    # Then - the LLM client is closed and the next call builds a new parser
+    mock_openai.return_value.close.assert_called_once()
+    assert ReceiptParserFactory.get_parser() is not parser
@@ -0,0 +1,164 @@
+from unittest.mock import Mock
+
+from src.services.ocr_service import OCRService
+from src.services.receipt_scanner import (
+    DATE, ITEM, META, STORE, item_pattern_stats, prefilter_ocr_text, scan_receipt_text,
+)
+from src.services.regex_receipt_parser import RegexReceiptParser
+
+RECEIPT = """
+이마트 구로점
+서울특별시 구로구 구로동
+TEL: 02-1234-5678
+일시: 2024-01-15 14:30:22
+사과 2,000원
+바나나 3,000원
+총계: 5,000원
+"""
+
+
+def test_should_classify_every_line_in_one_pass():
+    scan = scan_receipt_text(RECEIPT)
+
+    assert scan.store_name == "이마트 구로점"
+    assert scan.date == "2024-01-15 14:30:22"
+    assert [(item.name, item.price) for item in scan.items] == [("사과", 2000), ("바나나", 3000)]
+    assert [kind for kind, _ in scan.lines] == [STORE, META, META, DATE, ITEM, ITEM, META]
+
+
+def test_should_scan_each_text_once_across_parse_methods():
+    ocr_service = OCRService()
+    text = RECEIPT + "\n우유 1,500원"  # unique text for a clean cache entry
+    before = scan_receipt_text.cache_info()
+
+    ocr_service.parse_store_name(text)
+    ocr_service.parse_items_and_prices(text)
+    ocr_service.parse_date(text)
+
+    after = scan_receipt_text.cache_info()
+    assert after.misses - before.misses == 1
+    assert after.hits - before.hits == 2
+
+
+def test_should_return_fresh_item_lists_from_cached_scan():
+    ocr_service = OCRService()
+
+    items = ocr_service.parse_items_and_prices(RECEIPT)
+    items[0]["quantity"] = 5
+
+    assert ocr_service.parse_items_and_prices(RECEIPT)[0] == {"name": "사과", "price": 2000}
+
+
+def test_regex_parser_should_build_dto_from_single_scan():
+    result = RegexReceiptParser(OCRService()).parse(RECEIPT)
+
+    assert result.store_name == "이마트 구로점"
+    assert result.date == "2024-01-15 14:30:22"
+    assert result.items == [
+        {"name": "사과", "price": 2000, "quantity": 1},
+        {"name": "바나나", "price": 3000, "quantity": 1},
+    ]
+
+
+
+def test_regex_parser_should_use_scan_of_any_service_that_provides_it():
+    # Given - a service with scan() and parse methods that must not be called
+    class ScanningService:
+        def __init__(self):
+            self.parse_store_name = Mock(side_effect=AssertionError("per-field parse"))
+
+        def scan(self, text):
+            return scan_receipt_text(text)
+
+    # When
+    result = RegexReceiptParser(ScanningService()).parse(RECEIPT)
+
+    # Then
+    assert result.store_name == "이마트 구로점"
+    assert [item["quantity"] for item in result.items] == [1, 1]
+
+
+def test_regex_parser_should_call_each_parse_method_without_scan():
+    ocr_service = Mock(spec=["parse_store_name", "parse_items_and_prices", "parse_date"])
+    ocr_service.parse_store_name.return_value = "GS25"
+    ocr_service.parse_items_and_prices.return_value = [{"name": "우유", "price": 1500}]
+    ocr_service.parse_date.return_value = None
+
+    result = RegexReceiptParser(ocr_service).parse("GS25\n우유 1,500원")
+
+    assert result.store_name == "GS25"
+    assert result.items == [{"name": "우유", "price": 1500, "quantity": 1}]
+
+def test_should_read_quantity_and_unit_price_from_multi_format_lines():
+    text = """
+스타벅스 강남점
+아메리카노 x2 9,000원
+카페라떼 4,500 x 3
+치즈케이크 6,200
+생수 2 2,000원
+합계 24,700
+"""
+    scan = scan_receipt_text(text)
+
+    assert scan.store_name == "스타벅스 강남점"
+    assert scan.item_dicts() == [
+        {"name": "아메리카노", "price": 4500, "quantity": 2},
+        {"name": "카페라떼", "price": 4500, "quantity": 3},
+        {"name": "치즈케이크", "price": 6200},
+        {"name": "생수", "price": 1000, "quantity": 2},
+    ]
+    assert [item.pattern for item in scan.items] == [
+        "marker_amount", "unit_marker", "bare_price", "qty_amount",
+    ]
+
+
+def test_should_use_header_column_order_for_ambiguous_rows():
+    # 20 x 50 and 50 x 20 are both 1,000 with a quantity under 100, so only
+    # the header can tell which column is 수량
+    qty_first = scan_receipt_text("품명 수량 단가 금액\n어묵 20 50 1,000")
+    unit_first = scan_receipt_text("상품명 단가 수량 금액\n어묵 20 50 1,000")
+    no_header = scan_receipt_text("분식집\n어묵 20 50 1,000")
+
+    assert qty_first.item_dicts() == [{"name": "어묵", "price": 50, "quantity": 20}]
+    assert unit_first.item_dicts() == [{"name": "어묵", "price": 20, "quantity": 50}]
+    assert no_header.item_dicts() == qty_first.item_dicts()
+    assert qty_first.lines[0][0] == META
+
+
+def test_should_skip_totals_and_payment_lines_without_won():
+    scan = scan_receipt_text("김밥천국\n라면 4,000\n소계 4,000\n카드 4,000\n승인번호 12345678")
+
+    assert scan.item_dicts() == [{"name": "라면", "price": 4000}]
+
+
+def test_should_count_hits_per_item_pattern():
+    before = item_pattern_stats()
+
+    scan_receipt_text("패턴 통계\n홍차 x2 7,000원\n녹차 3,000원")
+
+    after = item_pattern_stats()
+    assert after["marker_amount"] - before["marker_amount"] == 1
+    assert after["won_suffix"] - before["won_suffix"] == 1
+
+
+def test_should_prefilter_noise_lines_but_keep_unrecognized_ones():
+    text = "이마트 구로점\nTEL: 02-1234-5678\n=======\n사과   2,000원\n유기농 바나나 한송이\n승인번호: 1234\n총계: 2,000원"
+
+    assert prefilter_ocr_text(text) == "이마트 구로점\n사과 2,000원\n유기농 바나나 한송이\n총계: 2,000원"
+
+
+def test_should_not_read_points_address_or_lines_after_total_as_items():
+    text = """
+이마트 구로점
+주소 서울 강남구 테헤란로 120
+가맹점 12345
+사과 2,000
+합계 2,000
+적립포인트 450
+잔여포인트 12,340
+쿠폰 1,000
+"""
+    scan = scan_receipt_text(text)
+
+    assert scan.item_dicts() == [{"name": "사과", "price": 2000}]
+    assert scan.totals == (2000,)
@@ -0,0 +1,152 @@
+from unittest.mock import Mock
+
+from src.models.store import Store
+from src.services.receipt_parser_factory import ReceiptParserFactory
+from src.services.receipt_parser_interface import ParsedReceiptDTO
+from src.services.receipt_template import ReceiptTemplate, apply_template, learn_template
+
+RECEIPT = """이마트 구로점
+TEL: 02-123-4567
+일시: 2024-01-15 14:30:22
+사과 2,000원
+바나나 3,000원
+합계: 5,000원
+카드 5,000원
+"""
+
+
+def test_should_learn_template_from_successful_parse():
+    template = learn_template(RECEIPT, [{"name": "사과", "price": 2000}, {"name": "바나나", "price": 3000}])
+
+    assert template == ReceiptTemplate(header_lines=3, item_pattern="won_suffix", total_keyword="합계")
+
+
+def test_should_not_learn_when_parse_disagrees_with_total():
+    assert learn_template(RECEIPT, [{"name": "사과", "price": 2000}]) is None
+
+
+def test_should_apply_template_only_when_items_match_total():
+    template = ReceiptTemplate(header_lines=3, item_pattern="won_suffix", total_keyword="합계")
+
+    hit = apply_template(template, RECEIPT)
+    miss = apply_template(template, RECEIPT.replace("바나나 3,000원\n", "바나나 3,000원\n포도 1,000원\n"))
+
+    assert [item["name"] for item in hit.items] == ["사과", "바나나"]
+    assert hit.date == "2024-01-15 14:30:22"
+    assert miss is None
+
+
+def test_should_roundtrip_template_through_store_dict():
+    store = Store(name="이마트 구로점")
+    store.parse_template = ReceiptTemplate(3, "won_suffix", "합계").to_dict()
+
+    loaded = Store.from_dict(store.to_dict())
+
+    assert ReceiptTemplate.from_dict(loaded.parse_template) == ReceiptTemplate(3, "won_suffix", "합계")
+    assert ReceiptTemplate.from_dict(Mock()) is None
+
+
+def test_template_parser_should_skip_inner_parser_after_template_is_confirmed():
+    # Given - a store without a template and an inner (LLM-like) parser
+    store = Store(name="이마트 구로점")
+    store.id = "store1"
+    store_repo = Mock()
+    store_repo.find_by_name.return_value = store
+    inner = Mock()
+    inner.parse.return_value = ParsedReceiptDTO(
+        store_name="이마트 구로점", date=None,
+        items=[{"name": "사과", "price": 2000, "quantity": 1}, {"name": "바나나", "price": 3000, "quantity": 1}],
+    )
+    parser = ReceiptParserFactory.create_template_parser(inner, store_repo, min_samples=2)
+
+    # When - two different receipts confirm the template, the third uses it
+    parser.parse(RECEIPT)
+    parser.parse(RECEIPT.replace("14:30:22", "18:02:11"))
+    result = parser.parse(RECEIPT.replace("14:30:22", "20:45:00"))
+
+    # Then
+    assert inner.parse.call_count == 2
+    assert result.store_name == "이마트 구로점"
+    assert [item["price"] for item in result.items] == [2000, 3000]
+    assert store.parse_template["samples"] == 2
+    assert store_repo.update.call_count == 2
+    assert parser.stats() == {"hit": 1, "miss": 0, "learned": 2}
+
+
+def test_template_parser_should_fall_back_when_template_misses():
+    # Given - a confirmed template whose total no longer matches
+    store = Store(name="이마트 구로점")
+    store.id = "store1"
+    store.parse_template = ReceiptTemplate(3, "won_suffix", "합계", samples=2).to_dict()
+    store_repo = Mock()
+    store_repo.find_by_name.return_value = store
+    inner = Mock()
+    inner.parse.return_value = ParsedReceiptDTO(store_name="이마트 구로점", date=None, items=[])
+    parser = ReceiptParserFactory.create_template_parser(inner, store_repo, min_samples=2)
+
+    # When
+    parser.parse(RECEIPT.replace("합계: 5,000원", "합계: 6,000원"))
+
+    # Then
+    inner.parse.assert_called_once()
+    assert parser.stats()["miss"] == 1
+
+
+def test_template_parser_should_count_each_receipt_once():
+    # Given
+    store = Store(name="이마트 구로점")
+    store.id = "store1"
+    store_repo = Mock()
+    store_repo.find_by_name.return_value = store
+    inner = Mock()
+    inner.parse.return_value = ParsedReceiptDTO(
+        store_name="이마트 구로점", date=None,
+        items=[{"name": "사과", "price": 2000, "quantity": 1}, {"name": "바나나", "price": 3000, "quantity": 1}],
+    )
+    first = ReceiptParserFactory.create_template_parser(inner, store_repo, min_samples=2)
+    second = ReceiptParserFactory.create_template_parser(inner, store_repo, min_samples=2)
+
+    # When - the same receipt is parsed by two parsers and through every accessor
+    first.parse_store_name(RECEIPT)
+    first.parse_items_and_prices(RECEIPT)
+    first.parse_date(RECEIPT)
+    second.parse(RECEIPT.replace("사과", "  사과"))
+
+    # Then - one inner parse per parser, and still a single sample
+    assert inner.parse.call_count == 2
+    assert store.parse_template["samples"] == 1
+    assert store_repo.update.call_count == 1
+
+
+def test_template_parser_should_keep_confirmed_template_until_new_layout_is_confirmed():
+    # Given - a confirmed template and receipts that now print 총계 instead of 합계
+    store = Store(name="이마트 구로점")
+    store.id = "store1"
+    store.parse_template = ReceiptTemplate(3, "won_suffix", "합계", samples=2).to_dict()
+    store_repo = Mock()
+    store_repo.find_by_name.return_value = store
+    inner = Mock()
+    inner.parse.return_value = ParsedReceiptDTO(
+        store_name="이마트 구로점", date=None,
+        items=[{"name": "사과", "price": 2000, "quantity": 1}, {"name": "바나나", "price": 3000, "quantity": 1}],
+    )
+    parser = ReceiptParserFactory.create_template_parser(inner, store_repo, min_samples=2)
+    changed = RECEIPT.replace("합계", "총계")
+
+    # When - one odd receipt
+    parser.parse(changed)
+
+    # Then - the confirmed template stays, the new layout is only a candidate
+    template = ReceiptTemplate.from_dict(store.parse_template)
+    assert (template.total_keyword, template.samples) == ("합계", 2)
+    assert (template.candidate.total_keyword, template.candidate.samples) == ("총계", 1)
+    assert parser.parse(RECEIPT).items == inner.parse.return_value.items
+    assert inner.parse.call_count == 1
+
+    # When - a second, distinct receipt with the new layout
+    parser.parse(changed.replace("14:30:22", "18:02:11"))
+
+    # Then - the candidate is confirmed and replaces the old template
+    template = ReceiptTemplate.from_dict(store.parse_template)
+    assert (template.total_keyword, template.samples, template.candidate) == ("총계", 2, None)
+    assert parser.stats() == {"hit": 1, "miss": 2, "learned": 2}
@@ -0,0 +1,101 @@
+import io
+import json
+
+from src.repositories.fake_firestore import FakeFirestore
+from src.repositories.receipt_repository import ReceiptRepository
+from src.services.reparse_job import ReparseCheckpoint, run_reparse
+
+OCR_TEXT = """이마트 구로점
+아메리카노 x2 9,000원
+합계: 9,000원
+"""
+
+
+def _repo():
+    db = FakeFirestore()
+    receipts = db.collection("receipts")
+    # Stored before the "x2" pattern existed: one item at the full amount
+    receipts.add({"ocr_text": OCR_TEXT, "items": [
+        {"name": "아메리카노 x2", "price": "9000", "quantity": 1, "assigned_users": []}]}, document_id="stale")
+    receipts.add({"ocr_text": OCR_TEXT, "items": [
+        {"name": "아메리카노", "price": "4500", "quantity": 2, "assigned_users": []}]}, document_id="current")
+    receipts.add({"ocr_text": OCR_TEXT, "split_transactions": {"u1": "9000"}, "items": [
+        {"name": "아메리카노 x2", "price": "9000", "quantity": 1, "assigned_users": ["u1"]}]}, document_id="split")
+    receipts.add({"items": []}, document_id="no_text")
+    return db, ReceiptRepository(client=db)
+
+
+def test_should_diff_and_update_changed_receipts_in_batches(tmp_path):
+    # Given
+    db, repo = _repo()
+    diff_out = io.StringIO()
+
+    # When
+    counts = run_reparse(repo, ReparseCheckpoint(str(tmp_path / "ckpt")), apply=True,
+                         workers=2, batch_size=2, diff_out=diff_out)
+
+    # Then - the stale receipt is rewritten; the split one is only reported
+    assert counts == {"scanned": 3, "skipped": 0, "unchanged": 1, "changed": 2, "locked": 1, "rejected": 0, "updated": 1}
+    stale = db.collection("receipts").document("stale").get().to_dict()
+    assert stale["items"][0]["name"] == "아메리카노"
+    assert stale["items"][0]["quantity"] == 2
+    assert stale["total"] == "9000"
+    split = db.collection("receipts").document("split").get().to_dict()
+    assert split["items"][0]["assigned_users"] == ["u1"]
+    diffs = [json.loads(line) for line in diff_out.getvalue().splitlines()]
+    assert {d["receipt_id"]: d["locked"] for d in diffs} == {"stale": False, "split": True}
+
+
+def test_should_resume_from_checkpoint(tmp_path):
+    # Given - an interrupted run that checkpointed the first receipt in id order
+    _, repo = _repo()
+    checkpoint_path = str(tmp_path / "ckpt")
+    ReparseCheckpoint(checkpoint_path).mark(["current"])
+
+    # When
+    counts = run_reparse(repo, ReparseCheckpoint(checkpoint_path), workers=1)
+    rerun = run_reparse(repo, ReparseCheckpoint(checkpoint_path), workers=1)
+
+    # Then - the rest is scanned once; a finished run reads nothing
+    assert counts["scanned"] == 2
+    assert rerun["scanned"] == 0
+
+
+def test_should_stream_ocr_texts_in_pages(tmp_path):
+    # Given
+    db, repo = _repo()
+    db.reset_stats()
+
+    # When
+    rows = list(repo.stream_ocr_texts(page_size=2))
+
+    # Then - one short query per page, in id order, receipts without text skipped
+    assert [receipt_id for receipt_id, _, _ in rows] == ["current", "split", "stale"]
+    assert db.rpc_counts["query"] == 3  # 2 + 2 documents, then an empty page
+    assert [r for r, _, _ in repo.stream_ocr_texts(page_size=2, start_after="split")] == ["stale"]
+
+
+def test_should_never_apply_empty_or_unverified_items(tmp_path):
+    # Given - LLM-parsed receipts the regex patterns read badly
+    db = FakeFirestore()
+    receipts = db.collection("receipts")
+    llm_items = [{"name": "라떼", "price": "5000", "quantity": 1, "assigned_users": []}]
+    receipts.add({"ocr_text": "카페\n라떼 오천원\n합계: 5,000원", "parsed_by": "gpt-4o-mini",
+                  "items": llm_items, "total": "5000"}, document_id="empty")
+    receipts.add({"ocr_text": "카페\n라떼 4,000원\n합계: 5,000원", "parsed_by": "gpt-4o-mini",
+                  "items": llm_items, "total": "5000"}, document_id="off_total")
+    receipts.add({"ocr_text": "카페\n라떼 4,000원\n합계: 5,000원", "parsed_by": "regex",
+                  "items": [], "total": "0"}, document_id="regex")
+
+    # When
+    counts = run_reparse(ReceiptRepository(client=db), ReparseCheckpoint(str(tmp_path / "ckpt")),
+                         apply=True, workers=1)
+
+    # Then - only the regex-parsed receipt is rewritten
+    assert counts["rejected"] == 2
+    assert counts["updated"] == 1
+    assert db.collection("receipts").document("empty").get().to_dict()["items"] == llm_items
+    assert db.collection("receipts").document("off_total").get().to_dict()["total"] == "5000"
+    regex = db.collection("receipts").document("regex").get().to_dict()
+    assert regex["total"] == "4000"
+    assert "total_amount" not in regex
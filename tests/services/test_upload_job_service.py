@@ -0,0 +1,113 @@
+import threading
+import pytest
+from unittest.mock import Mock
+from src.services.upload_job_service import UploadJobService, UploadQueueFull
+
+
+def _ocr_service(text="이마트\n사과 2,000원", store_name="이마트", items=None):
+    ocr_service = Mock()
+    ocr_service.extract_text_from_image.return_value = text
+    ocr_service.parse_store_name.return_value = store_name
+    ocr_service.parse_items_and_prices.return_value = items if items is not None else [
+        {"name": "사과", "price": 2000}
+    ]
+    return ocr_service
+
+
+def test_should_run_ocr_and_parsing_in_background():
+    store_repo = Mock()
+    store_repo.find_by_name.return_value = Mock(id="store1")
+    service = UploadJobService(_ocr_service(), store_repo, max_workers=1)
+
+    job = service.submit(b"image")
+    finished = service.wait(job.id, timeout=5)
+
+    assert finished.status == "done"
+    assert finished.progress == 100
+    assert finished.result == {
+        "store_id": "store1",
+        "store_name": "이마트",
+        "items": [{"name": "사과", "price": 2000}],
+        "total": 2000,
+    }
+    service.shutdown()
+
+
+def test_should_report_failure_when_store_is_unknown():
+    store_repo = Mock()
+    store_repo.find_by_name.return_value = None
+    service = UploadJobService(_ocr_service(), store_repo, max_workers=1)
+
+    job = service.wait(service.submit(b"image").id, timeout=5)
+
+    assert job.status == "failed"
+    assert job.error["code"] == "store_not_found"
+    service.shutdown()
+
+
+def test_should_report_unexpected_errors_as_failed_jobs():
+    ocr_service = _ocr_service()
+    ocr_service.extract_text_from_image.side_effect = RuntimeError("boom")
+    service = UploadJobService(ocr_service, Mock(), max_workers=1)
+
+    job = service.wait(service.submit(b"image").id, timeout=5)
+
+    assert job.status == "failed"
+    assert job.error == {"code": "processing_error", "message": "boom"}
+    service.shutdown()
+
+
+def test_should_reject_jobs_beyond_pending_limit():
+    release = threading.Event()
+    ocr_service = _ocr_service()
+    ocr_service.extract_text_from_image.side_effect = lambda content: release.wait(5) and "text"
+    service = UploadJobService(ocr_service, Mock(), max_workers=1, max_pending=2)
+
+    service.submit(b"one")
+    service.submit(b"two")
+    with pytest.raises(UploadQueueFull):
+        service.submit(b"three")
+
+    release.set()
+    service.shutdown()
+
+
+
+def test_should_read_spooled_file_and_delete_it_after_ocr(tmp_path):
+    upload = tmp_path / "upload.jpg"
+    upload.write_bytes(b"image")
+    ocr_service = _ocr_service()
+    seen = {}
+    ocr_service.extract_text_from_image.side_effect = lambda content: seen.setdefault("bytes", bytes(content)) and "text"
+    store_repo = Mock()
+    store_repo.find_by_name.return_value = Mock(id="store1")
+    service = UploadJobService(ocr_service, store_repo, max_workers=1)
+
+    job = service.wait(service.submit_file(str(upload)).id, timeout=5)
+
+    assert job.status == "done"
+    assert seen["bytes"] == b"image"
+    assert not upload.exists()
+    service.shutdown()
+
+
+def test_should_delete_spooled_file_when_queue_is_full(tmp_path):
+    release = threading.Event()
+    ocr_service = _ocr_service()
+    ocr_service.extract_text_from_image.side_effect = lambda content: release.wait(5) and "text"
+    service = UploadJobService(ocr_service, Mock(), max_workers=1, max_pending=1)
+    upload = tmp_path / "upload.jpg"
+    upload.write_bytes(b"image")
+
+    service.submit(b"one")
+    with pytest.raises(UploadQueueFull):
+        service.submit_file(str(upload))
+
+    assert not upload.exists()
+    release.set()
+    service.shutdown()
+
+def test_should_return_none_for_unknown_job():
+    service = UploadJobService(_ocr_service(), Mock(), max_workers=1)
+    assert service.get("missing") is None
+    service.shutdown()
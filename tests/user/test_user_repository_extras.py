@@ -32,3 +32,20 @@ def test_user_repository_get_by_id_returns_none_when_missing():
 
     assert repo.get_by_id("missing") is None
 
+
+
+def test_user_repository_get_many_reads_all_users_in_one_call():
+    mock_firestore = Mock()
+    found = Mock(id="u1", exists=True)
+    found.to_dict.return_value = {"name": "홍길동", "deposit": 1000}
+    missing = Mock(id="u2", exists=False)
+    mock_firestore.get_all.return_value = [found, missing]
+
+    repo = UserRepository(mock_firestore)
+
+    users = repo.get_many(["u1", "u2", "u1"])
+
+    mock_firestore.get_all.assert_called_once()
+    assert len(mock_firestore.get_all.call_args[0][0]) == 2
+    assert list(users) == ["u1"]
+    assert users["u1"].name == "홍길동"
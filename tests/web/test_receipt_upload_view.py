@@ -80,3 +80,104 @@ def test_should_display_ocr_results_for_confirmation():
     assert 'receipt-confirmation' in text
     assert 'Test Store' in text
     assert '10000' in text
+
+
+def test_should_ocr_multiple_receipts_in_one_batch():
+    from io import BytesIO
+    from src.services.ocr_service import OCRResult
+
+    received = []
+    mock_ocr_service = Mock()
+
+    def extract_text_batch(contents):
+        # Uploads arrive as buffers that are released after the request
+        received.append([bytes(c) for c in contents])
+        return [
+            OCRResult(text="Store A\nCoffee 4,000원"),
+            OCRResult(text="", error="Bad image data"),
+            OCRResult(text="Store A\nTea 3,000원"),
+        ]
+
+    mock_ocr_service.extract_text_batch.side_effect = extract_text_batch
+    mock_ocr_service.parse_store_name.return_value = "Store A"
+    mock_ocr_service.parse_items_and_prices.side_effect = [
+        [{"name": "Coffee", "price": 4000}],
+        [{"name": "Tea", "price": 3000}],
+    ]
+    mock_store_repo = Mock()
+    mock_store_repo.find_by_name.return_value = Mock(id='storeA')
+
+    app = create_app(user_repo=Mock(), receipt_repo=Mock(), coupon_repo=Mock(),
+                     ocr_service=mock_ocr_service, store_repo=mock_store_repo)
+    client = app.test_client()
+    data = {'files': [(BytesIO(b'one'), 'a.jpg'), (BytesIO(b'two'), 'b.jpg'), (BytesIO(b'three'), 'c.jpg')]}
+    response = client.post('/upload/batch', data=data, content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert received == [[b'one', b'two', b'three']]
+    receipts = response.get_json()['receipts']
+    assert [r['filename'] for r in receipts] == ['a.jpg', 'b.jpg', 'c.jpg']
+    assert receipts[0]['store_id'] == 'storeA'
+    assert receipts[0]['total'] == 4000
+    assert receipts[1]['error']['code'] == 'ocr_failed'
+    assert receipts[2]['items'] == [{"name": "Tea", "price": 3000}]
+    mock_store_repo.find_by_name.assert_called_once_with("Store A")
+
+
+def test_should_reject_batch_upload_without_files():
+    app = create_app(user_repo=Mock(), receipt_repo=Mock(), coupon_repo=Mock(),
+                     ocr_service=Mock(), store_repo=Mock())
+    client = app.test_client()
+
+    response = client.post('/upload/batch', data={}, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+    assert response.get_json()['error']['code'] == 'missing_file'
+
+
+def test_should_queue_upload_job_and_report_parsed_items():
+    from io import BytesIO
+    from src.services.upload_job_service import UploadJobService
+
+    mock_ocr_service = Mock()
+    mock_ocr_service.extract_text_from_image.return_value = "Test Store\nItem 10,000원"
+    mock_ocr_service.parse_store_name.return_value = "Test Store"
+    mock_ocr_service.parse_items_and_prices.return_value = [{"name": "Item", "price": 10000}]
+    mock_store_repo = Mock()
+    mock_store_repo.find_by_name.return_value = Mock(id='store1')
+    upload_jobs = UploadJobService(mock_ocr_service, mock_store_repo, max_workers=1)
+
+    app = create_app(user_repo=Mock(), receipt_repo=Mock(), coupon_repo=Mock(),
+                     ocr_service=mock_ocr_service, store_repo=mock_store_repo,
+                     upload_jobs=upload_jobs)
+    client = app.test_client()
+    data = {'file': (BytesIO(b'fake image'), 'test.jpg')}
+
+    # When: upload in job mode
+    response = client.post('/upload?async=1', data=data, content_type='multipart/form-data')
+
+    # Then: accepted immediately with a job id
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    assert response.headers['Location'].endswith(f'/upload/jobs/{job_id}')
+
+    upload_jobs.wait(job_id, timeout=5)
+    status = client.get(f'/upload/jobs/{job_id}')
+    body = status.get_json()
+    assert body['status'] == 'done'
+    assert body['result']['items'] == [{"name": "Item", "price": 10000}]
+    assert 'store_id=store1' in body['confirm_url']
+    with client.session_transaction() as sess:
+        assert sess['parsed_items'] == [{"name": "Item", "price": 10000}]
+    upload_jobs.shutdown()
+
+
+def test_should_return_404_for_unknown_upload_job():
+    app = create_app(user_repo=Mock(), receipt_repo=Mock(), coupon_repo=Mock(),
+                     ocr_service=Mock(), store_repo=Mock())
+    client = app.test_client()
+
+    response = client.get('/upload/jobs/missing')
+
+    assert response.status_code == 404
+    assert response.get_json()['error']['code'] == 'job_not_found'
@@ -203,4 +203,84 @@ def test_should_process_multi_user_payment():
     
     # And: Should award coupons to deposit payers only
     mock_coupon_service.award_coupon_for_purchase.assert_any_call('user1', 'store1')
-    mock_coupon_service.award_coupon_for_purchase.assert_any_call('user2', 'store1')
\ No newline at end of file
+    mock_coupon_service.award_coupon_for_purchase.assert_any_call('user2', 'store1')
+
+class _InMemoryUserRepo:
+    """User repository with batched reads, as exposed by UserRepository."""
+
+    def __init__(self, users):
+        self.users = users
+
+    def get_by_id(self, user_id):
+        return self.users.get(user_id)
+
+    def get_many(self, user_ids):
+        return {uid: self.users[uid] for uid in user_ids if uid in self.users}
+
+    def list_all(self):
+        return list(self.users.values())
+
+
+def test_payment_summary_reads_users_within_budget(call_budget):
+    # Given: ten users assigned to one split payment
+    users = {
+        f'user{i}': Mock(id=f'user{i}', name=f'사용자{i}', deposit=Decimal('50000'))
+        for i in range(10)
+    }
+    user_repo = call_budget.wrap('user_repo', _InMemoryUserRepo(users))
+    mock_store_repo = Mock()
+    mock_store_repo.get_by_id.return_value = Mock(id='store1', name='스타벅스')
+
+    app = call_budget.attach(create_app(
+        user_repo=user_repo,
+        receipt_repo=Mock(),
+        coupon_repo=Mock(),
+        ocr_service=Mock(),
+        store_repo=mock_store_repo
+    ))
+    client = app.test_client()
+
+    with client.session_transaction() as session:
+        session['split_assignments'] = {uid: 1000 for uid in users}
+        session['assignment_store_id'] = 'store1'
+
+    # When
+    response = client.get('/payment-summary')
+
+    # Then: users are fetched in a batch rather than one read per user
+    assert response.status_code == 200
+    assert '사용자9' in response.get_data(as_text=True)
+    call_budget.assert_at_most(2, 'user_repo', 'get_by_id', 'get_many')
+
+
+def test_process_split_payment_falls_back_to_per_user_reads(call_budget):
+    # Given: a repository without batched reads
+    mock_user_repo = Mock()
+    user1 = Mock(id='user1', name='김철수', deposit=Decimal('50000'))
+    user2 = Mock(id='user2', name='이영희', deposit=Decimal('30000'))
+    mock_user_repo.get_by_id.side_effect = lambda uid: user1 if uid == 'user1' else user2
+    user_repo = call_budget.wrap('user_repo', mock_user_repo)
+
+    app = call_budget.attach(create_app(
+        user_repo=user_repo,
+        receipt_repo=Mock(),
+        coupon_repo=Mock(),
+        ocr_service=Mock(),
+        store_repo=Mock(),
+        coupon_service=Mock()
+    ))
+    client = app.test_client()
+
+    # When
+    response = client.post('/process-split-payment', json={
+        'store_id': 'store1',
+        'user_payments': [
+            {'user_id': 'user1', 'amount': 15000, 'method': 'deposit'},
+            {'user_id': 'user2', 'amount': 8500, 'method': 'deposit'},
+        ]
+    })
+
+    # Then: exactly one read per distinct user
+    assert response.status_code == 200
+    assert call_budget.calls('user_repo', 'get_by_id') == 2
+    call_budget.assert_at_most(2, 'user_repo', 'save')
@@ -0,0 +1,21 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_should_not_import_heavy_sdks_when_loading_app():
+    # Given: a fresh interpreter (this one already has the SDKs loaded)
+    code = (
+        "import sys, src.web.app, src.services.receipt_parser_factory; "
+        "print(sorted(m for m in ('openai', 'google.cloud.firestore', 'google.cloud.vision') if m in sys.modules))"
+    )
+
+    # When
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    # Then
+    assert result.stdout.strip() == "[]"
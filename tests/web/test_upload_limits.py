@@ -0,0 +1,69 @@
+import mmap
+from io import BytesIO
+from unittest.mock import Mock
+from src.web.app import create_app
+
+
+def _app(ocr_service, store_repo=None):
+    return create_app(user_repo=Mock(), receipt_repo=Mock(), coupon_repo=Mock(),
+                      ocr_service=ocr_service, store_repo=store_repo or Mock())
+
+
+def test_should_reject_uploads_over_configured_limit(monkeypatch):
+    monkeypatch.setenv('MAX_UPLOAD_MB', '0.01')  # ~10 KB
+    mock_ocr_service = Mock()
+    client = _app(mock_ocr_service).test_client()
+
+    data = {'file': (BytesIO(b'x' * 20_000), 'big.jpg')}
+    response = client.post('/upload', data=data, content_type='multipart/form-data')
+
+    assert response.status_code == 413
+    assert response.get_json()['error']['code'] == 'payload_too_large'
+    mock_ocr_service.extract_text_from_image.assert_not_called()
+
+
+def test_should_spool_large_uploads_and_pass_mmap_to_ocr(monkeypatch):
+    monkeypatch.setenv('UPLOAD_SPOOL_THRESHOLD_KB', '1')
+    received = {}
+
+    def extract_text_from_image(content):
+        received['type'] = type(content)
+        received['path'] = content.path
+        received['bytes'] = bytes(content)
+        return "Store\nItem 1,000원"
+
+    mock_ocr_service = Mock()
+    mock_ocr_service.extract_text_from_image.side_effect = extract_text_from_image
+    mock_ocr_service.parse_store_name.return_value = "Store"
+    mock_ocr_service.parse_items_and_prices.return_value = []
+    store_repo = Mock()
+    store_repo.find_by_name.return_value = Mock(id='store1')
+    client = _app(mock_ocr_service, store_repo).test_client()
+
+    payload = b'\xff\xd8' + b'a' * 5000
+    data = {'file': (BytesIO(payload), 'photo.jpg')}
+    response = client.post('/upload', data=data, content_type='multipart/form-data')
+
+    assert response.status_code == 302
+    assert issubclass(received['type'], mmap.mmap)
+    assert received['path'] is not None
+    assert received['bytes'] == payload
+
+
+def test_should_keep_small_uploads_in_memory_as_memoryview():
+    received = {}
+
+    def extract_text_from_image(content):
+        received['type'] = type(content)
+        return ""
+
+    mock_ocr_service = Mock()
+    mock_ocr_service.extract_text_from_image.side_effect = extract_text_from_image
+    mock_ocr_service.parse_store_name.return_value = None
+    client = _app(mock_ocr_service).test_client()
+
+    data = {'file': (BytesIO(b'tiny'), 'photo.jpg')}
+    response = client.post('/upload', data=data, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+    assert received['type'] is memoryview